@@ -1,5 +1,12 @@
 """Shallow Dive workflow package."""
 
-from .runner import analyze_single_company, analyze_batch, main
+__all__ = ["aanalyze_single_company", "analyze_single_company", "analyze_batch", "regenerate_sections", "main"]
 
-__all__ = ["analyze_single_company", "analyze_batch", "main"]
+
+def __getattr__(name):
+    # Imported lazily so lightweight modules (e.g. shallow_dive.client) do not load LangChain
+    if name in __all__:
+        from . import runner
+
+        return getattr(runner, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,169 @@
+"""Persistent SQLite response cache shared by provider calls.
+
+Entries live in one ``CACHE_DB`` file, grouped by namespace (e.g. ``search``).
+Values are zlib-compressed JSON with an expiry time; each namespace is capped
+at a number of entries and evicts the least recently used ones. Expired
+entries are kept until evicted so callers can revalidate and renew them.
+Hit/miss counters are kept per process for run summaries. Coroutines use the
+``a``-prefixed methods, which run the SQLite work in a worker thread so a slow
+disk write never stalls the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict
+
+from . import config
+
+logger = config.logger
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    with _lock:
+        if _conn is None:
+            directory = os.path.dirname(config.CACHE_DB)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _conn = sqlite3.connect(config.CACHE_DB, check_same_thread=False, timeout=30)
+            _conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            _conn.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, last_used)")
+            _conn.commit()
+        return _conn
+
+
+def make_key(*parts: Any) -> str:
+    """Stable hash of JSON-serializable key parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """One namespace of the persistent cache."""
+
+    def __init__(self, namespace: str, max_entries: int):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(config.CACHE_DB) and self.max_entries > 0
+
+    def get(self, key: str) -> Any | None:
+        """Cached value for ``key``, or None when missing or expired."""
+        if not self.enabled:
+            return None
+        conn = _connection()
+        now = time.time()
+        with _lock:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, now),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store ``value`` for ``ttl_seconds`` and evict the least recently used overflow."""
+        if not self.enabled or ttl_seconds <= 0:
+            return
+        conn = _connection()
+        now = time.time()
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        with _lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, blob, now + ttl_seconds, now),
+            )
+            conn.execute(
+                """
+                DELETE FROM cache WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache WHERE namespace = ? ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.max_entries),
+            )
+            conn.commit()
+
+    def peek(self, key: str) -> Any | None:
+        """Cached value even if expired (not counted as a hit or miss)."""
+        if not self.enabled:
+            return None
+        conn = _connection()
+        with _lock:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def renew(self, key: str, ttl_seconds: float) -> None:
+        """Extend an entry's expiry without rewriting its value."""
+        if not self.enabled:
+            return
+        conn = _connection()
+        now = time.time()
+        with _lock:
+            conn.execute(
+                "UPDATE cache SET expires_at = ?, last_used = ? WHERE namespace = ? AND key = ?",
+                (now + ttl_seconds, now, self.namespace, key),
+            )
+            conn.commit()
+
+    def delete(self, key: str) -> None:
+        if not self.enabled:
+            return
+        conn = _connection()
+        with _lock:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+            conn.commit()
+
+    async def aget(self, key: str) -> Any | None:
+        """Async variant of get."""
+        return await asyncio.to_thread(self.get, key) if self.enabled else None
+
+    async def aset(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Async variant of set."""
+        if self.enabled:
+            await asyncio.to_thread(self.set, key, value, ttl_seconds)
+
+    async def apeek(self, key: str) -> Any | None:
+        """Async variant of peek."""
+        return await asyncio.to_thread(self.peek, key) if self.enabled else None
+
+    async def arenew(self, key: str, ttl_seconds: float) -> None:
+        """Async variant of renew."""
+        if self.enabled:
+            await asyncio.to_thread(self.renew, key, ttl_seconds)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
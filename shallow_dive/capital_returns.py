@@ -0,0 +1,200 @@
+"""Vectorized DuPont and ROIC engine over reported fundamentals.
+
+Income statement, key metrics and ratios rows (the financial_metrics schema,
+or the Parquet fundamentals store for a whole universe) are merged into one
+frame keyed by ticker and period, and every return metric is computed with
+column arithmetic grouped by ticker. Sections 1.3 and 4.1 receive the results
+as compact tables instead of raw JSON, so the model interprets the numbers
+rather than deriving them.
+
+Reported ratios are used where the provider supplies them; otherwise they are
+derived (e.g. asset turnover as ROA / net margin, equity multiplier as
+ROE / ROA, ROIC as NOPAT / invested capital, cash conversion as operating
+cash flow per share / net income per share).
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from . import fundamentals_store
+
+# Source fields per financial_metrics table
+INCOME_FIELDS = ["revenue", "operatingIncome", "incomeBeforeTax", "incomeTaxExpense", "netIncome"]
+METRIC_FIELDS = [
+    "returnOnEquity",
+    "returnOnAssets",
+    "returnOnInvestedCapital",
+    "investedCapital",
+    "incomeQuality",
+    "operatingCashFlowPerShare",
+    "netIncomePerShare",
+]
+RATIO_FIELDS = ["netProfitMargin", "assetTurnover", "financialLeverageRatio"]
+
+_TABLE_FIELDS = {"income_statement": INCOME_FIELDS, "metrics": METRIC_FIELDS, "ratios": RATIO_FIELDS}
+
+# Output column -> (label, format)
+DUPONT_COLUMNS = {
+    "revenue_growth": ("Revenue growth", "pct"),
+    "operating_margin": ("Operating margin", "pct"),
+    "interest_burden": ("Interest burden (EBT/EBIT)", "ratio"),
+    "tax_burden": ("Tax burden (NI/EBT)", "ratio"),
+    "net_margin": ("Net margin", "pct"),
+    "asset_turnover": ("Asset turnover", "times"),
+    "equity_multiplier": ("Equity multiplier", "times"),
+    "roe": ("ROE", "pct"),
+    "cash_conversion": ("Cash conversion (OCF/NI)", "ratio"),
+}
+ROIC_COLUMNS = {
+    "nopat_margin": ("NOPAT margin", "pct"),
+    "capital_turns": ("Capital turns (Rev/IC)", "times"),
+    "roic": ("ROIC", "pct"),
+    "incremental_roic": ("Incremental ROIC", "pct"),
+    "roe": ("ROE", "pct"),
+    "cash_conversion": ("Cash conversion (OCF/NI)", "ratio"),
+}
+
+
+def _table(rows: Any, fields: List[str]) -> pd.DataFrame:
+    frame = pd.DataFrame([row for row in rows if isinstance(row, dict)] if isinstance(rows, list) else [])
+    if frame.empty or "date" not in frame.columns:
+        return pd.DataFrame(columns=["date"] + fields)
+    frame = frame.reindex(columns=["date"] + fields)
+    frame[fields] = frame[fields].apply(pd.to_numeric, errors="coerce")
+    frame["date"] = pd.to_datetime(frame["date"], errors="coerce")
+    return frame.dropna(subset=["date"]).drop_duplicates("date")
+
+
+def company_frame(ticker: str, financial_metrics: Dict[str, Any]) -> pd.DataFrame:
+    """One company's periods from a financial_metrics dict, merged on ``date``."""
+    merged = None
+    for table, fields in _TABLE_FIELDS.items():
+        frame = _table(financial_metrics.get(table), fields)
+        merged = frame if merged is None else merged.merge(frame, on="date", how="outer")
+    merged.insert(0, "ticker", ticker.upper())
+    return merged
+
+
+def universe_frame(tickers: List[str] | None = None) -> pd.DataFrame:
+    """Every stored period for ``tickers`` (default: the whole store), merged on ticker and ``date``."""
+    merged = None
+    for table, fields in _TABLE_FIELDS.items():
+        frame = fundamentals_store.read(table, fields, tickers)
+        if frame.empty:
+            frame = pd.DataFrame(columns=["ticker", "date"])
+        frame = frame.reindex(columns=["ticker", "date"] + fields)
+        frame["date"] = pd.to_datetime(frame["date"], errors="coerce")
+        frame = frame.drop_duplicates(["ticker", "date"])
+        merged = frame if merged is None else merged.merge(frame, on=["ticker", "date"], how="outer")
+    return merged
+
+
+def _divide(numerator: pd.Series, denominator: pd.Series) -> pd.Series:
+    """Element-wise ratio with zero or missing denominators as NaN."""
+    return (numerator / denominator.where(denominator != 0)).replace([np.inf, -np.inf], np.nan)
+
+
+def compute_returns(frame: pd.DataFrame) -> pd.DataFrame:
+    """DuPont decomposition, ROIC, incremental ROIC and cash conversion per ticker and period.
+
+    Works on any number of tickers at once; periods are sorted oldest first
+    within each ticker so growth and incremental figures use the prior period.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=["ticker", "date"] + list({**DUPONT_COLUMNS, **ROIC_COLUMNS}))
+    f = frame.sort_values(["ticker", "date"], ignore_index=True)
+    by_ticker = f.groupby("ticker", sort=False)
+
+    net_margin = _divide(f["netIncome"], f["revenue"]).fillna(f["netProfitMargin"])
+    asset_turnover = f["assetTurnover"].fillna(_divide(f["returnOnAssets"], net_margin))
+    equity_multiplier = f["financialLeverageRatio"].fillna(_divide(f["returnOnEquity"], f["returnOnAssets"]))
+    tax_rate = _divide(f["incomeTaxExpense"], f["incomeBeforeTax"]).clip(0, 1)
+    nopat = f["operatingIncome"] * (1 - tax_rate)
+    roic = f["returnOnInvestedCapital"].fillna(_divide(nopat, f["investedCapital"]))
+
+    # Incremental ROIC only where invested capital grew
+    delta_capital = by_ticker["investedCapital"].diff()
+    delta_nopat = nopat.groupby(f["ticker"]).diff()
+    incremental_roic = _divide(delta_nopat, delta_capital.where(delta_capital > 0))
+
+    cash_conversion = f["incomeQuality"].fillna(_divide(f["operatingCashFlowPerShare"], f["netIncomePerShare"]))
+
+    return pd.DataFrame(
+        {
+            "ticker": f["ticker"],
+            "date": f["date"],
+            "revenue_growth": by_ticker["revenue"].pct_change(fill_method=None),
+            "operating_margin": _divide(f["operatingIncome"], f["revenue"]),
+            "interest_burden": _divide(f["incomeBeforeTax"], f["operatingIncome"]),
+            "tax_burden": _divide(f["netIncome"], f["incomeBeforeTax"]),
+            "net_margin": net_margin,
+            "asset_turnover": asset_turnover,
+            "equity_multiplier": equity_multiplier,
+            "roe": f["returnOnEquity"].fillna(net_margin * asset_turnover * equity_multiplier),
+            "nopat_margin": _divide(nopat, f["revenue"]),
+            "capital_turns": _divide(f["revenue"], f["investedCapital"]),
+            "roic": roic,
+            "incremental_roic": incremental_roic,
+            "cash_conversion": cash_conversion,
+        }
+    )
+
+
+def _format(value: float, kind: str) -> str:
+    if pd.isna(value):
+        return "n/a"
+    if kind == "pct":
+        return f"{value * 100:.1f}%"
+    if kind == "times":
+        return f"{value:.2f}x"
+    return f"{value:.2f}"
+
+
+def _markdown(results: pd.DataFrame, columns: Dict[str, tuple]) -> str:
+    """Periods as rows, metrics as columns; metrics without any value are left out."""
+    shown = [column for column in columns if results[column].notna().any()]
+    header = "| Period | " + " | ".join(columns[column][0] for column in shown) + " |"
+    lines = [header, "|" + "---|" * (len(shown) + 1)]
+    for _, row in results.iterrows():
+        cells = [_format(row[column], columns[column][1]) for column in shown]
+        lines.append(f"| {row['date']:%Y-%m} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def _roe_attribution(results: pd.DataFrame) -> str:
+    """Split the log change in ROE between the first and last period into margin, turnover and leverage."""
+    parts = results[["net_margin", "asset_turnover", "equity_multiplier"]].dropna()
+    parts = parts[(parts > 0).all(axis=1)]
+    if len(parts) < 2:
+        return ""
+    change = np.log(parts.iloc[-1]) - np.log(parts.iloc[0])
+    first, last = results.loc[parts.index[0], "date"], results.loc[parts.index[-1], "date"]
+    return (
+        f"DuPont ROE log change {first:%Y}->{last:%Y}: {change.sum():+.2f} "
+        f"(margin {change['net_margin']:+.2f}, turnover {change['asset_turnover']:+.2f}, "
+        f"leverage {change['equity_multiplier']:+.2f})"
+    )
+
+
+def dupont_table(ticker: str, financial_metrics: Dict[str, Any]) -> str:
+    """Compact DuPont table (with ROE attribution) for Section 1.3; empty without usable periods."""
+    results = compute_returns(company_frame(ticker, financial_metrics))
+    if results.empty or not results[list(DUPONT_COLUMNS)].notna().any().any():
+        return ""
+    attribution = _roe_attribution(results)
+    return _markdown(results, DUPONT_COLUMNS) + (f"\n\n{attribution}" if attribution else "")
+
+
+def roic_table(ticker: str, financial_metrics: Dict[str, Any]) -> str:
+    """Compact ROIC table (with period averages) for Section 4.1; empty without usable periods."""
+    results = compute_returns(company_frame(ticker, financial_metrics))
+    if results.empty or not results[list(ROIC_COLUMNS)].notna().any().any():
+        return ""
+    averages = [
+        f"{label} {_format(results[column].mean(), kind)}"
+        for column, (label, kind) in ROIC_COLUMNS.items()
+        if column in ("roic", "incremental_roic", "roe") and results[column].notna().any()
+    ]
+    return _markdown(results, ROIC_COLUMNS) + f"\n\nPeriod averages: {', '.join(averages)}"
@@ -0,0 +1,330 @@
+"""Record/replay of provider calls for offline, reproducible runs.
+
+With ``CASSETTE_MODE=record`` the real Tavily tool, HTTP clients (FMP, Alpha
+Vantage) and LLM are wrapped, and every successful search result, JSON
+response and completion is written to ``CASSETTE_DIR``, one JSON file per
+interaction::
+
+    <CASSETTE_DIR>/search/<key>.json
+    <CASSETTE_DIR>/http/fmp/<key>.json
+    <CASSETTE_DIR>/llm/<key>.json
+
+With ``CASSETTE_MODE=replay`` config.py builds local stand-ins instead of
+real clients, so no API keys are needed. Stand-ins serve the recorded data
+after an artificial latency per provider (``CASSETTE_LATENCY``, e.g.
+``tavily=0.8,fmp=0.15,llm=2``; the LLM value is time to first token and
+``CASSETTE_LLM_TOKENS_PER_SECOND`` paces the rest). Interactions missing
+from the cassette look like empty results (searches), not-found responses
+(HTTP) or errors (LLM), and are logged.
+
+Keys leave out API keys, so cassettes can be shared.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, List
+from urllib.parse import parse_qsl, urlsplit
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from . import config
+
+# config imports this module while it is still initializing, so only read it at call time
+logger = logging.getLogger("shallow_dive")
+
+_SECRET_PARAMS = ("apikey", "api_key")
+
+
+class CassetteMiss(LookupError):
+    """A replayed interaction was not recorded."""
+
+
+def _key(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+
+
+def _path(kind: str, key: str) -> str:
+    return os.path.join(config.CASSETTE_DIR, kind, f"{key}.json")
+
+
+def _save(kind: str, key: str, request: Any, response: Any) -> None:
+    path = _path(kind, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump({"request": request, "response": response}, file, indent=1)
+    os.replace(temporary, path)
+
+
+def _load(kind: str, key: str, request: Any) -> Any:
+    try:
+        with open(_path(kind, key), encoding="utf-8") as file:
+            return json.load(file)["response"]
+    except FileNotFoundError:
+        logger.warning(f"Cassette miss ({kind}): {json.dumps(request, default=str)[:200]}")
+        raise CassetteMiss(f"{kind} interaction not in cassette {config.CASSETTE_DIR}") from None
+
+
+def latency(provider: str) -> float:
+    """Artificial replay latency in seconds for a provider (CASSETTE_LATENCY)."""
+    for item in config.CASSETTE_LATENCY.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() == provider and seconds.strip():
+            return float(seconds)
+    return 0.0
+
+
+def recorded(kind: str) -> bool:
+    """Whether the cassette holds any interactions of a kind (e.g. ``http/fmp``)."""
+    path = os.path.join(config.CASSETTE_DIR, kind)
+    return os.path.isdir(path) and any(name.endswith(".json") for name in os.listdir(path))
+
+
+# --- Search -----------------------------------------------------------------
+
+
+def _search_request(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"query": payload["query"], "max_results": payload.get("max_results")}
+
+
+class RecordingSearch:
+    """Tavily tool wrapper that records list results."""
+
+    def __init__(self, tool: Any):
+        self.tool = tool
+
+    def invoke(self, payload: Dict[str, Any]) -> Any:
+        return self._record(payload, self.tool.invoke(payload))
+
+    async def ainvoke(self, payload: Dict[str, Any]) -> Any:
+        return self._record(payload, await self.tool.ainvoke(payload))
+
+    def _record(self, payload: Dict[str, Any], results: Any) -> Any:
+        if isinstance(results, list):
+            request = _search_request(payload)
+            _save("search", _key(request), request, results)
+        return results
+
+
+class ReplaySearch:
+    """Stand-in for the Tavily tool serving recorded results."""
+
+    def _results(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        request = _search_request(payload)
+        try:
+            return _load("search", _key(request), request)
+        except CassetteMiss:
+            return []
+
+    def invoke(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        time.sleep(latency("tavily"))
+        return self._results(payload)
+
+    async def ainvoke(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        await asyncio.sleep(latency("tavily"))
+        return self._results(payload)
+
+
+# --- HTTP (FMP, Alpha Vantage) ----------------------------------------------
+
+
+def _provider(url: str) -> str:
+    host = urlsplit(url).netloc
+    if "financialmodelingprep" in host:
+        return "fmp"
+    if "alphavantage" in host:
+        return "alphavantage"
+    return host or "http"
+
+
+def _http_request(url: str, params: Dict[str, Any] | None) -> Dict[str, Any]:
+    """URL without query plus sorted query parameters, API keys removed."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query) + [(name, str(value)) for name, value in (params or {}).items()]
+    return {
+        "url": f"{parts.scheme}://{parts.netloc}{parts.path}",
+        "params": sorted((name, value) for name, value in query if name.lower() not in _SECRET_PARAMS),
+    }
+
+
+def _record_response(url: str, params: Dict[str, Any] | None, response: Any) -> Any:
+    if getattr(response, "status_code", None) == 200:
+        try:
+            data = response.json()
+        except ValueError:
+            return response
+        request = _http_request(url, params)
+        _save(f"http/{_provider(url)}", _key(request), request, data)
+    return response
+
+
+class RecordingSession:
+    """requests.Session wrapper that records JSON responses of GET requests."""
+
+    def __init__(self, session: Any):
+        self.session = session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
+
+    def get(self, url: str, params: Dict[str, Any] | None = None, **kwargs) -> Any:
+        return _record_response(url, params, self.session.get(url, params=params, **kwargs))
+
+
+class RecordingAsyncClient:
+    """httpx.AsyncClient wrapper that records JSON responses of GET requests."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def get(self, url: str, params: Dict[str, Any] | None = None, **kwargs) -> Any:
+        return _record_response(url, params, await self.client.get(url, params=params, **kwargs))
+
+
+class ReplayResponse:
+    """Minimal response object for replayed JSON (404 when not recorded)."""
+
+    def __init__(self, data: Any, status_code: int = 200):
+        self._data = data
+        self.status_code = status_code
+        self.headers: Dict[str, str] = {}
+
+    def json(self) -> Any:
+        return self._data
+
+    def raise_for_status(self) -> None:
+        return None
+
+
+def _replay_response(url: str, params: Dict[str, Any] | None) -> ReplayResponse:
+    request = _http_request(url, params)
+    try:
+        return ReplayResponse(_load(f"http/{_provider(url)}", _key(request), request))
+    except CassetteMiss:
+        return ReplayResponse({"Error Message": "Not recorded in cassette"}, status_code=404)
+
+
+class ReplaySession:
+    """Stand-in for the pooled requests.Session."""
+
+    headers: Dict[str, str] = {}
+
+    def mount(self, prefix: str, adapter: Any) -> None:
+        return None
+
+    def get(self, url: str, params: Dict[str, Any] | None = None, **kwargs) -> ReplayResponse:
+        time.sleep(latency(_provider(url)))
+        return _replay_response(url, params)
+
+
+class ReplayAsyncClient:
+    """Stand-in for httpx.AsyncClient."""
+
+    async def aclose(self) -> None:
+        return None
+
+    async def get(self, url: str, params: Dict[str, Any] | None = None, **kwargs) -> ReplayResponse:
+        await asyncio.sleep(latency(_provider(url)))
+        return _replay_response(url, params)
+
+
+# --- LLM --------------------------------------------------------------------
+
+
+def _llm_request(messages: list) -> List[List[str]]:
+    return [[message.type, message.content] for message in messages]
+
+
+def _completion(response: Any) -> Dict[str, Any]:
+    return {"content": response.content, "usage": getattr(response, "usage_metadata", None)}
+
+
+class RecordingLLM:
+    """Chat model wrapper that records completions (streamed ones once complete)."""
+
+    def __init__(self, llm: Any):
+        self.llm = llm
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def _record(self, messages: list, response: Any) -> Any:
+        if response is not None and response.content:
+            request = _llm_request(messages)
+            _save("llm", _key(request), request, _completion(response))
+        return response
+
+    def invoke(self, messages: list, **kwargs) -> Any:
+        return self._record(messages, self.llm.invoke(messages, **kwargs))
+
+    async def ainvoke(self, messages: list, **kwargs) -> Any:
+        return self._record(messages, await self.llm.ainvoke(messages, **kwargs))
+
+    def stream(self, messages: list, **kwargs) -> Iterator[Any]:
+        response = None
+        for chunk in self.llm.stream(messages, **kwargs):
+            response = chunk if response is None else response + chunk
+            yield chunk
+        self._record(messages, response)
+
+    async def astream(self, messages: list, **kwargs):
+        response = None
+        async for chunk in self.llm.astream(messages, **kwargs):
+            response = chunk if response is None else response + chunk
+            yield chunk
+        self._record(messages, response)
+
+
+class ReplayLLM:
+    """Stand-in chat model serving recorded completions at a configurable pace."""
+
+    model_name = "cassette-replay"
+    temperature = 0.3
+
+    def _completion(self, messages: list) -> Dict[str, Any]:
+        request = _llm_request(messages)
+        return _load("llm", _key(request), request)
+
+    @staticmethod
+    def _pieces(content: str) -> List[str]:
+        words = re.findall(r"\S+\s*", content) or [content]
+        return ["".join(words[start : start + 3]) for start in range(0, len(words), 3)]
+
+    @staticmethod
+    def _piece_delay(piece: str) -> float:
+        rate = config.CASSETTE_LLM_TOKENS_PER_SECOND
+        return max(len(piece) // 4, 1) / rate if rate > 0 else 0.0
+
+    def invoke(self, messages: list, **kwargs) -> AIMessage:
+        completion = self._completion(messages)
+        time.sleep(latency("llm") + sum(self._piece_delay(piece) for piece in self._pieces(completion["content"])))
+        return AIMessage(content=completion["content"], usage_metadata=completion.get("usage"))
+
+    async def ainvoke(self, messages: list, **kwargs) -> AIMessage:
+        completion = self._completion(messages)
+        await asyncio.sleep(latency("llm") + sum(self._piece_delay(piece) for piece in self._pieces(completion["content"])))
+        return AIMessage(content=completion["content"], usage_metadata=completion.get("usage"))
+
+    def stream(self, messages: list, **kwargs) -> Iterator[AIMessageChunk]:
+        completion = self._completion(messages)
+        time.sleep(latency("llm"))
+        for piece in self._pieces(completion["content"]):
+            time.sleep(self._piece_delay(piece))
+            yield AIMessageChunk(content=piece)
+        yield AIMessageChunk(content="", usage_metadata=completion.get("usage"))
+
+    async def astream(self, messages: list, **kwargs):
+        completion = self._completion(messages)
+        await asyncio.sleep(latency("llm"))
+        for piece in self._pieces(completion["content"]):
+            await asyncio.sleep(self._piece_delay(piece))
+            yield AIMessageChunk(content=piece)
+        yield AIMessageChunk(content="", usage_metadata=completion.get("usage"))
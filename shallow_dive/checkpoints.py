@@ -0,0 +1,134 @@
+"""SQLite checkpointing and run bookkeeping for resumable report runs.
+
+LangGraph checkpoints every superstep under the thread id ``<ticker>:<run_id>``.
+A small ``runs`` table next to the checkpoint tables records the status of
+each run, so ``--resume`` can find the latest unfinished run for a ticker.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from . import config
+
+_conn: sqlite3.Connection | None = None
+_saver: SqliteSaver | None = None
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    """Checkpointing is on unless CHECKPOINT_DB is set to an empty string."""
+    return bool(config.CHECKPOINT_DB)
+
+
+def _open() -> sqlite3.Connection:
+    directory = os.path.dirname(config.CHECKPOINT_DB)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return sqlite3.connect(config.CHECKPOINT_DB, check_same_thread=False, timeout=30)
+
+
+def _connection() -> sqlite3.Connection:
+    """Connection for the runs table (the checkpointer keeps its own)."""
+    global _conn
+    with _lock:
+        if _conn is None:
+            _conn = _open()
+            _conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    thread_id TEXT PRIMARY KEY,
+                    ticker TEXT NOT NULL,
+                    run_id TEXT NOT NULL,
+                    company TEXT,
+                    status TEXT NOT NULL,
+                    started_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            _conn.commit()
+        return _conn
+
+
+def get_saver() -> SqliteSaver:
+    """Shared synchronous checkpointer for this process."""
+    global _saver
+    with _lock:
+        if _saver is None:
+            _saver = SqliteSaver(_open())
+        return _saver
+
+
+@asynccontextmanager
+async def async_saver() -> AsyncIterator[AsyncSqliteSaver]:
+    """Async checkpointer bound to the running event loop."""
+    _connection()  # ensure the directory and runs table exist
+    async with AsyncSqliteSaver.from_conn_string(config.CHECKPOINT_DB) as saver:
+        yield saver
+
+
+def new_run_id() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+
+def thread_id(ticker: str, run_id: str) -> str:
+    return f"{ticker}:{run_id}"
+
+
+def run_config(ticker: str, run_id: str) -> Dict[str, Any]:
+    """LangGraph config selecting the checkpoint thread for a run."""
+    return {"configurable": {"thread_id": thread_id(ticker, run_id)}}
+
+
+def record_run(ticker: str, run_id: str, status: str, company: str | None = None) -> None:
+    """Insert or update the status of a run (running / failed / complete)."""
+    conn = _connection()
+    now = datetime.now().isoformat(timespec="seconds")
+    with _lock:
+        conn.execute(
+            """
+            INSERT INTO runs (thread_id, ticker, run_id, company, status, started_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(thread_id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at
+            """,
+            (thread_id(ticker, run_id), ticker, run_id, company, status, now, now),
+        )
+        conn.commit()
+
+
+def latest_run(ticker: str, complete: bool = False) -> str | None:
+    """Most recent unfinished run id for a ticker, or the latest completed one with ``complete``."""
+    conn = _connection()
+    query = "SELECT run_id FROM runs WHERE ticker = ?"
+    query += " AND status = 'complete'" if complete else " AND status != 'complete'"
+    with _lock:
+        row = conn.execute(query + " ORDER BY started_at DESC, run_id DESC LIMIT 1", (ticker,)).fetchone()
+    return row[0] if row else None
+
+
+def run_company(ticker: str, run_id: str | None = None) -> str | None:
+    """Company name recorded for a run (default: the latest run of the ticker)."""
+    conn = _connection()
+    query = "SELECT company FROM runs WHERE ticker = ? AND company IS NOT NULL"
+    params: tuple = (ticker,)
+    if run_id:
+        query += " AND run_id = ?"
+        params += (run_id,)
+    with _lock:
+        row = conn.execute(query + " ORDER BY started_at DESC, run_id DESC LIMIT 1", params).fetchone()
+    return row[0] if row else None
+
+
+def load_state(ticker: str, run_id: str) -> Dict[str, Any] | None:
+    """State values stored in the latest checkpoint of a run, or None if it has none."""
+    checkpoint = get_saver().get_tuple(run_config(ticker, run_id))
+    if checkpoint is None:
+        return None
+    return dict(checkpoint.checkpoint["channel_values"])
@@ -1,27 +1,33 @@
 """Citation helpers for tracking and rendering sources."""
 
+import threading
 from datetime import datetime
 from typing import Dict, Any, List, Tuple
 
 from .state import ShallowDiveState
 
+# Parallel section nodes share the same sources list within a graph step, so
+# numbering must be serialized to keep citation numbers unique.
+_source_lock = threading.Lock()
+
 
 def add_source(state: ShallowDiveState, url: str, title: str, content: str = "") -> Tuple[ShallowDiveState, int]:
     """Add a source and return its citation number."""
-    if url in state.get("source_map", {}):
-        return state, state["source_map"][url]
-
-    citation_num = len(state.get("sources", [])) + 1
-    source_entry: Dict[str, Any] = {
-        "number": citation_num,
-        "url": url,
-        "title": title,
-        "content_snippet": content[:200] if content else "",
-        "accessed_date": datetime.now().strftime("%Y-%m-%d"),
-    }
-
-    state.setdefault("sources", []).append(source_entry)
-    state.setdefault("source_map", {})[url] = citation_num
+    with _source_lock:
+        if url in state.get("source_map", {}):
+            return state, state["source_map"][url]
+
+        citation_num = len(state.get("sources", [])) + 1
+        source_entry: Dict[str, Any] = {
+            "number": citation_num,
+            "url": url,
+            "title": title,
+            "content_snippet": content[:200] if content else "",
+            "accessed_date": datetime.now().strftime("%Y-%m-%d"),
+        }
+
+        state.setdefault("sources", []).append(source_entry)
+        state.setdefault("source_map", {})[url] = citation_num
     return state, citation_num
 
 
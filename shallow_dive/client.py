@@ -0,0 +1,57 @@
+"""Minimal client for the resident analysis service.
+
+Uses only the standard library, so ``python -m shallow_dive.client`` starts
+without importing LangChain, pandas or the provider clients.
+"""
+
+import argparse
+import json
+import sys
+import urllib.request
+
+
+def submit_job(server: str, company: str, ticker: str, output_dir: str = ".", stream_tokens: bool = False) -> dict:
+    """Submit a job, print progress as it streams back and return the final result event."""
+    job = {"company": company, "ticker": ticker, "output_dir": output_dir, "stream_tokens": stream_tokens}
+    request = urllib.request.Request(
+        f"{server.rstrip('/')}/analyze",
+        data=json.dumps(job).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+
+    result: dict = {}
+    with urllib.request.urlopen(request) as response:
+        for line in response:
+            event = json.loads(line)
+            if event["event"] == "progress":
+                print(f"[OK] {event['node']}", flush=True)
+            elif event["event"] == "token":
+                # Sections stream concurrently, so only per-section generation metrics are printed
+                if event.get("done"):
+                    metrics = event["metrics"]
+                    print(f"[LLM] {event['section']}: TTFT {metrics['ttft_s']}s, {metrics['tokens_per_s']} tokens/s", flush=True)
+            elif event["event"] == "result":
+                result = event
+                status = event.get("status")
+                print(f"{status}: {event.get('filename') or event.get('error')}", flush=True)
+            else:
+                print(json.dumps(event), flush=True)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Submit a Shallow Dive job to a running service")
+    parser.add_argument("--company", type=str, required=True, help="Company name")
+    parser.add_argument("--ticker", type=str, required=True, help="Stock ticker symbol")
+    parser.add_argument("--output-dir", type=str, default=".", help="Output directory on the server (default: server cwd)")
+    parser.add_argument("--server", type=str, default="http://127.0.0.1:8765", help="Service URL")
+    parser.add_argument("--stream-tokens", action="store_true", help="Stream LLM output and report per-section TTFT")
+    args = parser.parse_args()
+
+    result = submit_job(args.server, args.company, args.ticker, args.output_dir, args.stream_tokens)
+    sys.exit(0 if result.get("status") == "Success" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,66 @@ TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 FMP_API_KEY = os.getenv("FMP_API_KEY")
 ALPHA_VANTAGE_KEY = os.getenv("ALPHA_VANTAGE_KEY")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "8"))
+QUERY_MERGE_THRESHOLD = float(os.getenv("QUERY_MERGE_THRESHOLD", "0.75"))  # above 1 disables coalescing
+LLM_STREAMING = os.getenv("LLM_STREAMING", "false").lower() in ("1", "true", "yes")
+# Section prompt context is fitted to per-section token budgets (see context_budget.py);
+# the scale multiplies every budget and research gets this many tokens per snippet slot
+CONTEXT_BUDGET_SCALE = float(os.getenv("CONTEXT_BUDGET_SCALE", "1.0"))
+RESEARCH_SNIPPET_TOKENS = int(os.getenv("RESEARCH_SNIPPET_TOKENS", "150"))
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", os.path.join(".shallow_dive", "checkpoints.sqlite"))
+
+# Record provider calls to a cassette directory, or replay them without API keys (see cassettes.py)
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "").lower()
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", "cassettes")
+CASSETTE_LATENCY = os.getenv("CASSETTE_LATENCY", "")  # e.g. "tavily=0.8,fmp=0.15,alphavantage=0.3,llm=2"
+CASSETTE_LLM_TOKENS_PER_SECOND = float(os.getenv("CASSETTE_LLM_TOKENS_PER_SECOND", "0"))  # 0 = instant
+if CASSETTE_MODE not in ("", "record", "replay"):
+    raise ValueError(f"CASSETTE_MODE must be record or replay, not {CASSETTE_MODE!r}")
+
+# Persistent provider response cache (empty CACHE_DB disables it; off by default with
+# cassettes, so every call reaches the provider or its stand-in)
+CACHE_DB = os.getenv("CACHE_DB", "" if CASSETTE_MODE else os.path.join(".shallow_dive", "cache.sqlite"))
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "12"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE = os.getenv("LLM_CACHE", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+FMP_CACHE_MAX_ENTRIES = int(os.getenv("FMP_CACHE_MAX_ENTRIES", "5000"))
+FMP_PROFILE_TTL_HOURS = float(os.getenv("FMP_PROFILE_TTL_HOURS", "24"))
+FMP_TTM_TTL_HOURS = float(os.getenv("FMP_TTM_TTL_HOURS", "4"))
+FMP_STATEMENT_TTL_HOURS = float(os.getenv("FMP_STATEMENT_TTL_HOURS", "168"))
+FMP_BATCH_PREFETCH = os.getenv("FMP_BATCH_PREFETCH", "true").lower() in ("1", "true", "yes")
+FMP_BULK_CHUNK_SIZE = int(os.getenv("FMP_BULK_CHUNK_SIZE", "50"))
+# Alpha Vantage backs up FMP: "fallback" after FMP fails or is slow, or "race" both at once
+FUNDAMENTALS_STRATEGY = os.getenv("FUNDAMENTALS_STRATEGY", "fallback").lower()
+FUNDAMENTALS_FALLBACK_SECONDS = float(os.getenv("FUNDAMENTALS_FALLBACK_SECONDS", "8"))
+# Parquet store of every fetched fundamentals table, partitioned by ticker (empty disables it)
+FUNDAMENTALS_STORE = os.getenv("FUNDAMENTALS_STORE", ".shallow_dive/fundamentals")
+
+# Provider budgets shared by every thread/task in the process (0 = unlimited)
+TAVILY_RPM = float(os.getenv("TAVILY_RPM", "0"))
+FMP_RPM = float(os.getenv("FMP_RPM", "0"))
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))
+ALPHA_VANTAGE_RPM = float(os.getenv("ALPHA_VANTAGE_RPM", "5"))  # Free tier allows 5 requests per minute
+RATE_LIMITS = {
+    "tavily": (TAVILY_RPM, 0),
+    "fmp": (FMP_RPM, 0),
+    "llm": (LLM_RPM, LLM_TPM),
+    "alphavantage": (ALPHA_VANTAGE_RPM, 0),
+}
+
+# Retries on 429/5xx/timeouts (full-jitter backoff), per-provider circuit breakers
+# (0 failures disables them) and optional hedged duplicates of slow search/FMP reads
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+RETRY_BASE_SECONDS = float(os.getenv("RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = float(os.getenv("RETRY_MAX_SECONDS", "20"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes")
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
 
 # Logging setup
 logger = logging.getLogger("shallow_dive")
@@ -36,10 +96,19 @@ if not logger.handlers:
 logger.setLevel(LOG_LEVEL)
 logger.propagate = False
 
+if CASSETTE_MODE == "replay":
+    from . import cassettes
+
+    # Fundamentals providers run only if the cassette holds their responses
+    FMP_API_KEY = FMP_API_KEY or ("replay" if cassettes.recorded("http/fmp") else None)
+    ALPHA_VANTAGE_KEY = ALPHA_VANTAGE_KEY or ("replay" if cassettes.recorded("http/alphavantage") else None)
+
 
 def validate_api_keys() -> list[str]:
-    """Return a list of missing API keys required to run the workflow."""
+    """Return a list of missing API keys required to run the workflow (none when replaying)."""
     missing = []
+    if CASSETTE_MODE == "replay":
+        return missing
     if not (OPENAI_API_KEY or OPENROUTER_API_KEY):
         missing.append("OPENAI_API_KEY or OPENROUTER_API_KEY")
     if not TAVILY_API_KEY:
@@ -48,20 +117,50 @@ def validate_api_keys() -> list[str]:
 
 
 def create_llm():
-    """Instantiate ChatOpenAI with OpenRouter when available, else OpenAI."""
+    """Instantiate ChatOpenAI with OpenRouter when available, else OpenAI.
+
+    Client-side retries are off; resilience.py retries LLM calls. With
+    cassettes the model is wrapped for recording or replaced for replay.
+    """
+    from . import cassettes
+
+    if CASSETTE_MODE == "replay":
+        return cassettes.ReplayLLM()
+    if not (OPENAI_API_KEY or OPENROUTER_API_KEY):
+        return None  # Reported by validate_api_keys
+    if CASSETTE_MODE == "record":
+        return cassettes.RecordingLLM(_chat_model())
+    return _chat_model()
+
+
+def _chat_model() -> ChatOpenAI:
     if OPENROUTER_API_KEY:
         return ChatOpenAI(
             model=OPENROUTER_MODEL,
             api_key=OPENROUTER_API_KEY,
             base_url="https://openrouter.ai/api/v1",
             temperature=0.3,
+            stream_usage=True,
+            max_retries=0,
         )
-    return ChatOpenAI(model=OPENAI_MODEL, temperature=0.3, api_key=OPENAI_API_KEY)
+    return ChatOpenAI(model=OPENAI_MODEL, temperature=0.3, api_key=OPENAI_API_KEY, stream_usage=True, max_retries=0)
+
+
+def create_search_tool():
+    """Instantiate the Tavily tool, or its cassette recorder/stand-in."""
+    from . import cassettes
+
+    if CASSETTE_MODE == "replay":
+        return cassettes.ReplaySearch()
+    if not TAVILY_API_KEY:
+        return None  # Reported by validate_api_keys
+    tool = TavilySearchResults(api_key=TAVILY_API_KEY, max_results=5)
+    return cassettes.RecordingSearch(tool) if CASSETTE_MODE == "record" else tool
 
 
 # Instantiate shared tools
 llm = create_llm()
-search_tool = TavilySearchResults(api_key=TAVILY_API_KEY, max_results=5)
+search_tool = create_search_tool()
 
 # System prompt for the expert analyst
 ANALYST_SYSTEM_PROMPT = """You are an Expert Equity Research Assistant writing for a demanding, long-term owner-investor. 
@@ -0,0 +1,193 @@
+"""Token budgets for the context blocks of section prompts.
+
+Section prompts combine earlier sections, API data and research snippets.
+Each block gets a token budget per section, counted with the configured
+model's tokenizer (tiktoken), and is fitted without breaking its structure:
+
+- prose (earlier sections) is condensed extractively: the lead sentence of
+  every paragraph (where the claim sits) is kept first, then the following
+  sentences while the budget allows, in their original order;
+- JSON drops the oldest periods, then long text and trailing fields, and
+  always stays valid;
+- research keeps whole snippets in order and condenses the one that only
+  partly fits.
+
+``CONTEXT_BUDGET_SCALE`` multiplies every budget (e.g. 0.5 for a small
+context window). Without a tokenizer (unknown tiktoken data offline) tokens
+are estimated at four characters each. Cassette runs (``CASSETTE_MODE``)
+always estimate, so a replay machine without tiktoken data fits prompts
+exactly as they were recorded and the recorded completions still match.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, List
+
+from . import config
+from .rate_limit import estimate_tokens
+
+logger = config.logger
+
+# Sentence boundary: terminal punctuation (or a closing citation) followed by a capitalised start
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?\]])\s+(?=[A-Z0-9\"'(])")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_ELLIPSIS = " …"
+
+# Research snippets below this many tokens of remaining budget are left out rather than condensed
+_MIN_SNIPPET_TOKENS = 40
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken encoding of the configured model, or None when it cannot be loaded or a cassette is in use."""
+    if config.CASSETTE_MODE:
+        return None
+    model = config.OPENROUTER_MODEL.split("/")[-1] if config.OPENROUTER_API_KEY else config.OPENAI_MODEL
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as exc:  # pragma: no cover - depends on tiktoken data being available
+        logger.warning(f"Tokenizer unavailable ({exc}); estimating prompt tokens from length")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in ``text`` for the configured model."""
+    encoding = _encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def budget(tokens: int) -> int:
+    """A block budget after CONTEXT_BUDGET_SCALE."""
+    return max(int(tokens * config.CONTEXT_BUDGET_SCALE), 0)
+
+
+def _truncate(text: str, tokens: int) -> str:
+    """Hard cut at a token boundary, backed off to the last whole word."""
+    encoding = _encoding()
+    if encoding is None:
+        cut = text[: tokens * 4]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:tokens])
+    if len(cut) < len(text) and " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut
+
+
+def condense(text: str, tokens: int) -> str:
+    """Fit prose into ``tokens`` by keeping whole sentences, lead sentences of each paragraph first."""
+    text = (text or "").strip()
+    if not text or tokens <= 0:
+        return ""
+    if count_tokens(text) <= tokens:
+        return text
+
+    paragraphs = [_SENTENCE_BREAK.split(block.strip()) for block in _PARAGRAPH_BREAK.split(text) if block.strip()]
+    ranked = sorted(
+        (position, index)
+        for index, sentences in enumerate(paragraphs)
+        for position in range(len(sentences))
+    )
+    chosen: set[tuple[int, int]] = set()
+    used = count_tokens(_ELLIPSIS)
+    for position, index in ranked:
+        cost = count_tokens(paragraphs[index][position]) + 1
+        if used + cost <= tokens:
+            chosen.add((index, position))
+            used += cost
+    if not chosen:
+        return _truncate(text, tokens - count_tokens(_ELLIPSIS)) + _ELLIPSIS
+
+    kept = []
+    for index, sentences in enumerate(paragraphs):
+        selected = [sentence for position, sentence in enumerate(sentences) if (index, position) in chosen]
+        if selected:
+            kept.append(" ".join(selected) + (_ELLIPSIS if len(selected) < len(sentences) else ""))
+    return "\n\n".join(kept)
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _prune(value: Any) -> Any:
+    """Copy of ``value`` without null or empty fields."""
+    if isinstance(value, dict):
+        pruned = {key: _prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_prune(item) for item in value]
+    return value
+
+
+def _containers(value: Any, found: list) -> list:
+    """Every list and dict nested in ``value``, outermost first."""
+    if isinstance(value, (dict, list)):
+        found.append(value)
+        for item in value.values() if isinstance(value, dict) else value:
+            _containers(item, found)
+    return found
+
+
+def _shrink(data: Any) -> bool:
+    """Remove the least informative part of ``data`` in place; False when nothing is left to remove.
+
+    In order: the last item of the longest list (providers return the newest
+    period first), half of the longest text over 300 characters, the last
+    field of the largest object.
+    """
+    containers = _containers(data, [])
+    lists = [item for item in containers if isinstance(item, list) and len(item) > 1]
+    if lists:
+        max(lists, key=len).pop()
+        return True
+
+    texts = [
+        (container, key)
+        for container in containers
+        if isinstance(container, dict)
+        for key, item in container.items()
+        if isinstance(item, str) and len(item) > 300
+    ]
+    if texts:
+        container, key = max(texts, key=lambda entry: len(entry[0][entry[1]]))
+        container[key] = condense(container[key], count_tokens(container[key]) // 2)
+        return True
+
+    objects = [item for item in containers if isinstance(item, dict) and item]
+    if objects:
+        largest = max(objects, key=len)
+        largest.pop(next(reversed(largest)))
+        return True
+    return False
+
+
+def fit_json(data: Any, tokens: int) -> str:
+    """Compact JSON of ``data`` within ``tokens``, trimmed structurally so it always parses."""
+    data = _prune(data)
+    text = _dumps(data)
+    while count_tokens(text) > tokens and _shrink(data):
+        text = _dumps(data)
+    return text
+
+
+def fit_blocks(blocks: List[str], tokens: int) -> List[str]:
+    """Leading blocks (e.g. research snippets) within ``tokens``; the first that overflows is condensed."""
+    fitted, remaining = [], tokens
+    for block in blocks:
+        cost = count_tokens(block) + 1
+        if cost <= remaining:
+            fitted.append(block)
+            remaining -= cost
+            continue
+        if remaining >= _MIN_SNIPPET_TOKENS:
+            fitted.append(condense(block, remaining - 1))
+        break
+    return fitted
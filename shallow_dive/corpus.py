@@ -0,0 +1,86 @@
+"""Per-run research corpus storing each search document once.
+
+Search results are keyed by canonical URL (and by content hash, so mirrors of
+the same article collapse into one document). State keeps the documents in
+``research_corpus`` and only lightweight document ids everywhere else
+(``web_research``, ``research_results``), which keeps checkpoints small and
+stops duplicate snippets from being sent to the model.
+"""
+
+import hashlib
+import threading
+from typing import Any, Dict, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .state import ShallowDiveState
+
+# Parallel section nodes share the corpus dict within a graph step
+_corpus_lock = threading.Lock()
+
+# Shorter snippets are too generic to identify the same article under another URL
+_MIN_CONTENT_FOR_HASH = 100
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref")
+
+
+def canonical_url(url: str) -> str:
+    """URL without scheme/host case differences, ``www.``, fragments, tracking parameters or trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith(_TRACKING_PARAMS)])
+    return urlunsplit((parts.scheme.lower() or "https", host, parts.path.rstrip("/") or "/", query, ""))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def _document_id(result: Dict[str, Any]) -> str:
+    key = canonical_url(result["url"]) if result.get("url") else content_hash(result.get("content", ""))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def add_documents(state: ShallowDiveState, results: List[Dict[str, Any]]) -> List[str]:
+    """Store new search results in the corpus and return their document ids (deduplicated, in order)."""
+    refs: List[str] = []
+    with _corpus_lock:
+        corpus = state.setdefault("research_corpus", {})
+        by_content = {doc["hash"]: doc_id for doc_id, doc in corpus.items()}
+        for result in results:
+            if not result.get("url") and not result.get("content"):
+                continue
+            doc_id = _document_id(result)
+            if doc_id not in corpus:
+                digest = content_hash(result.get("content", ""))
+                if len(result.get("content", "")) >= _MIN_CONTENT_FOR_HASH and digest in by_content:
+                    doc_id = by_content[digest]
+                else:
+                    corpus[doc_id] = {
+                        "url": result.get("url", ""),
+                        "title": result.get("title", "Untitled"),
+                        "content": result.get("content", ""),
+                        "hash": digest,
+                    }
+                    by_content[digest] = doc_id
+            if doc_id not in refs:
+                refs.append(doc_id)
+    return refs
+
+
+def documents(state: ShallowDiveState, refs: List[Any]) -> List[Dict[str, Any]]:
+    """Resolve document ids to documents, dropping unknown ids and repeats.
+
+    Documents may also be passed directly (e.g. already resolved research, or
+    raw results from state stored before the corpus existed).
+    """
+    corpus = state.get("research_corpus", {})
+    docs, seen = [], set()
+    for ref in refs:
+        doc = ref if isinstance(ref, dict) else corpus.get(ref)
+        if doc is None:
+            continue
+        key = canonical_url(doc["url"]) if doc.get("url") else content_hash(doc.get("content", ""))
+        if key not in seen:
+            seen.add(key)
+            docs.append(doc)
+    return docs
@@ -1,51 +1,443 @@
 """External data and search helpers."""
 
+import asyncio
 import json
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 
+import httpx
 import requests
+import requests.adapters
 
-from . import config
+from . import cassettes, config, fundamentals_store
+from .cache import DiskCache, make_key
 from .citations import add_source
+from .rate_limit import get_limiter
+from .resilience import ProviderError, error_from_text, get_policy, raise_for_retryable_status
+from .single_flight import SingleFlight
 from .state import ShallowDiveState
 
 logger = config.logger
 
+FMP_BASE_URL = "https://financialmodelingprep.com/stable"
+
+
+search_cache = DiskCache("search", config.SEARCH_CACHE_MAX_ENTRIES)
+search_flights = SingleFlight("search")
+
+
+def _search_key(query: str, num_results: int) -> str:
+    """Cache key: normalized query, result count and the current freshness bucket.
+
+    The bucket is the TTL-sized time window the search falls in, so results
+    are shared within a window and refetched in the next one.
+    """
+    normalized = " ".join(query.lower().split())
+    bucket = int(time.time() // (config.SEARCH_CACHE_TTL_HOURS * 3600))
+    return make_key(normalized, num_results, bucket)
+
+
+def _search_cached(query: str, num_results: int) -> tuple[str | None, List[Dict[str, Any]] | None]:
+    """Cache key and cached results for a search (key is None when caching is off)."""
+    if config.SEARCH_CACHE_TTL_HOURS <= 0 or not search_cache.enabled:
+        return None, None
+    key = _search_key(query, num_results)
+    return key, search_cache.get(key)
+
+
+async def _asearch_cached(query: str, num_results: int) -> tuple[str | None, List[Dict[str, Any]] | None]:
+    """Async variant of _search_cached."""
+    if config.SEARCH_CACHE_TTL_HOURS <= 0 or not search_cache.enabled:
+        return None, None
+    key = _search_key(query, num_results)
+    return key, await search_cache.aget(key)
+
+
+def _store_search(key: str | None, results: Any) -> List[Dict[str, Any]]:
+    """Cache non-empty results and return them as a list."""
+    results = results if isinstance(results, list) else []
+    if key and results:
+        search_cache.set(key, results, config.SEARCH_CACHE_TTL_HOURS * 3600)
+    return results
+
+
+async def _astore_search(key: str | None, results: Any) -> List[Dict[str, Any]]:
+    """Async variant of _store_search."""
+    results = results if isinstance(results, list) else []
+    if key and results:
+        await search_cache.aset(key, results, config.SEARCH_CACHE_TTL_HOURS * 3600)
+    return results
+
+
+def invalidate_search_cache(queries: List[str], num_results: int = 5) -> None:
+    """Forget cached results for queries that must be searched fresh."""
+    if config.SEARCH_CACHE_TTL_HOURS <= 0:
+        return
+    for query in queries:
+        search_cache.delete(_search_key(query, num_results))
+
+
+def _flight_key(query: str, num_results: int) -> str:
+    return make_key(" ".join(query.lower().split()), num_results)
+
+
+def _tavily_results(results: Any) -> Any:
+    """Raise the failure the Tavily tool returns as an error string instead of raising."""
+    if isinstance(results, str):
+        raise error_from_text(results)
+    return results
+
+
+def _tavily_search(query: str, num_results: int) -> Any:
+    """One Tavily request within the shared Tavily rate budget."""
+    get_limiter("tavily").acquire()
+    return _tavily_results(config.search_tool.invoke({"query": query, "max_results": num_results}))
+
+
+async def _atavily_search(query: str, num_results: int) -> Any:
+    """Async variant of _tavily_search."""
+    await get_limiter("tavily").aacquire()
+    return _tavily_results(await config.search_tool.ainvoke({"query": query, "max_results": num_results}))
+
 
 def web_search(query: str, num_results: int = 5) -> List[Dict[str, Any]]:
-    """Perform web search using Tavily."""
+    """Perform web search using Tavily, served from the search cache when fresh.
+
+    Concurrent identical searches share one request; transient failures are
+    retried under the Tavily resilience policy.
+    """
+    try:
+        key, cached = _search_cached(query, num_results)
+        if cached is not None:
+            return cached
+
+        def fetch() -> List[Dict[str, Any]]:
+            return _store_search(key, get_policy("tavily").call(lambda: _tavily_search(query, num_results)))
+
+        return search_flights.do(_flight_key(query, num_results), fetch)
+    except Exception as exc:  # pragma: no cover - runtime logging
+        logger.warning(f"Search error: {exc}")
+        return []
+
+
+async def aweb_search(query: str, num_results: int = 5) -> List[Dict[str, Any]]:
+    """Async variant of web_search."""
     try:
-        results = config.search_tool.invoke({"query": query, "max_results": num_results})
-        return results if isinstance(results, list) else []
+        key, cached = await _asearch_cached(query, num_results)
+        if cached is not None:
+            return cached
+
+        async def fetch() -> List[Dict[str, Any]]:
+            return await _astore_search(key, await get_policy("tavily").acall(lambda: _atavily_search(query, num_results)))
+
+        return await search_flights.ado(_flight_key(query, num_results), fetch)
     except Exception as exc:  # pragma: no cover - runtime logging
         logger.warning(f"Search error: {exc}")
         return []
 
 
+def _fmp_url(endpoint: str, ticker: str, api_key: str, **params) -> str:
+    """Build a Financial Modeling Prep stable endpoint URL."""
+    extra = "".join(f"&{key}={value}" for key, value in params.items())
+    return f"{FMP_BASE_URL}/{endpoint}?symbol={ticker}{extra}&apikey={api_key}"
+
+
+# Read timeouts per endpoint in seconds; statement endpoints return more data
+FMP_READ_TIMEOUTS: Dict[str, float] = {"profile": 10.0, "key-metrics-ttm": 10.0}
+_FMP_CONNECT_TIMEOUT = 5.0
+_FMP_DEFAULT_READ_TIMEOUT = 20.0
+_JSON_HEADERS = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def _http_session() -> requests.Session:
+    """Process-wide keep-alive session for FMP and Alpha Vantage, pooled for concurrent batch workers.
+
+    With cassettes the session is wrapped for recording or replaced for replay.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            if config.CASSETTE_MODE == "replay":
+                _session = cassettes.ReplaySession()
+                return _session
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(10, config.SEARCH_CONCURRENCY * 2))
+            session.mount("https://", adapter)
+            session.headers.update(_JSON_HEADERS)
+            _session = cassettes.RecordingSession(session) if config.CASSETTE_MODE == "record" else session
+        return _session
+
+
+def _fmp_read_timeout(endpoint: str) -> float:
+    return FMP_READ_TIMEOUTS.get(endpoint, _FMP_DEFAULT_READ_TIMEOUT)
+
+
+def _fmp_request(endpoint: str, url: str) -> Any:
+    """GET and decode one FMP URL on the pooled session with the endpoint's timeout.
+
+    Each attempt is charged to the FMP rate budget; 429/5xx responses and
+    connection errors are retried under the FMP resilience policy.
+    """
+
+    def attempt() -> Any:
+        get_limiter("fmp").acquire()
+        response = _http_session().get(url, timeout=(_FMP_CONNECT_TIMEOUT, _fmp_read_timeout(endpoint)))
+        raise_for_retryable_status(response)
+        return response.json()
+
+    return get_policy("fmp").call(attempt)
+
+
+async def _afmp_request(client: httpx.AsyncClient, endpoint: str, url: str) -> Any:
+    """Async variant of _fmp_request."""
+    timeout = httpx.Timeout(_fmp_read_timeout(endpoint), connect=_FMP_CONNECT_TIMEOUT)
+
+    async def attempt() -> Any:
+        await get_limiter("fmp").aacquire()
+        response = await client.get(url, timeout=timeout)
+        raise_for_retryable_status(response)
+        return response.json()
+
+    return await get_policy("fmp").acall(attempt)
+
+
+def _async_client() -> httpx.AsyncClient:
+    """Keep-alive client for FMP and Alpha Vantage shared by every coroutine on the running event loop.
+
+    httpx connections belong to the loop that opened them, so each loop gets
+    its own pooled client; close it with aclose_http_clients before the loop
+    ends. With cassettes the client is wrapped for recording or replaced for
+    replay.
+    """
+    loop = asyncio.get_running_loop()
+    with _session_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            if config.CASSETTE_MODE == "replay":
+                client = cassettes.ReplayAsyncClient()
+            else:
+                connections = max(10, config.SEARCH_CONCURRENCY * 2)
+                client = httpx.AsyncClient(
+                    headers=_JSON_HEADERS,
+                    timeout=_FMP_DEFAULT_READ_TIMEOUT,
+                    limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+                )
+                if config.CASSETTE_MODE == "record":
+                    client = cassettes.RecordingAsyncClient(client)
+            _async_clients[loop] = client
+        return client
+
+
+async def aclose_http_clients() -> None:
+    """Close the running event loop's shared async client (a later call opens a new one)."""
+    with _session_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+fmp_cache = DiskCache("fmp", config.FMP_CACHE_MAX_ENTRIES)
+fmp_flights = SingleFlight("fmp")
+
+# Annual statement data only changes when the company reports a new period
+FMP_STATEMENT_ENDPOINTS = ("key-metrics", "ratios", "income-statement")
+
+# How long the latest reported period probe is trusted
+_PERIOD_PROBE_TTL = 3600.0
+
+
+def _fmp_ttl(endpoint: str) -> float:
+    """Cache lifetime in seconds: profiles daily, TTM metrics intraday, statements until revalidated."""
+    if endpoint == "profile":
+        return config.FMP_PROFILE_TTL_HOURS * 3600
+    if endpoint in FMP_STATEMENT_ENDPOINTS:
+        return config.FMP_STATEMENT_TTL_HOURS * 3600
+    return config.FMP_TTM_TTL_HOURS * 3600
+
+
+def _fmp_key(endpoint: str, ticker: str, params: Dict[str, Any]) -> str:
+    # The API key is deliberately not part of the cache key
+    return make_key(endpoint, ticker.upper(), params)
+
+
+def _latest_period(rows: Any) -> str | None:
+    """Period date of the newest row of a statement response."""
+    return rows[0].get("date") if isinstance(rows, list) and rows and isinstance(rows[0], dict) else None
+
+
+def _cacheable(data: Any) -> bool:
+    return bool(data) and not (isinstance(data, dict) and "Error Message" in data)
+
+
+def _store_fmp(key: str, endpoint: str, data: Any) -> Any:
+    """Cache a successful, non-empty FMP response and return it."""
+    if _cacheable(data):
+        fmp_cache.set(key, data, _fmp_ttl(endpoint))
+    return data
+
+
+async def _astore_fmp(key: str, endpoint: str, data: Any) -> Any:
+    """Async variant of _store_fmp."""
+    if _cacheable(data):
+        await fmp_cache.aset(key, data, _fmp_ttl(endpoint))
+    return data
+
+
+def _fmp_get(endpoint: str, ticker: str, api_key: str, **params) -> Any:
+    """GET an FMP endpoint through the FMP cache, within the shared FMP rate budget.
+
+    Expired statement entries are revalidated first: if the ticker's latest
+    reported period is unchanged the cached data is renewed instead of
+    downloaded again. When the period probe fails the endpoint is fetched
+    again, and when that fails too the expired copy is served. Concurrent
+    identical requests share one download.
+    """
+    key = _fmp_key(endpoint, ticker, params)
+    cached = fmp_cache.get(key)
+    if cached is not None:
+        return cached
+
+    stale = fmp_cache.peek(key) if endpoint in FMP_STATEMENT_ENDPOINTS else None
+    if stale is not None:
+        try:
+            unchanged = _latest_period(stale) == _reported_period(ticker, api_key)
+        except Exception as exc:  # A failed probe must not fail a fetch that could still succeed
+            logger.warning(f"FMP period check for {ticker} failed ({exc}); fetching {endpoint} again")
+            unchanged = False
+        if unchanged:
+            fmp_cache.renew(key, _fmp_ttl(endpoint))
+            return stale
+
+    def fetch() -> Any:
+        return _store_fmp(key, endpoint, _fmp_request(endpoint, _fmp_url(endpoint, ticker, api_key, **params)))
+
+    try:
+        return fmp_flights.do(key, fetch)
+    except Exception as exc:
+        if stale is None:
+            raise
+        logger.warning(f"FMP {endpoint} for {ticker} failed ({exc}); using the expired cached copy")
+        return stale
+
+
+def _reported_period(ticker: str, api_key: str) -> str | None:
+    """Latest reported period for a ticker (one-row income statement, briefly cached)."""
+    key = _fmp_key("latest-period", ticker, {})
+    probe = fmp_cache.get(key)
+    if probe is None:
+
+        def fetch() -> Dict[str, Any]:
+            rows = _fmp_request("income-statement", _fmp_url("income-statement", ticker, api_key, limit=1))
+            fetched = {"date": _latest_period(rows)}
+            fmp_cache.set(key, fetched, _PERIOD_PROBE_TTL)
+            return fetched
+
+        probe = fmp_flights.do(key, fetch)
+    return probe["date"]
+
+
+async def _afmp_get(client: httpx.AsyncClient, endpoint: str, ticker: str, api_key: str, **params) -> Any:
+    """Async variant of _fmp_get."""
+    key = _fmp_key(endpoint, ticker, params)
+    cached = await fmp_cache.aget(key)
+    if cached is not None:
+        return cached
+
+    stale = await fmp_cache.apeek(key) if endpoint in FMP_STATEMENT_ENDPOINTS else None
+    if stale is not None:
+        try:
+            unchanged = _latest_period(stale) == await _areported_period(client, ticker, api_key)
+        except Exception as exc:  # A failed probe must not fail a fetch that could still succeed
+            logger.warning(f"FMP period check for {ticker} failed ({exc}); fetching {endpoint} again")
+            unchanged = False
+        if unchanged:
+            await fmp_cache.arenew(key, _fmp_ttl(endpoint))
+            return stale
+
+    async def fetch() -> Any:
+        url = _fmp_url(endpoint, ticker, api_key, **params)
+        return await _astore_fmp(key, endpoint, await _afmp_request(client, endpoint, url))
+
+    try:
+        return await fmp_flights.ado(key, fetch)
+    except Exception as exc:
+        if stale is None:
+            raise
+        logger.warning(f"FMP {endpoint} for {ticker} failed ({exc}); using the expired cached copy")
+        return stale
+
+
+async def _areported_period(client: httpx.AsyncClient, ticker: str, api_key: str) -> str | None:
+    """Async variant of _reported_period."""
+    key = _fmp_key("latest-period", ticker, {})
+    probe = await fmp_cache.aget(key)
+    if probe is None:
+
+        async def fetch() -> Dict[str, Any]:
+            rows = await _afmp_request(client, "income-statement", _fmp_url("income-statement", ticker, api_key, limit=1))
+            fetched = {"date": _latest_period(rows)}
+            await fmp_cache.aset(key, fetched, _PERIOD_PROBE_TTL)
+            return fetched
+
+        probe = await fmp_flights.ado(key, fetch)
+    return probe["date"]
+
+
+# Endpoint and extra query parameters for key metrics, TTM metrics, ratios and income statement, in that order
+FINANCIAL_ENDPOINTS: List[tuple[str, Dict[str, Any]]] = [
+    ("key-metrics", {}),
+    ("key-metrics-ttm", {}),
+    ("ratios", {}),
+    ("income-statement", {"limit": 5}),
+]
+
+
+def _normalize_financial_data(metrics: Any, metrics_ttm: Any, ratios: Any, income: Any) -> Dict[str, Any]:
+    """Trim raw FMP responses into the financial_metrics schema."""
+    return {
+        "metrics": metrics[:5] if isinstance(metrics, list) else [],
+        "metrics_ttm": metrics_ttm if isinstance(metrics_ttm, dict) else metrics_ttm if isinstance(metrics_ttm, list) else [],
+        "ratios": ratios[:5] if isinstance(ratios, list) else [],
+        "income_statement": income[:5] if isinstance(income, list) else [],
+    }
+
+
 def get_financial_data(ticker: str, api_key: str | None = None) -> Dict[str, Any]:
-    """Fetch financial data from Financial Modeling Prep API (stable endpoints)."""
+    """Fetch financial data from Financial Modeling Prep API (stable endpoints).
+
+    The endpoints are fetched concurrently over the pooled keep-alive session.
+    """
     if not api_key:
         return {}
 
     try:
-        metrics_url = f"https://financialmodelingprep.com/stable/key-metrics?symbol={ticker}&apikey={api_key}"
-        metrics = requests.get(metrics_url, timeout=20).json()
-
-        ttm_url = f"https://financialmodelingprep.com/stable/key-metrics-ttm?symbol={ticker}&apikey={api_key}"
-        metrics_ttm = requests.get(ttm_url, timeout=20).json()
+        with ThreadPoolExecutor(max_workers=len(FINANCIAL_ENDPOINTS)) as pool:
+            futures = [pool.submit(_fmp_get, endpoint, ticker, api_key, **params) for endpoint, params in FINANCIAL_ENDPOINTS]
+            responses = [future.result() for future in futures]
+        return _normalize_financial_data(*responses)
+    except Exception as exc:  # pragma: no cover - runtime logging
+        logger.warning(f"Financial data error: {exc}")
+        return {}
 
-        ratios_url = f"https://financialmodelingprep.com/stable/ratios?symbol={ticker}&apikey={api_key}"
-        ratios = requests.get(ratios_url, timeout=20).json()
 
-        income_url = f"https://financialmodelingprep.com/stable/income-statement?symbol={ticker}&limit=5&apikey={api_key}"
-        income = requests.get(income_url, timeout=20).json()
+async def aget_financial_data(ticker: str, api_key: str | None = None) -> Dict[str, Any]:
+    """Async variant of get_financial_data; the four endpoints are fetched concurrently."""
+    if not api_key:
+        return {}
 
-        return {
-            "metrics": metrics[:5] if isinstance(metrics, list) else [],
-            "metrics_ttm": metrics_ttm if isinstance(metrics_ttm, dict) else metrics_ttm if isinstance(metrics_ttm, list) else [],
-            "ratios": ratios[:5] if isinstance(ratios, list) else [],
-            "income_statement": income[:5] if isinstance(income, list) else [],
-        }
+    try:
+        client = _async_client()
+        responses = await asyncio.gather(
+            *(_afmp_get(client, endpoint, ticker, api_key, **params) for endpoint, params in FINANCIAL_ENDPOINTS)
+        )
+        return await asyncio.to_thread(_normalize_financial_data, *responses)
     except Exception as exc:  # pragma: no cover - runtime logging
         logger.warning(f"Financial data error: {exc}")
         return {}
@@ -57,9 +449,330 @@ def get_company_profile(ticker: str, api_key: str | None = None) -> Dict[str, An
         return {}
 
     try:
-        url = f"https://financialmodelingprep.com/stable/profile?symbol={ticker}&apikey={api_key}"
-        profile = requests.get(url, timeout=20).json()
+        profile = _fmp_get("profile", ticker, api_key)
         return profile[0] if isinstance(profile, list) and profile else {}
     except Exception as exc:  # pragma: no cover - runtime logging
         logger.warning(f"Profile error: {exc}")
         return {}
+
+
+async def aget_company_profile(ticker: str, api_key: str | None = None) -> Dict[str, Any]:
+    """Async variant of get_company_profile."""
+    if not api_key:
+        return {}
+
+    try:
+        profile = await _afmp_get(_async_client(), "profile", ticker, api_key)
+        return profile[0] if isinstance(profile, list) and profile else {}
+    except Exception as exc:  # pragma: no cover - runtime logging
+        logger.warning(f"Profile error: {exc}")
+        return {}
+
+
+def warm_fmp_cache(tickers: List[str], api_key: str | None = None) -> Dict[str, int]:
+    """Fill the FMP cache (and the fundamentals store) for a ticker universe; fresh entries cost no requests.
+
+    Returns hit/miss counts for the warm-up (misses are downloads or revalidations).
+    """
+    api_key = api_key or config.FMP_API_KEY
+    if not api_key:
+        logger.warning("FMP_API_KEY is not set; nothing to warm")
+        return {"hits": 0, "misses": 0}
+
+    before = fmp_cache.stats()
+
+    def warm(ticker: str) -> None:
+        get_company_profile(ticker, api_key)
+        fundamentals_store.ingest(ticker, get_financial_data(ticker, api_key))
+
+    with ThreadPoolExecutor(max_workers=config.SEARCH_CONCURRENCY) as pool:
+        list(pool.map(warm, tickers))
+
+    after = fmp_cache.stats()
+    counts = {name: after[name] - before[name] for name in after}
+    logger.info(f"[OK] FMP cache warmed for {len(tickers)} tickers ({counts['hits']} fresh, {counts['misses']} fetched)")
+    return counts
+
+
+# Endpoints that accept a comma-separated symbol list and return one row per symbol
+FMP_MULTI_SYMBOL_ENDPOINTS = ("profile", "key-metrics-ttm")
+
+
+def _fmp_bulk(endpoint: str, tickers: List[str], api_key: str) -> Dict[str, Any]:
+    """Per-ticker responses of a multi-symbol endpoint, fetched in chunks of ``FMP_BULK_CHUNK_SIZE``.
+
+    Cached tickers cost nothing; each chunk's rows are split by symbol and
+    cached under the per-ticker keys. Tickers a chunk did not return (or a
+    failed chunk) fall back to one request each.
+    """
+    responses: Dict[str, Any] = {}
+    for ticker in tickers:
+        cached = fmp_cache.get(_fmp_key(endpoint, ticker, {}))
+        if cached is not None:
+            responses[ticker] = cached
+
+    missing = [ticker for ticker in tickers if ticker not in responses]
+    size = max(config.FMP_BULK_CHUNK_SIZE, 1)
+    for start in range(0, len(missing), size):
+        chunk = missing[start : start + size]
+        try:
+            rows = _fmp_request(endpoint, _fmp_url(endpoint, ",".join(chunk), api_key))
+        except Exception as exc:  # pragma: no cover - runtime logging
+            logger.warning(f"FMP bulk {endpoint} error: {exc}")
+            continue
+        by_symbol: Dict[str, List[Any]] = {}
+        for row in rows if isinstance(rows, list) else []:
+            if isinstance(row, dict) and row.get("symbol"):
+                by_symbol.setdefault(row["symbol"].upper(), []).append(row)
+        for ticker in chunk:
+            if ticker.upper() in by_symbol:
+                responses[ticker] = _store_fmp(_fmp_key(endpoint, ticker, {}), endpoint, by_symbol[ticker.upper()])
+
+    def single(ticker: str) -> Any:
+        try:
+            return _fmp_get(endpoint, ticker, api_key)
+        except Exception as exc:  # pragma: no cover - runtime logging
+            logger.warning(f"FMP {endpoint} error for {ticker}: {exc}")
+            return []
+
+    stragglers = [ticker for ticker in tickers if ticker not in responses]
+    with ThreadPoolExecutor(max_workers=config.SEARCH_CONCURRENCY) as pool:
+        responses.update(zip(stragglers, pool.map(single, stragglers)))
+    return responses
+
+
+def prefetch_fmp_universe(tickers: List[str], api_key: str | None = None) -> Dict[str, Dict[str, Any]]:
+    """Profiles and financial data for a batch universe, keyed by ticker.
+
+    Profiles and TTM metrics come from chunked multi-symbol requests; the
+    statement endpoints only serve one symbol per request and are fetched
+    concurrently. Each value is ``{"profile": ..., "financial_data": ...}`` in
+    the shapes get_company_profile and get_financial_data return.
+    """
+    api_key = api_key or config.FMP_API_KEY
+    tickers = list(dict.fromkeys(tickers))
+    if not api_key or not tickers:
+        return {}
+
+    bulk = {endpoint: _fmp_bulk(endpoint, tickers, api_key) for endpoint in FMP_MULTI_SYMBOL_ENDPOINTS}
+    jobs = [
+        (ticker, endpoint, params)
+        for ticker in tickers
+        for endpoint, params in FINANCIAL_ENDPOINTS
+        if endpoint not in FMP_MULTI_SYMBOL_ENDPOINTS
+    ]
+
+    def fetch(job: tuple[str, str, Dict[str, Any]]) -> Any:
+        ticker, endpoint, params = job
+        try:
+            return _fmp_get(endpoint, ticker, api_key, **params)
+        except Exception as exc:  # pragma: no cover - runtime logging
+            logger.warning(f"FMP {endpoint} error for {ticker}: {exc}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=config.SEARCH_CONCURRENCY) as pool:
+        statements = {(ticker, endpoint): data for (ticker, endpoint, _), data in zip(jobs, pool.map(fetch, jobs))}
+
+    prefetched = {}
+    for ticker in tickers:
+        profile = bulk["profile"].get(ticker)
+        responses = [
+            bulk[endpoint].get(ticker) if endpoint in bulk else statements[(ticker, endpoint)]
+            for endpoint, _ in FINANCIAL_ENDPOINTS
+        ]
+        prefetched[ticker] = {
+            "profile": profile[0] if isinstance(profile, list) and profile else {},
+            "financial_data": _normalize_financial_data(*responses),
+        }
+    logger.info(f"[OK] Prefetched FMP data for {len(tickers)} tickers")
+    return prefetched
+
+
+ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+ALPHA_VANTAGE = "Alpha Vantage"
+
+# Company overview (TTM figures), then annual statements
+ALPHA_VANTAGE_FUNCTIONS = ("OVERVIEW", "INCOME_STATEMENT", "BALANCE_SHEET")
+
+av_cache = DiskCache("alphavantage", config.FMP_CACHE_MAX_ENTRIES)
+
+
+def _av_ttl(function: str) -> float:
+    """Overview figures live as long as FMP TTM metrics, statements as long as FMP statements."""
+    hours = config.FMP_TTM_TTL_HOURS if function == "OVERVIEW" else config.FMP_STATEMENT_TTL_HOURS
+    return hours * 3600
+
+
+def _av_payload(data: Any) -> Dict[str, Any]:
+    """Alpha Vantage reports throttling and errors inside a 200 response; raise those."""
+    if not isinstance(data, dict):
+        return {}
+    if "Note" in data:
+        raise ProviderError(f"{ALPHA_VANTAGE}: {data['Note']}", retryable=True)
+    if "Information" in data or "Error Message" in data:
+        raise ProviderError(f"{ALPHA_VANTAGE}: {data.get('Information') or data['Error Message']}")
+    return data
+
+
+def _av_get(function: str, ticker: str, api_key: str) -> Dict[str, Any]:
+    """One Alpha Vantage function for a ticker through the Alpha Vantage cache, rate budget and policy."""
+    key = make_key(function, ticker.upper())
+    cached = av_cache.get(key)
+    if cached is not None:
+        return cached
+
+    def attempt() -> Dict[str, Any]:
+        get_limiter("alphavantage").acquire()
+        response = _http_session().get(
+            ALPHA_VANTAGE_URL,
+            params={"function": function, "symbol": ticker, "apikey": api_key},
+            timeout=(_FMP_CONNECT_TIMEOUT, _FMP_DEFAULT_READ_TIMEOUT),
+        )
+        raise_for_retryable_status(response)
+        return _av_payload(response.json())
+
+    data = get_policy("alphavantage").call(attempt)
+    if data:
+        av_cache.set(key, data, _av_ttl(function))
+    return data
+
+
+async def _aav_get(client: httpx.AsyncClient, function: str, ticker: str, api_key: str) -> Dict[str, Any]:
+    """Async variant of _av_get."""
+    key = make_key(function, ticker.upper())
+    cached = await av_cache.aget(key)
+    if cached is not None:
+        return cached
+
+    async def attempt() -> Dict[str, Any]:
+        await get_limiter("alphavantage").aacquire()
+        response = await client.get(ALPHA_VANTAGE_URL, params={"function": function, "symbol": ticker, "apikey": api_key})
+        raise_for_retryable_status(response)
+        return _av_payload(response.json())
+
+    data = await get_policy("alphavantage").acall(attempt)
+    if data:
+        await av_cache.aset(key, data, _av_ttl(function))
+    return data
+
+
+def _av_number(value: Any) -> float | None:
+    """Alpha Vantage numbers are strings, with "None" or "-" for missing values."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _av_ratio(numerator: float | None, denominator: float | None) -> float | None:
+    return round(numerator / denominator, 4) if numerator is not None and denominator else None
+
+
+# financial_metrics field -> Alpha Vantage field
+_AV_INCOME_FIELDS = {
+    "revenue": "totalRevenue",
+    "costOfRevenue": "costOfRevenue",
+    "grossProfit": "grossProfit",
+    "researchAndDevelopmentExpenses": "researchAndDevelopment",
+    "operatingExpenses": "operatingExpenses",
+    "operatingIncome": "operatingIncome",
+    "interestExpense": "interestExpense",
+    "incomeBeforeTax": "incomeBeforeTax",
+    "incomeTaxExpense": "incomeTaxExpense",
+    "netIncome": "netIncome",
+    "ebitda": "ebitda",
+    "depreciationAndAmortization": "depreciationAndAmortization",
+}
+_AV_OVERVIEW_FIELDS = {
+    "marketCap": "MarketCapitalization",
+    "peRatioTTM": "PERatio",
+    "pegRatioTTM": "PEGRatio",
+    "priceToBookRatioTTM": "PriceToBookRatio",
+    "evToEBITDATTM": "EVToEBITDA",
+    "evToSalesTTM": "EVToRevenue",
+    "dividendYieldTTM": "DividendYield",
+    "epsTTM": "EPS",
+    "revenueTTM": "RevenueTTM",
+    "ebitdaTTM": "EBITDA",
+    "netProfitMarginTTM": "ProfitMargin",
+    "operatingProfitMarginTTM": "OperatingMarginTTM",
+    "returnOnAssetsTTM": "ReturnOnAssetsTTM",
+    "returnOnEquityTTM": "ReturnOnEquityTTM",
+}
+
+
+def _normalize_alpha_vantage(ticker: str, overview: Dict[str, Any], income: Dict[str, Any], balance: Dict[str, Any]) -> Dict[str, Any]:
+    """Map Alpha Vantage responses onto the financial_metrics schema of get_financial_data."""
+    balances = {report.get("fiscalDateEnding"): report for report in balance.get("annualReports", [])}
+    income_statement, metrics, ratios = [], [], []
+    for report in income.get("annualReports", [])[:5]:
+        date = report.get("fiscalDateEnding")
+        row = {"date": date, "symbol": ticker, "reportedCurrency": report.get("reportedCurrency")}
+        row.update({field: _av_number(report.get(source)) for field, source in _AV_INCOME_FIELDS.items()})
+        income_statement.append(row)
+
+        sheet = balances.get(date, {})
+        equity = _av_number(sheet.get("totalShareholderEquity"))
+        debt = _av_number(sheet.get("shortLongTermDebtTotal"))
+        cash = _av_number(sheet.get("cashAndCashEquivalentsAtCarryingValue"))
+        metrics.append(
+            {
+                "date": date,
+                "symbol": ticker,
+                "returnOnEquity": _av_ratio(row["netIncome"], equity),
+                "returnOnAssets": _av_ratio(row["netIncome"], _av_number(sheet.get("totalAssets"))),
+                "currentRatio": _av_ratio(
+                    _av_number(sheet.get("totalCurrentAssets")), _av_number(sheet.get("totalCurrentLiabilities"))
+                ),
+                "netDebtToEBITDA": _av_ratio(debt - cash, row["ebitda"]) if debt is not None and cash is not None else None,
+            }
+        )
+        ratios.append(
+            {
+                "date": date,
+                "symbol": ticker,
+                "grossProfitMargin": _av_ratio(row["grossProfit"], row["revenue"]),
+                "operatingProfitMargin": _av_ratio(row["operatingIncome"], row["revenue"]),
+                "netProfitMargin": _av_ratio(row["netIncome"], row["revenue"]),
+                "debtToEquityRatio": _av_ratio(debt, equity),
+            }
+        )
+
+    metrics_ttm = {field: _av_number(overview.get(source)) for field, source in _AV_OVERVIEW_FIELDS.items()} if overview else {}
+    return {
+        "metrics": metrics,
+        "metrics_ttm": [{"symbol": ticker, **metrics_ttm}] if metrics_ttm else [],
+        "ratios": ratios,
+        "income_statement": income_statement,
+        "provider": ALPHA_VANTAGE,
+    }
+
+
+def get_alpha_vantage_financials(ticker: str, api_key: str | None = None) -> Dict[str, Any]:
+    """Fundamentals from Alpha Vantage in the financial_metrics schema (empty when unavailable)."""
+    if not api_key:
+        return {}
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(ALPHA_VANTAGE_FUNCTIONS)) as pool:
+            responses = list(pool.map(lambda function: _av_get(function, ticker, api_key), ALPHA_VANTAGE_FUNCTIONS))
+        return _normalize_alpha_vantage(ticker, *responses)
+    except Exception as exc:  # pragma: no cover - runtime logging
+        logger.warning(f"{ALPHA_VANTAGE} error: {exc}")
+        return {}
+
+
+async def aget_alpha_vantage_financials(ticker: str, api_key: str | None = None) -> Dict[str, Any]:
+    """Async variant of get_alpha_vantage_financials."""
+    if not api_key:
+        return {}
+
+    try:
+        client = _async_client()
+        responses = await asyncio.gather(
+            *(_aav_get(client, function, ticker, api_key) for function in ALPHA_VANTAGE_FUNCTIONS)
+        )
+        return await asyncio.to_thread(_normalize_alpha_vantage, ticker, *responses)
+    except Exception as exc:  # pragma: no cover - runtime logging
+        logger.warning(f"{ALPHA_VANTAGE} error: {exc}")
+        return {}
@@ -0,0 +1,154 @@
+"""Fundamentals from FMP with Alpha Vantage as fallback or race provider.
+
+Providers share one interface: ``(ticker, api_key) -> financial_metrics``
+dict in the schema of data_sources.get_financial_data (empty when
+unavailable). With FUNDAMENTALS_STRATEGY=fallback the next provider starts
+when the previous one returned no usable data or has not answered within
+FUNDAMENTALS_FALLBACK_SECONDS; with ``race`` all configured providers start
+at once. Either way the first usable result, in provider order among the
+finished ones, wins.
+"""
+
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from . import config
+from .data_sources import (
+    aget_alpha_vantage_financials,
+    aget_financial_data,
+    get_alpha_vantage_financials,
+    get_financial_data,
+)
+
+logger = config.logger
+
+Provider = Tuple[str, Callable[[str, str], Dict[str, Any]], Callable[[str, str], Awaitable[Dict[str, Any]]]]
+
+# Provider name, sync and async fetchers, in preference order
+FUNDAMENTALS_PROVIDERS: List[Provider] = [
+    ("fmp", get_financial_data, aget_financial_data),
+    ("alphavantage", get_alpha_vantage_financials, aget_alpha_vantage_financials),
+]
+
+
+def _api_key(name: str) -> str | None:
+    return {"fmp": config.FMP_API_KEY, "alphavantage": config.ALPHA_VANTAGE_KEY}.get(name)
+
+
+def has_fundamentals(data: Dict[str, Any] | None) -> bool:
+    """Whether a financial_metrics dict holds any statement or metric rows."""
+    return bool(data) and any(data.get(field) for field in ("metrics", "metrics_ttm", "ratios", "income_statement"))
+
+
+def _providers(skip: Tuple[str, ...]) -> List[Provider]:
+    return [provider for provider in FUNDAMENTALS_PROVIDERS if provider[0] not in skip and _api_key(provider[0])]
+
+
+def _start_delay() -> float:
+    """Seconds before the next provider starts; 0 starts every provider at once."""
+    return 0.0 if config.FUNDAMENTALS_STRATEGY == "race" else config.FUNDAMENTALS_FALLBACK_SECONDS
+
+
+def _settle(fmp_data: Dict[str, Any] | None) -> Tuple[Dict[str, Any] | None, Tuple[str, ...]]:
+    """Use already fetched FMP data (e.g. a batch prefetch) or skip FMP when it came back empty."""
+    if fmp_data is None:
+        return None, ()
+    return (fmp_data, ()) if has_fundamentals(fmp_data) else (None, ("fmp",))
+
+
+def _first_usable(results: List[Dict[str, Any] | None]) -> Dict[str, Any] | None:
+    """First usable finished result in provider order (None entries are still running)."""
+    return next((result for result in results if has_fundamentals(result)), None)
+
+
+def get_fundamentals(ticker: str, fmp_data: Dict[str, Any] | None = None) -> Dict[str, Any] | None:
+    """Fundamentals for a ticker from the configured providers (None when none is configured).
+
+    ``fmp_data`` is FMP data fetched earlier; when usable no provider is called.
+    """
+    settled, skip = _settle(fmp_data)
+    if settled is not None:
+        return settled
+    providers = _providers(skip)
+    if not providers:
+        return fmp_data
+
+    pool = ThreadPoolExecutor(max_workers=len(providers))
+    started: List[Future] = []
+
+    def start_next() -> None:
+        name, fetch, _ = providers[len(started)]
+        started.append(pool.submit(fetch, ticker, _api_key(name)))
+
+    try:
+        start_next()
+        while len(started) < len(providers) and _start_delay() == 0:
+            start_next()
+        while True:
+            pending = [future for future in started if not future.done()]
+            more = len(started) < len(providers)
+            if not pending:
+                if not more:
+                    break
+                start_next()
+                continue
+            done, _ = wait(pending, timeout=_start_delay() if more else None, return_when=FIRST_COMPLETED)
+            if not done:
+                start_next()
+                continue
+            winner = _first_usable([future.result() if future.done() else None for future in started])
+            if winner is not None:
+                _log_provider(ticker, winner)
+                return winner
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return started[0].result() or fmp_data or {}
+
+
+async def aget_fundamentals(ticker: str, fmp_data: Dict[str, Any] | None = None) -> Dict[str, Any] | None:
+    """Async variant of get_fundamentals; losing providers are cancelled."""
+    settled, skip = _settle(fmp_data)
+    if settled is not None:
+        return settled
+    providers = _providers(skip)
+    if not providers:
+        return fmp_data
+
+    started: List[asyncio.Future] = []
+
+    def start_next() -> None:
+        name, _, afetch = providers[len(started)]
+        started.append(asyncio.ensure_future(afetch(ticker, _api_key(name))))
+
+    try:
+        start_next()
+        while len(started) < len(providers) and _start_delay() == 0:
+            start_next()
+        while True:
+            pending = [task for task in started if not task.done()]
+            more = len(started) < len(providers)
+            if not pending:
+                if not more:
+                    break
+                start_next()
+                continue
+            done, _ = await asyncio.wait(
+                pending, timeout=_start_delay() if more else None, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                start_next()
+                continue
+            winner = _first_usable([task.result() if task.done() else None for task in started])
+            if winner is not None:
+                _log_provider(ticker, winner)
+                return winner
+    finally:
+        for task in started:
+            task.cancel()
+    return started[0].result() or fmp_data or {}
+
+
+def _log_provider(ticker: str, data: Dict[str, Any]) -> None:
+    if data.get("provider"):
+        logger.info(f"[OK] Fundamentals for {ticker} from {data['provider']}")
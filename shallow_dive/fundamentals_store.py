@@ -0,0 +1,192 @@
+"""Columnar on-disk store of fundamentals for the whole coverage universe.
+
+Every financial_metrics dict a run fetches (FMP or Alpha Vantage) is written
+to Parquet, one dataset per table (``income_statement``, ``metrics``,
+``ratios``, ``metrics_ttm``) under ``FUNDAMENTALS_STORE``, hive-partitioned
+by ticker::
+
+    <FUNDAMENTALS_STORE>/income_statement/ticker=AAPL/part.parquet
+
+Periods are rows keyed by ``date`` inside a partition (one file per ticker
+keeps files few and large enough to scan quickly; row-group statistics prune
+period filters). Writers merge into a partition under an exclusive lock on
+its ``_lock`` file, so threads and the processes of a batch pool never drop
+each other's rows. Numeric fields are stored as float64 and ``date`` as a date,
+so reads across tickers get one typed schema. Reads select columns and
+tickers without parsing any JSON, e.g. for screens and peer tables::
+
+    latest("ratios", ["netProfitMargin", "returnOnEquity"], tickers=peers)
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from . import config
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+logger = config.logger
+
+# Period tables keep one row per reported period; TTM metrics keep the latest snapshot
+PERIOD_TABLES = ("income_statement", "metrics", "ratios")
+TABLES = PERIOD_TABLES + ("metrics_ttm",)
+
+
+def enabled() -> bool:
+    return bool(config.FUNDAMENTALS_STORE)
+
+
+def _partition(table: str, ticker: str) -> str:
+    return os.path.join(config.FUNDAMENTALS_STORE, table, f"ticker={ticker.upper()}")
+
+
+def _frame(rows: Any, provider: str) -> pd.DataFrame:
+    """Typed frame of one table's rows: numbers (and empty columns) as float64, ``date`` as a date, the rest as strings."""
+    rows = [rows] if isinstance(rows, dict) else rows if isinstance(rows, list) else []
+    frame = pd.DataFrame([row for row in rows if isinstance(row, dict)])
+    if frame.empty:
+        return frame
+    frame = frame.drop(columns=["ticker"], errors="ignore")
+    for column in frame.columns:
+        values = frame[column]
+        if column == "date":
+            frame[column] = pd.to_datetime(values, errors="coerce").dt.date
+        elif values.isna().all() or pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+            frame[column] = values.astype("float64")
+        else:
+            frame[column] = values.map(lambda value: None if value is None else str(value)).astype("string")
+    frame["provider"] = provider
+    return frame
+
+
+@contextmanager
+def _partition_lock(path: str):
+    """Hold an exclusive lock on a partition, across threads and processes."""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "_lock"), "a+b") as handle:  # Underscore-prefixed files are ignored by readers
+        handle.seek(0)  # msvcrt locks the byte at the current position
+        if os.name == "nt":
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _write(path: str, frame: pd.DataFrame) -> None:
+    """Atomically replace a partition file."""
+    target = os.path.join(path, "part.parquet")
+    temporary = os.path.join(path, "_part.parquet.tmp")  # Underscore-prefixed files are ignored by readers
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), temporary, compression="zstd")
+    os.replace(temporary, target)
+
+
+def ingest(ticker: str, financial_data: Dict[str, Any] | None) -> int:
+    """Merge a financial_metrics dict into the store and return the number of rows written.
+
+    Period rows replace stored rows with the same ``date``; the TTM snapshot
+    replaces the previous one. Storage errors are logged, never raised.
+    """
+    if not enabled() or not financial_data:
+        return 0
+    provider = financial_data.get("provider", "Financial Modeling Prep")
+    written = 0
+    try:
+        for table in TABLES:
+            frame = _frame(financial_data.get(table), provider)
+            if frame.empty:
+                continue
+            path = _partition(table, ticker)
+            with _partition_lock(path):
+                if table == "metrics_ttm":
+                    frame["as_of"] = date.today()
+                elif "date" in frame.columns and os.path.exists(os.path.join(path, "part.parquet")):
+                    stored = pq.read_table(os.path.join(path, "part.parquet")).to_pandas()
+                    stored = stored[~stored["date"].isin(frame["date"])] if "date" in stored.columns else stored.iloc[0:0]
+                    frame = pd.concat([frame, stored], ignore_index=True) if not stored.empty else frame
+                if "date" in frame.columns:
+                    frame = frame.sort_values("date", ascending=False, ignore_index=True)
+                _write(path, frame)
+            written += len(frame)
+    except Exception as exc:
+        logger.warning(f"Fundamentals store error for {ticker}: {exc}")
+    return written
+
+
+def _dataset(table: str) -> ds.Dataset | None:
+    """Hive-partitioned dataset of a table with the schema unified across tickers."""
+    path = os.path.join(config.FUNDAMENTALS_STORE, table)
+    if not enabled() or not os.path.isdir(path):
+        return None
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    fragments = list(dataset.get_fragments())
+    if not fragments:
+        return None
+    schema = pa.unify_schemas([fragment.physical_schema for fragment in fragments], promote_options="permissive")
+    return ds.dataset(path, format="parquet", partitioning="hive", schema=schema.append(pa.field("ticker", pa.string())))
+
+
+def read(
+    table: str,
+    columns: List[str] | None = None,
+    tickers: List[str] | None = None,
+    since: date | str | None = None,
+) -> pd.DataFrame:
+    """Rows of a table as a typed frame with ``ticker`` (and ``date``) plus the requested columns.
+
+    ``tickers`` prunes partitions and ``since`` keeps periods on or after a
+    date; only the selected columns are read from disk.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unknown fundamentals table: {table}")
+    dataset = _dataset(table)
+    if dataset is None:
+        return pd.DataFrame()
+
+    names = set(dataset.schema.names)
+    keys = [key for key in ("ticker", "date", "as_of") if key in names]
+    selected = keys + [column for column in columns or dataset.schema.names if column in names and column not in keys]
+
+    condition = None
+    if tickers:
+        condition = ds.field("ticker").isin([ticker.upper() for ticker in tickers])
+    if since is not None and "date" in names:
+        period = ds.field("date") >= pa.scalar(pd.Timestamp(since).date(), pa.date32())
+        condition = period if condition is None else condition & period
+    return dataset.to_table(columns=selected, filter=condition).to_pandas()
+
+
+def latest(table: str, columns: List[str] | None = None, tickers: List[str] | None = None) -> pd.DataFrame:
+    """Most recent row per ticker, indexed by ticker (e.g. for peer comparison and screens)."""
+    frame = read(table, columns, tickers)
+    if frame.empty:
+        return frame
+    order = "date" if "date" in frame.columns else "as_of" if "as_of" in frame.columns else None
+    if order:
+        frame = frame.sort_values(order, ascending=False)
+    return frame.drop_duplicates("ticker").set_index("ticker").sort_index()
+
+
+def tickers() -> List[str]:
+    """Tickers with any stored fundamentals."""
+    stored = set()
+    for table in TABLES:
+        path = os.path.join(config.FUNDAMENTALS_STORE, table)
+        if enabled() and os.path.isdir(path):
+            stored.update(name.removeprefix("ticker=") for name in os.listdir(path) if name.startswith("ticker="))
+    return sorted(stored)
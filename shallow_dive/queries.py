@@ -0,0 +1,77 @@
+"""Near-duplicate search query coalescing.
+
+Section query templates overlap (e.g. "competitive advantages market position"
+in 1.4 and 2.1). Queries are reduced to normalized term sets, grouped when
+their overlap is high enough, and each group is searched once with a merged
+query that keeps every member's distinct terms.
+"""
+
+import re
+from typing import Iterable, List, Tuple
+
+STOPWORDS = frozenset({"a", "an", "and", "by", "for", "in", "of", "on", "or", "the", "to", "vs", "with"})
+
+_SUFFIXES = ("ing", "ies", "es", "s")
+
+
+def _stem(word: str) -> str:
+    """Strip a common plural/gerund suffix so "margins"/"margin" and "positioning"/"position" match.
+
+    A final "e" goes too, so "advantage" meets "advantages" (stemmed as "advantag").
+    """
+    for suffix in _SUFFIXES:
+        if len(word) > 4 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word[:-1] if len(word) > 4 and word.endswith("e") else word
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def normalize_query(query: str, ignore: Iterable[str] = ()) -> frozenset[str]:
+    """Stemmed content terms of a query, without stopwords or ``ignore`` terms (company name, ticker)."""
+    ignored = {_stem(word) for text in ignore for word in _words(text)}
+    return frozenset(
+        stem for stem in (_stem(word) for word in _words(query) if word not in STOPWORDS) if stem not in ignored
+    )
+
+
+def query_similarity(left: frozenset[str], right: frozenset[str]) -> float:
+    """Overlap coefficient of two normalized queries (1.0 when one contains the other)."""
+    if not left or not right:
+        return 0.0
+    return len(left & right) / min(len(left), len(right))
+
+
+def _merge_text(queries: List[str]) -> str:
+    """First query followed by the words the other queries add to it."""
+    merged = queries[0]
+    seen = {_stem(word) for word in _words(merged)}
+    for query in queries[1:]:
+        for word in query.split():
+            stem = _stem(re.sub(r"[^a-z0-9]", "", word.lower()))
+            if stem and stem not in seen and word.lower() not in STOPWORDS:
+                merged += f" {word}"
+                seen.add(stem)
+    return merged
+
+
+def coalesce_queries(queries: List[str], ignore: Iterable[str] = (), threshold: float = 0.75) -> List[Tuple[str, List[str]]]:
+    """Group near-duplicate queries, preserving first-seen order.
+
+    Returns ``(search query, member queries)`` pairs. A query joins the first
+    group whose seed query it overlaps by at least ``threshold``; a threshold
+    above 1 disables merging.
+    """
+    ignore = list(ignore)
+    groups: List[Tuple[frozenset[str], List[str]]] = []
+    for query in dict.fromkeys(queries):
+        terms = normalize_query(query, ignore)
+        for seed_terms, members in groups:
+            if query_similarity(terms, seed_terms) >= threshold:
+                members.append(query)
+                break
+        else:
+            groups.append((terms, [query]))
+    return [(_merge_text(members), members) for _, members in groups]
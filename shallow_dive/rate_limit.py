@@ -0,0 +1,92 @@
+"""Process-wide token-bucket rate limiting for outbound provider calls."""
+
+import asyncio
+import threading
+import time
+from typing import Dict
+
+from . import config
+
+logger = config.logger
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations.
+
+    Callers may drive the balance negative; each one then waits until the
+    bucket has refilled past its reservation. Under sustained load this queues
+    callers at exactly the configured rate instead of bursting and throttling.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens and return how many seconds to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) tokens without waiting."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class ProviderLimiter:
+    """Requests-per-minute and optional tokens-per-minute budget for one provider."""
+
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    def _reserve(self, tokens: float) -> float:
+        wait = self.requests.reserve() if self.requests else 0.0
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            logger.debug(f"Rate limit {self.name}: waiting {wait:.2f}s")
+        return wait
+
+    def acquire(self, tokens: float = 0) -> None:
+        """Block until one request (and ``tokens`` tokens) fit in the budget."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: float = 0) -> None:
+        """Async variant of acquire."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated: float, actual: float) -> None:
+        """Correct a token reservation once the real usage is known."""
+        if self.tokens and actual:
+            self.tokens.adjust(actual - estimated)
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """Return the shared limiter for a provider configured in config.RATE_LIMITS."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            requests_per_minute, tokens_per_minute = config.RATE_LIMITS.get(provider, (0, 0))
+            _limiters[provider] = ProviderLimiter(provider, requests_per_minute, tokens_per_minute)
+        return _limiters[provider]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) used for TPM reservations."""
+    return len(text) // 4 + 1
@@ -0,0 +1,362 @@
+"""Retries, circuit breakers and hedged requests for outbound provider calls.
+
+Every Tavily, FMP and LLM request runs through the policy of its provider:
+
+- transient failures (429, 5xx, timeouts, dropped connections) are retried
+  with full-jitter exponential backoff, honouring ``Retry-After``;
+- consecutive transient failures open the provider's circuit breaker, so
+  calls fail fast with CircuitOpenError until a probe call succeeds again;
+- with HEDGE_REQUESTS, idempotent reads (search, FMP) that are still running
+  after the provider's recent p95 latency get one duplicate request, and the
+  first successful response wins.
+
+Policies are shared by all threads and tasks in a process, like the rate
+limiters in rate_limit.py.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict
+
+import httpx
+import openai
+import requests
+
+from . import config
+
+logger = config.logger
+
+# Providers whose calls are idempotent reads and may be hedged
+HEDGED_PROVIDERS = ("tavily", "fmp")
+
+TRANSIENT_ERRORS = (
+    TimeoutError,
+    ConnectionError,
+    requests.ConnectionError,
+    requests.Timeout,
+    httpx.TransportError,
+    openai.APIConnectionError,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """A provider's circuit breaker is open; the call was not attempted."""
+
+
+class ProviderError(RuntimeError):
+    """A provider reported a failure without raising (e.g. as an error string)."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class PartialResponseError(RuntimeError):
+    """A streamed response failed after output was emitted; retrying would repeat it."""
+
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether a failure is transient: 429, 5xx, a timeout or a dropped connection."""
+    retryable = getattr(exc, "retryable", None)
+    if isinstance(retryable, bool):
+        return retryable
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, TRANSIENT_ERRORS)
+
+
+def error_from_text(text: str) -> ProviderError:
+    """ProviderError for a failure a client only reports as text, retryable when it looks transient."""
+    transient = re.search(r"\b(429|5\d\d)\b|timed? ?out|connection", text, re.IGNORECASE) is not None
+    return ProviderError(text, retryable=transient)
+
+
+def raise_for_retryable_status(response: Any) -> None:
+    """Raise the response's HTTP error for 429/5xx; other statuses are left to the caller."""
+    status = getattr(response, "status_code", 200)
+    if status == 429 or status >= 500:
+        response.raise_for_status()
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Opens after ``failures`` consecutive transient failures, for ``reset_seconds``.
+
+    Once the reset time has passed one probe call is let through (half-open);
+    its success closes the breaker and its failure opens it again. A probe
+    that ends without either (e.g. a cancelled task) frees the half-open
+    slot for the next call.
+    """
+
+    def __init__(self, name: str, failures: int, reset_seconds: float):
+        self.name = name
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.consecutive = 0
+        self.opened_at: float | None = None
+        self.probing: object | None = None  # Token of the call holding the half-open slot
+        self._lock = threading.Lock()
+
+    def before_call(self) -> object | None:
+        """Raise CircuitOpenError unless a call may go out now; return a probe token for a half-open call."""
+        if self.failures <= 0:
+            return None
+        with self._lock:
+            if self.opened_at is None:
+                return None
+            if self.probing is not None or time.monotonic() - self.opened_at < self.reset_seconds:
+                raise CircuitOpenError(f"{self.name} circuit is open after {self.consecutive} consecutive failures")
+            self.probing = object()
+            return self.probing
+
+    def release(self, probe: object | None) -> None:
+        """Free the half-open slot if ``probe`` still holds it (the probe was never settled)."""
+        if probe is None:
+            return
+        with self._lock:
+            if self.probing is probe:
+                self.probing = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"{self.name} circuit closed")
+            self.consecutive = 0
+            self.opened_at = None
+            self.probing = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive += 1
+            if self.probing is not None or (self.opened_at is None and 0 < self.failures <= self.consecutive):
+                logger.warning(f"{self.name} circuit opened for {self.reset_seconds:.0f}s")
+                self.opened_at = time.monotonic()
+            self.probing = None
+
+
+class LatencyTracker:
+    """Recent successful call latencies of one provider."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float, min_samples: int) -> float | None:
+        """Latency percentile, or None until ``min_samples`` calls have been seen."""
+        with self._lock:
+            if len(self._samples) < max(min_samples, 1):
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+_hedge_pool: ThreadPoolExecutor | None = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=config.SEARCH_CONCURRENCY * 2, thread_name_prefix="hedge")
+        return _hedge_pool
+
+
+class ProviderPolicy:
+    """Retry, circuit breaker and hedging policy for one provider."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name, config.BREAKER_FAILURES, config.BREAKER_RESET_SECONDS)
+        self.latency = LatencyTracker()
+        self.hedge = config.HEDGE_REQUESTS and name in HEDGED_PROVIDERS
+        self.retries = 0
+        self.hedged = 0
+        self.short_circuited = 0
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        """Full-jitter exponential delay before retry ``attempt`` (0-based), at least any Retry-After."""
+        delay = random.uniform(0, min(config.RETRY_MAX_SECONDS, config.RETRY_BASE_SECONDS * 2**attempt))
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, config.RETRY_MAX_SECONDS))
+        return delay
+
+    def _admit(self) -> object | None:
+        try:
+            return self.breaker.before_call()
+        except CircuitOpenError:
+            self.short_circuited += 1
+            raise
+
+    def _failed(self, attempt: int, exc: BaseException) -> float | None:
+        """Record a failure; return the backoff before retrying, or None to give up.
+
+        A non-retryable error (e.g. a 400) means the provider answered, so it
+        counts as a success for the breaker.
+        """
+        if not is_retryable(exc):
+            self.breaker.record_success()
+            return None
+        self.breaker.record_failure()
+        if attempt >= config.RETRY_ATTEMPTS:
+            return None
+        self.retries += 1
+        delay = self._backoff(attempt, exc)
+        logger.warning(f"{self.name} transient error ({exc}); retry {attempt + 1} in {delay:.1f}s")
+        return delay
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` under the policy: retried on transient errors, hedged when enabled."""
+        attempt = 0
+        while True:
+            probe = self._admit()
+            try:
+                result = self._hedged(fn) if self.hedge else self._timed(fn)
+            except Exception as exc:
+                delay = self._failed(attempt, exc)
+                if delay is None:
+                    raise
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self.breaker.release(probe)
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of call."""
+        attempt = 0
+        while True:
+            probe = self._admit()
+            try:
+                result = await (self._ahedged(fn) if self.hedge else self._atimed(fn))
+            except Exception as exc:
+                delay = self._failed(attempt, exc)
+                if delay is None:
+                    raise
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self.breaker.release(probe)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _timed(self, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = fn()
+        self.latency.add(time.perf_counter() - started)
+        return result
+
+    async def _atimed(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.perf_counter()
+        result = await fn()
+        self.latency.add(time.perf_counter() - started)
+        return result
+
+    def _hedge_delay(self) -> float | None:
+        return self.latency.percentile(95, config.HEDGE_MIN_SAMPLES)
+
+    def _settle(self, future: Future, fn: Callable[[], Any]) -> None:
+        try:
+            future.set_result(self._timed(fn))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    def _hedged(self, fn: Callable[[], Any]) -> Any:
+        """Run ``fn``; if it outlasts the p95 latency, race a duplicate and return the first success.
+
+        The first attempt gets its own thread, so the caller can take a faster
+        duplicate's answer while it is still running. Only duplicates use the
+        shared hedge pool; ordinary calls never queue behind it.
+        """
+        delay = self._hedge_delay()
+        if delay is None:
+            return self._timed(fn)
+        first: Future = Future()
+        threading.Thread(target=self._settle, args=(first, fn), name=f"{self.name}-call", daemon=True).start()
+        if wait([first], timeout=delay).done:
+            return first.result()
+
+        self.hedged += 1
+        pending: set[Future] = {first, _hedge_executor().submit(self._timed, fn)}
+        # The slower request keeps running in its thread; its result is discarded
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        return first.result()
+
+    async def _ahedged(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of _hedged; the losing request is cancelled."""
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._atimed(fn)
+        first = asyncio.ensure_future(self._atimed(fn))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+
+            self.hedged += 1
+            tasks.add(asyncio.ensure_future(self._atimed(fn)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return first.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {"retries": self.retries, "hedged": self.hedged, "short_circuited": self.short_circuited}
+
+
+_policies: Dict[str, ProviderPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(provider: str) -> ProviderPolicy:
+    """Return the shared resilience policy for a provider."""
+    with _policies_lock:
+        if provider not in _policies:
+            _policies[provider] = ProviderPolicy(provider)
+        return _policies[provider]
+
+
+def policy_stats() -> Dict[str, Dict[str, int]]:
+    """Per-provider retry/hedge/short-circuit counts with any activity in this process."""
+    with _policies_lock:
+        policies = list(_policies.values())
+    return {policy.name: policy.stats() for policy in policies if any(policy.stats().values())}
@@ -1,28 +1,54 @@
 """Execution helpers for running single or batch analyses."""
 
+import asyncio
 import os
 import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict
+from typing import Any, Awaitable, Callable, Dict, List
 
 import pandas as pd
 
-from . import config
-from .workflow import build_workflow
+from . import checkpoints, config
+from .corpus import add_documents
+from .data_sources import (
+    aclose_http_clients,
+    fmp_cache,
+    fmp_flights,
+    invalidate_search_cache,
+    prefetch_fmp_universe,
+    search_cache,
+    search_flights,
+    warm_fmp_cache,
+)
+from .resilience import policy_stats
+from .sections import SECTION_RESEARCH, section_queries, sorted_sections
+from .state import ShallowDiveState
+from .streaming_report import StreamingReport
+from .workflow import build_workflow, downstream_nodes, get_workflow
 
 logger = config.logger
 
 
-def analyze_single_company(company_name: str, ticker: str, output_dir: str = ".") -> Dict:
-    """Analyze a single company and save the report."""
-    initial_state = {
+def _initial_state(
+    company_name: str,
+    ticker: str,
+    stream_tokens: bool = False,
+    llm_cache_bypass: bool = False,
+    fmp_prefetch: Dict | None = None,
+) -> Dict:
+    """Build the empty workflow state for one company."""
+    return {
         "company_name": company_name,
         "ticker": ticker,
         "company_overview": {},
         "financial_metrics": {},
         "ownership_data": {},
         "market_data": {},
+        "research_corpus": {},
         "web_research": [],
+        "research_results": {},
+        "fmp_prefetch": fmp_prefetch or {},
         "sources": [],
         "source_map": {},
         "section_1_1": "",
@@ -56,67 +82,538 @@ def analyze_single_company(company_name: str, ticker: str, output_dir: str = "."
         "current_section": "",
         "completed_sections": [],
         "errors": [],
+        "stream_tokens": stream_tokens,
+        "llm_cache_bypass": llm_cache_bypass or config.LLM_CACHE_BYPASS,
+        "llm_metrics": {},
         "final_report": "",
     }
 
+
+def _log_start(company_name: str, ticker: str) -> None:
+    """Log the run banner."""
     logger.info(f"\n{'=' * 70}")
     logger.info("STARTING SHALLOW DIVE ANALYSIS")
     logger.info(f"Company: {company_name} ({ticker})")
     logger.info(f"{'=' * 70}\n")
 
-    app = build_workflow()
 
-    try:
-        final_state = app.invoke(initial_state)
+def _report_path(output_dir: str, ticker: str) -> str:
+    return os.path.join(output_dir, f"shallow_dive_{ticker}_{datetime.now().strftime('%Y%m%d')}.md")
 
-        logger.info(f"\n{'=' * 70}")
-        logger.info("ANALYSIS COMPLETE")
-        logger.info(f"{'=' * 70}\n")
 
-        os.makedirs(output_dir, exist_ok=True)
-        report_filename = os.path.join(output_dir, f"shallow_dive_{ticker}_{datetime.now().strftime('%Y%m%d')}.md")
+def _save_report(company_name: str, ticker: str, output_dir: str, final_state: Dict) -> Dict:
+    """Write the compiled report to disk and return the run summary."""
+    logger.info(f"\n{'=' * 70}")
+    logger.info("ANALYSIS COMPLETE")
+    logger.info(f"{'=' * 70}\n")
 
-        with open(report_filename, "w", encoding="utf-8") as file:
-            file.write(final_state["final_report"])
+    os.makedirs(output_dir, exist_ok=True)
+    report_filename = _report_path(output_dir, ticker)
+
+    with open(report_filename, "w", encoding="utf-8") as file:
+        file.write(final_state["final_report"])
+
+    logger.info(f"[OK] Report saved to: {report_filename}")
+    logger.info(f"Completed sections: {', '.join(sorted_sections(final_state['completed_sections']))}")
+    logger.info(f"Total sources cited: {len(final_state.get('sources', []))}")
+    _log_llm_metrics(final_state)
+    for name, cache in (("Search", search_cache), ("FMP", fmp_cache)):
+        if cache.enabled:
+            stats = cache.stats()
+            logger.info(f"{name} cache (this process): {stats['hits']} hits, {stats['misses']} misses")
+    shared = {flights.name: flights.shared for flights in (search_flights, fmp_flights) if flights.shared}
+    if shared:
+        logger.info(f"Requests shared with identical in-flight calls (this process): {shared}")
+    resilience = policy_stats()
+    if resilience:
+        logger.info(f"Retries, hedged and short-circuited calls (this process): {resilience}")
+
+    return {
+        "company": company_name,
+        "ticker": ticker,
+        "status": "Success",
+        "filename": report_filename,
+        "sections": len(final_state["completed_sections"]),
+        "sources": len(final_state.get("sources", [])),
+        "llm_cache_hits": sum(1 for m in (final_state.get("llm_metrics") or {}).values() if m.get("cached")),
+        "input_tokens": sum(m.get("input_tokens", 0) for m in (final_state.get("llm_metrics") or {}).values()),
+        "cached_input_tokens": sum(m.get("cached_input_tokens", 0) for m in (final_state.get("llm_metrics") or {}).values()),
+    }
 
-        logger.info(f"[OK] Report saved to: {report_filename}")
-        logger.info(f"Completed sections: {', '.join(final_state['completed_sections'])}")
-        logger.info(f"Total sources cited: {len(final_state.get('sources', []))}")
 
-        return {
-            "company": company_name,
-            "ticker": ticker,
-            "status": "Success",
-            "filename": report_filename,
-            "sections": len(final_state["completed_sections"]),
-            "sources": len(final_state.get("sources", [])),
-        }
+class _TokenEcho:
+    """Log streamed LLM output line by line, prefixed with ticker and section."""
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.buffers: Dict[str, str] = {}
+
+    def __call__(self, event: Dict) -> None:
+        section_id = event["section"]
+        text = self.buffers.pop(section_id, "") + event.get("delta", "")
+        *lines, rest = text.split("\n")
+        if event.get("done"):
+            lines.append(rest)
+            rest = ""
+        for line in lines:
+            if line.strip():
+                logger.info(f"[{self.ticker} {section_id}] {line}")
+        if rest:
+            self.buffers[section_id] = rest
+
+
+def _handle_chunk(
+    mode: str,
+    chunk,
+    on_progress: Callable[[str], None] | None,
+    report: StreamingReport | None,
+    on_tokens: Callable[[Dict], None] | None,
+) -> None:
+    """Forward one streamed chunk to the progress callback, token callback and streaming report."""
+    if mode == "updates":
+        for node, update in chunk.items():
+            if report:
+                report.apply(node, update)
+            if on_progress:
+                on_progress(node)
+    elif mode == "custom":
+        if report and "delta" in chunk:
+            report.append(chunk["section"], chunk["delta"])
+        if on_tokens:
+            on_tokens(chunk)
+    elif report:
+        report.refresh(chunk)
+
+
+def _run_graph(
+    app,
+    state: Dict | None,
+    on_progress: Callable[[str], None] | None = None,
+    run_config: Dict | None = None,
+    report: StreamingReport | None = None,
+    on_tokens: Callable[[Dict], None] | None = None,
+) -> Dict:
+    """Invoke the graph, reporting each completed node to ``on_progress`` when given.
+
+    ``state`` is None when resuming a checkpointed run. With ``report`` the
+    partial report file is refreshed as sections complete; ``on_tokens``
+    receives streamed LLM events (see sections._invoke_llm).
+    """
+    if on_progress is None and report is None and on_tokens is None:
+        return app.invoke(state, run_config)
+
+    final_state = state
+    for mode, chunk in app.stream(state, run_config, stream_mode=["updates", "values", "custom"]):
+        _handle_chunk(mode, chunk, on_progress, report, on_tokens)
+        if mode == "values":
+            final_state = chunk
+    return final_state
+
+
+async def _arun_graph(
+    app,
+    state: Dict | None,
+    run_config: Dict | None = None,
+    report: StreamingReport | None = None,
+    on_tokens: Callable[[Dict], None] | None = None,
+) -> Dict:
+    """Async variant of _run_graph."""
+    if report is None and on_tokens is None:
+        return await app.ainvoke(state, run_config)
+
+    final_state = state
+    async for mode, chunk in app.astream(state, run_config, stream_mode=["updates", "values", "custom"]):
+        _handle_chunk(mode, chunk, None, report, on_tokens)
+        if mode == "values":
+            final_state = chunk
+    return final_state
+
+
+def _log_llm_metrics(final_state: Dict) -> None:
+    """Summarize per-section generation latency, throughput and prompt-cache use."""
+    metrics = final_state.get("llm_metrics") or {}
+    if not metrics:
+        return
+    rates = [m["tokens_per_s"] for m in metrics.values() if m.get("tokens_per_s")]
+    ttfts = [m["ttft_s"] for m in metrics.values() if m.get("ttft_s") is not None]
+    slowest = max(metrics, key=lambda section_id: metrics[section_id]["generation_s"])
+    summary = f"LLM: {sum(m['output_tokens'] for m in metrics.values())} output tokens"
+    cached = sum(1 for m in metrics.values() if m.get("cached"))
+    if cached:
+        summary += f", {cached}/{len(metrics)} sections from cache"
+    if rates:
+        summary += f", mean {sum(rates) / len(rates):.1f} tokens/s"
+    if ttfts:
+        summary += f", mean TTFT {sum(ttfts) / len(ttfts):.2f}s"
+    input_tokens = sum(m.get("input_tokens", 0) for m in metrics.values())
+    if input_tokens:
+        cached_input = sum(m.get("cached_input_tokens", 0) for m in metrics.values())
+        summary += f", {cached_input}/{input_tokens} prompt tokens from provider cache ({cached_input / input_tokens:.0%})"
+        hit_ttfts = [m["ttft_s"] for m in metrics.values() if m.get("ttft_s") is not None and m.get("cached_input_tokens")]
+        miss_ttfts = [m["ttft_s"] for m in metrics.values() if m.get("ttft_s") is not None and not m.get("cached_input_tokens")]
+        if hit_ttfts and miss_ttfts:
+            summary += (
+                f" (mean TTFT {sum(hit_ttfts) / len(hit_ttfts):.2f}s with cached prefix, "
+                f"{sum(miss_ttfts) / len(miss_ttfts):.2f}s without)"
+            )
+    logger.info(f"{summary}; slowest section {slowest} ({metrics[slowest]['generation_s']}s)")
+
+
+def _prepare_run(company_name: str, ticker: str, resume: bool, run_id: str | None) -> tuple[str | None, bool]:
+    """Pick the run id to checkpoint under and whether an existing run is resumed."""
+    if not checkpoints.enabled():
+        if resume:
+            logger.warning("Checkpointing is disabled (CHECKPOINT_DB is empty); starting a fresh run")
+        return None, False
+
+    if resume:
+        run_id = run_id or checkpoints.latest_run(ticker)
+        if run_id:
+            logger.info(f"Resuming run {run_id} for {ticker}")
+        else:
+            logger.warning(f"No unfinished run found for {ticker}; starting a fresh run")
+            resume = False
+
+    run_id = run_id or checkpoints.new_run_id()
+    checkpoints.record_run(ticker, run_id, "running", company_name)
+    return run_id, resume
+
+
+def _finish_run(ticker: str, run_id: str | None, result: Dict) -> Dict:
+    """Record the run outcome and attach the run id to the summary."""
+    if run_id is None:
+        return result
+
+    if result["status"] == "Success":
+        checkpoints.record_run(ticker, run_id, "complete")
+    else:
+        checkpoints.record_run(ticker, run_id, "failed")
+        logger.info(f"Resume this run with: --ticker {ticker} --resume --run-id {run_id}")
+    return {**result, "run_id": run_id}
+
+
+def analyze_single_company(
+    company_name: str,
+    ticker: str,
+    output_dir: str = ".",
+    on_progress: Callable[[str], None] | None = None,
+    resume: bool = False,
+    run_id: str | None = None,
+    stream_report: bool = False,
+    stream_tokens: bool = False,
+    on_tokens: Callable[[Dict], None] | None = None,
+    llm_cache_bypass: bool = False,
+    fmp_prefetch: Dict | None = None,
+) -> Dict:
+    """Analyze a single company and save the report.
+
+    ``on_progress`` is called with each node name as it completes. With
+    ``resume`` the latest unfinished run for the ticker (or ``run_id``)
+    continues from its last checkpoint instead of starting over. With
+    ``stream_report`` the report file is written section by section while the
+    graph runs, so a failed run still leaves a partial report. With
+    ``stream_tokens`` (or LLM_STREAMING) completions are streamed to
+    ``on_tokens`` (default: the console) and into the streaming report.
+    ``llm_cache_bypass`` skips LLM cache lookups for this run.
+    ``fmp_prefetch`` (from prefetch_fmp_universe) replaces the run's own FMP
+    profile and financial data calls.
+    """
+    _log_start(company_name, ticker)
+    run_id, resume = _prepare_run(company_name, ticker, resume, run_id)
+    app = get_workflow(checkpoint=run_id is not None)
+    run_config = checkpoints.run_config(ticker, run_id) if run_id else None
+    report = StreamingReport(_report_path(output_dir, ticker), company_name, ticker) if stream_report else None
+    stream_tokens = stream_tokens or config.LLM_STREAMING
+    if stream_tokens and on_tokens is None:
+        on_tokens = _TokenEcho(ticker)
+
+    try:
+        inputs = None if resume else _initial_state(company_name, ticker, stream_tokens, llm_cache_bypass, fmp_prefetch)
+        final_state = _run_graph(app, inputs, on_progress, run_config, report, on_tokens)
+        result = _save_report(company_name, ticker, output_dir, final_state)
 
     except Exception as exc:  # pragma: no cover - runtime logging
         logger.exception(f"Error during execution: {exc}")
-        return {"company": company_name, "ticker": ticker, "status": "Failed", "error": str(exc)}
+        result = {"company": company_name, "ticker": ticker, "status": "Failed", "error": str(exc)}
+
+    return _finish_run(ticker, run_id, result)
+
+
+async def aanalyze_single_company(
+    company_name: str,
+    ticker: str,
+    output_dir: str = ".",
+    resume: bool = False,
+    run_id: str | None = None,
+    stream_report: bool = False,
+    stream_tokens: bool = False,
+    llm_cache_bypass: bool = False,
+    fmp_prefetch: Dict | None = None,
+) -> Dict:
+    """Async variant of analyze_single_company running the graph on the event loop."""
+    _log_start(company_name, ticker)
+    # Run bookkeeping uses blocking SQLite writes; keep them off the loop so they
+    # cannot wait on a lock held by an async checkpointer that needs the loop
+    run_id, resume = await asyncio.to_thread(_prepare_run, company_name, ticker, resume, run_id)
+    app = get_workflow(use_async=True)
+    report = StreamingReport(_report_path(output_dir, ticker), company_name, ticker) if stream_report else None
+    stream_tokens = stream_tokens or config.LLM_STREAMING
+    on_tokens = _TokenEcho(ticker) if stream_tokens else None
 
+    try:
+        inputs = None if resume else _initial_state(company_name, ticker, stream_tokens, llm_cache_bypass, fmp_prefetch)
+        if run_id:
+            async with checkpoints.async_saver() as saver:
+                app = app.copy(update={"checkpointer": saver})
+                final_state = await _arun_graph(app, inputs, checkpoints.run_config(ticker, run_id), report, on_tokens)
+        else:
+            final_state = await _arun_graph(app, inputs, report=report, on_tokens=on_tokens)
+        result = _save_report(company_name, ticker, output_dir, final_state)
+
+    except Exception as exc:  # pragma: no cover - runtime logging
+        logger.exception(f"Error during execution: {exc}")
+        result = {"company": company_name, "ticker": ticker, "status": "Failed", "error": str(exc)}
 
-def analyze_batch(companies_file: str, output_dir: str = "."):
-    """Analyze multiple companies from a JSON file."""
+    return await asyncio.to_thread(_finish_run, ticker, run_id, result)
+
+
+def _document_refs(state: Dict, items: List) -> List[str]:
+    """Document ids for stored research, moving raw result dicts into the corpus."""
+    refs: List[str] = []
+    for item in items:
+        refs.extend(add_documents(state, [item]) if isinstance(item, dict) else [item])
+    return list(dict.fromkeys(refs))
+
+
+def _regeneration_state(stored: Dict, section_ids: List[str]) -> Dict:
+    """Stored run state with the regenerated sections cleared and their searches refreshed.
+
+    Runs stored before the research corpus hold raw result dicts in
+    ``web_research`` and ``research_results``; those are moved into the
+    corpus so they merge like document ids.
+    """
+    state = {key: value for key, value in stored.items() if key in ShallowDiveState.__annotations__}
+    state["web_research"] = _document_refs(state, state.get("web_research", []))
+    state["research_results"] = {
+        query: _document_refs(state, results) for query, results in state.get("research_results", {}).items()
+    }
+    state["completed_sections"] = [s for s in state.get("completed_sections", []) if s not in section_ids]
+    # Drop their prefetched results so the sections search again instead of reusing stale news
+    stale = set(section_queries(state, section_ids))
+    invalidate_search_cache(list(stale))
+    state["research_results"] = {q: r for q, r in state.get("research_results", {}).items() if q not in stale}
+    state["errors"] = []
+    state["final_report"] = ""
+    return state
+
+
+def regenerate_sections(
+    ticker: str,
+    sections: List[str],
+    output_dir: str = ".",
+    run_id: str | None = None,
+) -> Dict:
+    """Re-run selected sections of a stored run and recompile its report.
+
+    Every section that depends on one of ``sections`` is regenerated too;
+    everything else (overview, financials, research and untouched sections)
+    is loaded from the latest completed run for the ticker (or ``run_id``).
+    The refreshed state is checkpointed as a new completed run, so later
+    regenerations build on it.
+    """
+    unknown = [section for section in sections if section not in SECTION_RESEARCH]
+    if unknown:
+        raise ValueError(f"Unknown section(s): {', '.join(unknown)}")
+    if not checkpoints.enabled():
+        raise RuntimeError("Regenerating sections needs checkpointing (CHECKPOINT_DB is empty)")
+
+    source_run = run_id or checkpoints.latest_run(ticker, complete=True)
+    stored = checkpoints.load_state(ticker, source_run) if source_run else None
+    if not stored:
+        raise LookupError(f"No stored run found for {ticker}; run a full analysis first")
+
+    nodes = downstream_nodes(f"section_{section.replace('.', '_')}" for section in sections)
+    section_ids = [node.removeprefix("section_").replace("_", ".") for node in nodes]
+    company_name = stored["company_name"]
+    logger.info(f"Regenerating sections {', '.join(section_ids)} for {ticker} from run {source_run}")
+
+    new_run_id, _ = _prepare_run(company_name, ticker, False, None)
+    app = build_workflow(checkpointer=checkpoints.get_saver(), sections=nodes)
+    try:
+        final_state = app.invoke(_regeneration_state(stored, section_ids), checkpoints.run_config(ticker, new_run_id))
+        result = _save_report(company_name, ticker, output_dir, final_state)
+
+    except Exception as exc:  # pragma: no cover - runtime logging
+        logger.exception(f"Error during regeneration: {exc}")
+        result = {"company": company_name, "ticker": ticker, "status": "Failed", "error": str(exc)}
+
+    return _finish_run(ticker, new_run_id, {**result, "regenerated": section_ids})
+
+
+def _analyze_company(
+    company: Dict,
+    output_dir: str,
+    resume: bool = False,
+    stream_report: bool = False,
+    fmp_prefetch: Dict | None = None,
+    stream_tokens: bool = False,
+    llm_cache_bypass: bool = False,
+) -> Dict:
+    """Batch worker: analyze one company entry (module-level so process pools can pickle it)."""
+    return analyze_single_company(
+        company["name"],
+        company["ticker"],
+        output_dir,
+        resume=resume,
+        stream_report=stream_report,
+        stream_tokens=stream_tokens,
+        llm_cache_bypass=llm_cache_bypass,
+        fmp_prefetch=fmp_prefetch,
+    )
+
+
+async def _closing_http_clients(awaitable: Awaitable) -> Any:
+    """Await a top-level coroutine, then close the event loop's pooled HTTP client."""
+    try:
+        return await awaitable
+    finally:
+        await aclose_http_clients()
+
+
+def _failed_result(company: Dict, exc: BaseException) -> Dict:
+    """Summary row for a company whose worker raised instead of returning a result."""
+    logger.error(f"Batch worker failed for {company.get('ticker', company)}: {exc}")
+    return {"company": company.get("name"), "ticker": company.get("ticker"), "status": "Failed", "error": str(exc)}
+
+
+async def _aanalyze_companies(
+    companies: List[Dict],
+    output_dir: str,
+    concurrency: int,
+    resume: bool = False,
+    stream_report: bool = False,
+    prefetch: Dict[str, Dict] | None = None,
+    stream_tokens: bool = False,
+    llm_cache_bypass: bool = False,
+) -> List[Dict]:
+    """Run companies on one event loop, at most ``concurrency`` at a time, in input order."""
+    prefetch = prefetch or {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(company: Dict) -> Dict:
+        async with semaphore:
+            return await aanalyze_single_company(
+                company["name"],
+                company["ticker"],
+                output_dir,
+                resume=resume,
+                stream_report=stream_report,
+                stream_tokens=stream_tokens,
+                llm_cache_bypass=llm_cache_bypass,
+                fmp_prefetch=prefetch.get(company["ticker"]),
+            )
+
+    outcomes = await asyncio.gather(*(bounded(company) for company in companies), return_exceptions=True)
+    return [
+        _failed_result(company, outcome) if isinstance(outcome, BaseException) else outcome
+        for company, outcome in zip(companies, outcomes)
+    ]
+
+
+def analyze_batch(
+    companies_file: str,
+    output_dir: str = ".",
+    use_async: bool = False,
+    concurrency: int = 1,
+    executor: str = "thread",
+    resume: bool = False,
+    stream_report: bool = False,
+    stream_tokens: bool = False,
+    llm_cache_bypass: bool = False,
+):
+    """Analyze multiple companies from a JSON file.
+
+    With ``concurrency`` > 1 companies run in a thread or process pool (or as
+    concurrent tasks when ``use_async``); results keep the input order and a
+    failing company only fails its own row. With ``resume`` each company picks
+    up its latest unfinished run; ``stream_report``, ``stream_tokens`` and
+    ``llm_cache_bypass`` apply to every company as in analyze_single_company.
+    Unless FMP_BATCH_PREFETCH is off, FMP profiles and financial data for the
+    whole file are prefetched up front in multi-symbol requests and handed to
+    each company's run.
+    """
     with open(companies_file, "r") as file:
         companies = json.load(file)
 
-    results = []
-    for company in companies:
-        result = analyze_single_company(company["name"], company["ticker"], output_dir)
-        results.append(result)
+    prefetch = {}
+    if config.FMP_API_KEY and config.FMP_BATCH_PREFETCH and not resume:
+        prefetch = prefetch_fmp_universe([company["ticker"] for company in companies])
+
+    if use_async:
+        return pd.DataFrame(
+            asyncio.run(
+                _closing_http_clients(
+                    _aanalyze_companies(
+                        companies,
+                        output_dir,
+                        max(concurrency, 1),
+                        resume,
+                        stream_report,
+                        prefetch,
+                        stream_tokens,
+                        llm_cache_bypass,
+                    )
+                )
+            )
+        )
+
+    if concurrency <= 1:
+        results = []
+        for company in companies:
+            try:
+                results.append(
+                    _analyze_company(
+                        company,
+                        output_dir,
+                        resume,
+                        stream_report,
+                        prefetch.get(company["ticker"]),
+                        stream_tokens,
+                        llm_cache_bypass,
+                    )
+                )
+            except Exception as exc:  # pragma: no cover - runtime logging
+                results.append(_failed_result(company, exc))
+        return pd.DataFrame(results)
+
+    pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    logger.info(f"Running {len(companies)} companies on {concurrency} {executor} workers")
+    with pool_class(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(
+                _analyze_company,
+                company,
+                output_dir,
+                resume,
+                stream_report,
+                prefetch.get(company["ticker"]),
+                stream_tokens,
+                llm_cache_bypass,
+            )
+            for company in companies
+        ]
+        results = []
+        for company, future in zip(companies, futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:  # pragma: no cover - runtime logging
+                results.append(_failed_result(company, exc))
 
     return pd.DataFrame(results)
 
 
 def main():
     """Main entry point for the script."""
-    missing_keys = config.validate_api_keys()
-    if missing_keys:
-        logger.error(f"Missing required environment variables: {', '.join(missing_keys)}")
-        return
-
     import argparse
 
     parser = argparse.ArgumentParser(
@@ -130,25 +627,122 @@ Examples:
   Batch analysis:
     python shallow_dive_workflow_phase1_complete.py --batch companies.json
   
+  Batch analysis, four companies at a time:
+    python shallow_dive_workflow_phase1_complete.py --batch companies.json --concurrency 4
+  
+  Refresh cached FMP fundamentals for a universe (unchanged statements are not re-downloaded):
+    python shallow_dive_workflow_phase1_complete.py --warm-fmp-cache companies.json
+  
   Custom output directory:
     python shallow_dive_workflow_phase1_complete.py --company "Infosys" --ticker "INFY" --output-dir ./reports
+  
+  Regenerate sections 5.1 and 6.3 (and everything downstream) of the last run:
+    python shallow_dive_workflow_phase1_complete.py --ticker "INFY" --sections 5.1,6.3
+  
+  Resident service (warm graph and clients) and a client submitting to it:
+    python shallow_dive_workflow_phase1_complete.py serve --port 8765
+    python shallow_dive_workflow_phase1_complete.py submit --company "Infosys" --ticker "INFY"
         """,
     )
 
     parser.add_argument("--company", type=str, help="Company name")
     parser.add_argument("--ticker", type=str, help="Stock ticker symbol")
     parser.add_argument("--batch", type=str, help="Path to JSON file with companies list")
+    parser.add_argument(
+        "--warm-fmp-cache",
+        type=str,
+        metavar="FILE",
+        help="Prefetch FMP profiles and fundamentals for the companies in a batch JSON file, then exit",
+    )
     parser.add_argument("--output-dir", type=str, default=".", help="Output directory for reports (default: current directory)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Run the workflow on asyncio (ainvoke) instead of threads")
+    parser.add_argument("--resume", action="store_true", help="Continue the latest unfinished run for each ticker from its last checkpoint")
+    parser.add_argument(
+        "--run-id",
+        type=str,
+        help="Run id to resume, or to regenerate from with --sections (default: latest unfinished / completed run)",
+    )
+    parser.add_argument(
+        "--sections",
+        type=str,
+        help="Comma-separated sections to regenerate from the ticker's last completed run (e.g. 5.1,6.3)",
+    )
+    parser.add_argument(
+        "--stream-report",
+        action="store_true",
+        help="Write the report section by section while the run progresses (partial report survives failures)",
+    )
+    parser.add_argument(
+        "--stream-tokens",
+        action="store_true",
+        help="Stream LLM output to the console (and --stream-report file) as it is generated; also LLM_STREAMING=true",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Bypass LLM cache lookups for this run (fresh completions are still cached); also LLM_CACHE_BYPASS=true",
+    )
+    parser.add_argument("--concurrency", type=int, default=1, help="Companies analyzed at the same time in batch mode (default: 1)")
+    parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="Worker pool used when --concurrency > 1 without --async (default: thread)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser("serve", help="Run a resident analysis service on localhost")
+    serve_parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    submit_parser = subparsers.add_parser("submit", help="Submit an analysis job to a running service")
+    submit_parser.add_argument("--company", type=str, required=True, help="Company name")
+    submit_parser.add_argument("--ticker", type=str, required=True, help="Stock ticker symbol")
+    submit_parser.add_argument("--output-dir", type=str, default=".", help="Output directory on the server (default: server cwd)")
+    submit_parser.add_argument("--server", type=str, default="http://127.0.0.1:8765", help="Service URL")
+    submit_parser.add_argument("--stream-tokens", action="store_true", help="Stream LLM output and report per-section TTFT")
 
     args = parser.parse_args()
 
-    if args.batch:
+    if args.command == "submit":
+        from .client import submit_job
+
+        submit_job(args.server, args.company, args.ticker, args.output_dir, args.stream_tokens)
+        return
+
+    missing_keys = config.validate_api_keys()
+    if missing_keys:
+        logger.error(f"Missing required environment variables: {', '.join(missing_keys)}")
+        return
+
+    if args.command == "serve":
+        from .server import serve
+
+        serve(args.host, args.port)
+
+    elif args.warm_fmp_cache:
+        if not os.path.exists(args.warm_fmp_cache):
+            logger.error(f"Batch file not found: {args.warm_fmp_cache}")
+            return
+        with open(args.warm_fmp_cache, "r") as file:
+            warm_fmp_cache([company["ticker"] for company in json.load(file)])
+
+    elif args.batch:
         if not os.path.exists(args.batch):
             logger.error(f"Batch file not found: {args.batch}")
             return
 
         logger.info(f"Running batch analysis from: {args.batch}")
-        results_df = analyze_batch(args.batch, args.output_dir)
+        results_df = analyze_batch(
+            args.batch,
+            args.output_dir,
+            args.use_async,
+            args.concurrency,
+            args.executor,
+            args.resume,
+            args.stream_report,
+            args.stream_tokens,
+            args.no_llm_cache,
+        )
 
         summary_file = os.path.join(args.output_dir, f"batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
         results_df.to_csv(summary_file, index=False, encoding="utf-8")
@@ -160,8 +754,46 @@ Examples:
         logger.info("\nSummary:")
         logger.info(results_df.to_string(index=False))
 
-    elif args.company and args.ticker:
-        analyze_single_company(args.company, args.ticker, args.output_dir)
+    elif args.sections and args.ticker:
+        sections = [section.strip() for section in args.sections.split(",") if section.strip()]
+        try:
+            regenerate_sections(args.ticker, sections, args.output_dir, args.run_id)
+        except (ValueError, LookupError, RuntimeError) as exc:
+            logger.error(str(exc))
+
+    elif args.ticker and (args.company or args.resume):
+        if not args.company:
+            # --resume needs no --company: take the name recorded for the run
+            args.company = checkpoints.run_company(args.ticker, args.run_id) if checkpoints.enabled() else None
+            if not args.company:
+                logger.error(f"No recorded run for {args.ticker} to resume; pass --company as well")
+                return
+        if args.use_async:
+            asyncio.run(
+                _closing_http_clients(
+                    aanalyze_single_company(
+                        args.company,
+                        args.ticker,
+                        args.output_dir,
+                        args.resume,
+                        args.run_id,
+                        args.stream_report,
+                        args.stream_tokens,
+                        args.no_llm_cache,
+                    )
+                )
+            )
+        else:
+            analyze_single_company(
+                args.company,
+                args.ticker,
+                args.output_dir,
+                resume=args.resume,
+                run_id=args.run_id,
+                stream_report=args.stream_report,
+                stream_tokens=args.stream_tokens,
+                llm_cache_bypass=args.no_llm_cache,
+            )
     else:
         parser.print_help()
         logger.error("Either --company and --ticker, or --batch must be provided")
@@ -1,21 +1,109 @@
 """Workflow node functions for each analysis section."""
 
-import json
+import asyncio
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Callable
 
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.config import get_stream_writer
 
-from . import config
+from . import config, fundamentals_store
+from .cache import DiskCache, make_key
 from .citations import add_source, generate_references_section
-from .data_sources import web_search, get_financial_data, get_company_profile
+from .capital_returns import dupont_table, roic_table
+from .context_budget import budget, condense, fit_blocks, fit_json
+from .corpus import add_documents, documents
+from .rate_limit import estimate_tokens, get_limiter
+from .resilience import PartialResponseError, get_policy
+from .data_sources import ALPHA_VANTAGE, aget_company_profile, aweb_search, get_company_profile, web_search
+from .fundamentals import aget_fundamentals, get_fundamentals
+from .queries import coalesce_queries
 from .state import ShallowDiveState
 
 logger = config.logger
 
+INITIAL_QUERIES = [
+    "{company_name} business model revenue breakdown",
+    "{company_name} financial performance margins profitability",
+    "{company_name} ownership structure shareholders management",
+]
 
-def initialize_research(state: ShallowDiveState) -> ShallowDiveState:
-    """Initialize the research by gathering basic company data."""
+FINANCIAL_QUERIES = [
+    "{company_name} DuPont analysis return on equity ROE breakdown",
+    "{company_name} capital allocation working capital efficiency",
+    "{company_name} margin trends profitability drivers",
+]
+
+# Token budgets of the API data in the prefix every section prompt shares
+SHARED_OVERVIEW_TOKENS = 300
+SHARED_FINANCIALS_TOKENS = 1000
+
+
+def _format_queries(state: ShallowDiveState, templates: list[str]) -> list[str]:
+    """Fill query templates with the company name and ticker."""
+    return [template.format(company_name=state["company_name"], ticker=state["ticker"]) for template in templates]
+
+
+def _register_results(state: ShallowDiveState, results: list[dict]) -> tuple[ShallowDiveState, list[str]]:
+    """Store search results in the research corpus and cite each document; return their ids."""
+    refs = add_documents(state, results)
+    for doc in documents(state, refs):
+        if doc["url"]:
+            state, _ = add_source(state, doc["url"], doc["title"], doc["content"])
+    return state, refs
+
+
+def _search_all(queries: list[str], num_results: list[int] | None = None) -> list[list[dict]]:
+    """Run searches concurrently on a bounded thread pool, preserving query order."""
+    if not queries:
+        return []
+    with ThreadPoolExecutor(max_workers=config.SEARCH_CONCURRENCY) as pool:
+        return list(pool.map(web_search, queries, num_results or [5] * len(queries)))
+
+
+async def _asearch_all(queries: list[str], num_results: list[int] | None = None) -> list[list[dict]]:
+    """Async variant of _search_all, bounded by a semaphore."""
+    semaphore = asyncio.Semaphore(config.SEARCH_CONCURRENCY)
+
+    async def bounded_search(query: str, count: int) -> list[dict]:
+        async with semaphore:
+            return await aweb_search(query, count)
+
+    counts = num_results or [5] * len(queries)
+    return list(await asyncio.gather(*(bounded_search(query, count) for query, count in zip(queries, counts))))
+
+
+def _collect_research(
+    state: ShallowDiveState, queries: list[str], fetched: dict[str, list[dict]]
+) -> tuple[ShallowDiveState, list[str]]:
+    """Document ids for queries, preferring the planner's prefetched results.
+
+    Queries the planner did not cover are taken from ``fetched`` and added to
+    the corpus and sources here.
+    """
+    prefetched = state.get("research_results", {})
+    refs = []
+    for query in queries:
+        if query in prefetched:
+            refs.extend(prefetched[query])
+        else:
+            state, fetched_refs = _register_results(state, fetched[query])
+            refs.extend(fetched_refs)
+            logger.info(f"[OK] Search: {query}")
+    return state, list(dict.fromkeys(refs))
+
+
+def _missing_queries(state: ShallowDiveState, queries: list[str]) -> list[str]:
+    """Queries without prefetched results in state."""
+    prefetched = state.get("research_results", {})
+    return [query for query in queries if query not in prefetched]
+
+
+def _start_research(state: ShallowDiveState, profile: dict | None) -> ShallowDiveState:
+    """Reset sources and record the FMP profile (None when FMP is not configured)."""
     logger.info(f"\n{'=' * 60}")
     logger.info(f"INITIALIZING RESEARCH: {state['company_name']}")
     logger.info(f"{'=' * 60}\n")
@@ -23,8 +111,7 @@ def initialize_research(state: ShallowDiveState) -> ShallowDiveState:
     state["sources"] = []
     state["source_map"] = {}
 
-    if config.FMP_API_KEY:
-        profile = get_company_profile(state["ticker"], config.FMP_API_KEY)
+    if profile is not None:
         state["company_overview"] = profile
         logger.info("[OK] Retrieved company profile from API")
 
@@ -35,94 +122,692 @@ def initialize_research(state: ShallowDiveState) -> ShallowDiveState:
                 f"Financial Modeling Prep - {state['company_name']} Company Profile",
                 "Company financial data and profile",
             )
+    return state
 
-    search_queries = [
-        f"{state['company_name']} business model revenue breakdown",
-        f"{state['company_name']} financial performance margins profitability",
-        f"{state['company_name']} ownership structure shareholders management",
-    ]
 
-    all_results = []
-    for query in search_queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-        all_results.extend(results)
+def _finish_research(state: ShallowDiveState, queries: list[str], result_sets: list[list[dict]]) -> dict:
+    """Register initial search results and build the initialize node update."""
+    all_refs = []
+    for query, results in zip(queries, result_sets):
+        state, refs = _register_results(state, results)
+        all_refs.extend(refs)
         logger.info(f"[OK] Completed search: {query}")
 
-    state["web_research"] = all_results
-    state["current_section"] = "1.1"
-    state["completed_sections"] = []
-    state["errors"] = []
-
     logger.info(f"\n[OK] Collected {len(state['sources'])} sources")
-    return state
+    return {
+        "company_overview": state.get("company_overview", {}),
+        "research_corpus": state["research_corpus"],
+        "web_research": all_refs,
+        "sources": state["sources"],
+        "source_map": state["source_map"],
+        "current_section": "1.1",
+    }
 
 
-def gather_financial_data(state: ShallowDiveState) -> ShallowDiveState:
-    """Gather comprehensive financial metrics."""
+def _prefetched_fmp(state: ShallowDiveState, name: str) -> dict | None:
+    """FMP data a batch run prefetched for this company (None when it must be fetched)."""
+    return state.get("fmp_prefetch", {}).get(name)
+
+
+def initialize_research(state: ShallowDiveState) -> dict:
+    """Initialize the research by gathering basic company data."""
+    profile = _prefetched_fmp(state, "profile")
+    if profile is None and config.FMP_API_KEY:
+        profile = get_company_profile(state["ticker"], config.FMP_API_KEY)
+    state = _start_research(state, profile)
+
+    queries = _format_queries(state, INITIAL_QUERIES)
+    return _finish_research(state, queries, _search_all(queries))
+
+
+async def ainitialize_research(state: ShallowDiveState) -> dict:
+    """Async variant of initialize_research; searches run concurrently."""
+    profile = _prefetched_fmp(state, "profile")
+    if profile is None and config.FMP_API_KEY:
+        profile = await aget_company_profile(state["ticker"], config.FMP_API_KEY)
+    state = _start_research(state, profile)
+
+    queries = _format_queries(state, INITIAL_QUERIES)
+    return _finish_research(state, queries, await _asearch_all(queries))
+
+
+def _planned_queries(state: ShallowDiveState) -> list[tuple[str, list[str]]]:
+    """Every financial and section query for the company, coalesced into searches.
+
+    Returns ``(search query, member queries)`` pairs in registry order;
+    near-duplicate queries share one search (see queries.coalesce_queries).
+    """
+    queries = _format_queries(state, FINANCIAL_QUERIES)
+    for _, templates in SECTION_RESEARCH.values():
+        queries.extend(_format_queries(state, templates))
+    return coalesce_queries(queries, (state["company_name"], state["ticker"]), config.QUERY_MERGE_THRESHOLD)
+
+
+def _plan_counts(plan: list[tuple[str, list[str]]]) -> list[int]:
+    """Results requested per search: five per member query, capped at Tavily's practical maximum."""
+    return [min(5 * len(members), 10) for _, members in plan]
+
+
+def section_queries(state: ShallowDiveState, section_ids: list[str]) -> list[str]:
+    """Search queries the given sections research, deduplicated."""
+    queries = []
+    for section_id in section_ids:
+        queries.extend(_format_queries(state, SECTION_RESEARCH[section_id][1]))
+    return list(dict.fromkeys(queries))
+
+
+def _finish_plan(state: ShallowDiveState, plan: list[tuple[str, list[str]]], result_sets: list[list[dict]]) -> dict:
+    """Register prefetched results in registry order and build the planner update.
+
+    Every member query of a coalesced search maps to the shared result set.
+    """
+    research_results = {}
+    for (_, members), results in zip(plan, result_sets):
+        state, refs = _register_results(state, results)
+        for query in members:
+            research_results[query] = refs
+
+    logger.info(
+        f"[OK] Prefetched {len(research_results)} queries with {len(plan)} searches ({len(state['sources'])} sources)"
+    )
+    return {
+        "research_corpus": state.get("research_corpus", {}),
+        "research_results": research_results,
+        "sources": state["sources"],
+        "source_map": state["source_map"],
+    }
+
+
+def plan_research(state: ShallowDiveState) -> dict:
+    """Prefetch every registered search query concurrently, ahead of the LLM stages."""
+    logger.info(f"\n{'=' * 60}")
+    logger.info("PLANNING RESEARCH")
+    logger.info(f"{'=' * 60}\n")
+
+    plan = _planned_queries(state)
+    return _finish_plan(state, plan, _search_all([search for search, _ in plan], _plan_counts(plan)))
+
+
+async def aplan_research(state: ShallowDiveState) -> dict:
+    """Async variant of plan_research."""
+    logger.info(f"\n{'=' * 60}")
+    logger.info("PLANNING RESEARCH")
+    logger.info(f"{'=' * 60}\n")
+
+    plan = _planned_queries(state)
+    return _finish_plan(state, plan, await _asearch_all([search for search, _ in plan], _plan_counts(plan)))
+
+
+def _start_financials(state: ShallowDiveState, financial_data: dict | None) -> ShallowDiveState:
+    """Record financial metrics (None when no fundamentals provider is configured)."""
     logger.info(f"\n{'=' * 60}")
     logger.info("GATHERING FINANCIAL DATA")
     logger.info(f"{'=' * 60}\n")
 
-    if config.FMP_API_KEY:
-        financial_data = get_financial_data(state["ticker"], config.FMP_API_KEY)
+    if financial_data is not None:
         state["financial_metrics"] = financial_data
         logger.info("[OK] Retrieved financial metrics from API")
 
-        if financial_data.get("metrics"):
+        if financial_data.get("metrics") and financial_data.get("provider") == ALPHA_VANTAGE:
+            state, _ = add_source(
+                state,
+                f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={state['ticker']}",
+                f"Alpha Vantage - {state['company_name']} Fundamentals",
+                "Company overview, income statement and balance sheet",
+            )
+        elif financial_data.get("metrics"):
             state, _ = add_source(
                 state,
                 f"https://financialmodelingprep.com/api/v3/key-metrics/{state['ticker']}",
                 f"Financial Modeling Prep - {state['company_name']} Key Metrics",
                 "Company key financial metrics and ratios",
             )
+    return state
 
-    queries = [
-        f"{state['company_name']} DuPont analysis return on equity ROE breakdown",
-        f"{state['company_name']} capital allocation working capital efficiency",
-        f"{state['company_name']} margin trends profitability drivers",
-    ]
 
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-        state["web_research"].extend(results)
-        logger.info(f"[OK] Completed search: {query}")
+def _finish_financials(state: ShallowDiveState, queries: list[str], fetched: dict[str, list[dict]]) -> dict:
+    """Collect financial search results and build the gather node update."""
+    state, financial_refs = _collect_research(state, queries, fetched)
 
     logger.info(f"\n[OK] Total sources: {len(state['sources'])}")
-    return state
+    return {
+        "financial_metrics": state.get("financial_metrics", {}),
+        "research_corpus": state.get("research_corpus", {}),
+        "web_research": financial_refs,
+        "sources": state["sources"],
+        "source_map": state["source_map"],
+    }
+
+
+def gather_financial_data(state: ShallowDiveState) -> dict:
+    """Gather comprehensive financial metrics."""
+    financial_data = get_fundamentals(state["ticker"], _prefetched_fmp(state, "financial_data"))
+    fundamentals_store.ingest(state["ticker"], financial_data)
+    state = _start_financials(state, financial_data)
+
+    queries = _format_queries(state, FINANCIAL_QUERIES)
+    missing = _missing_queries(state, queries)
+    return _finish_financials(state, queries, dict(zip(missing, _search_all(missing))))
+
+
+async def agather_financial_data(state: ShallowDiveState) -> dict:
+    """Async variant of gather_financial_data; fundamentals and any searches run concurrently."""
+    queries = _format_queries(state, FINANCIAL_QUERIES)
+    missing = _missing_queries(state, queries)
+    financial_data, result_sets = await asyncio.gather(
+        aget_fundamentals(state["ticker"], _prefetched_fmp(state, "financial_data")),
+        _asearch_all(missing),
+    )
+    # The Parquet merge reads and rewrites files; keep it off the event loop
+    await asyncio.to_thread(fundamentals_store.ingest, state["ticker"], financial_data)
+    state = _start_financials(state, financial_data)
+    return _finish_financials(state, queries, dict(zip(missing, result_sets)))
 
 
 def _research_context(state: ShallowDiveState, results_subset: list[dict], limit: int = 10) -> list[str]:
-    """Build formatted research strings with citations for prompts."""
+    """Build formatted research strings with citations for prompts.
+
+    At most ``limit`` snippets, within a budget of RESEARCH_SNIPPET_TOKENS per snippet slot.
+    """
     research_with_citations = []
     for result in results_subset[:limit]:
         if result.get("url") and result["url"] in state.get("source_map", {}):
             citation_num = state["source_map"][result["url"]]
             research_with_citations.append(f"{result.get('title', '')} [{citation_num}]:\n{result.get('content', '')}")
-    return research_with_citations
+    return fit_blocks(research_with_citations, budget(limit * config.RESEARCH_SNIPPET_TOKENS))
 
 
-def analyze_section_1_1(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 1.1: Company Snapshot."""
+def _prior_section(state: ShallowDiveState, section_id: str, tokens: int) -> str:
+    """An earlier section condensed to its token budget in this prompt."""
+    return condense(state.get(f"section_{section_id.replace('.', '_')}", ""), budget(tokens))
+
+
+def _json_context(data: dict, tokens: int) -> str:
+    """API data as compact JSON within its token budget in this prompt."""
+    return fit_json(data, budget(tokens))
+
+
+def sorted_sections(section_ids: list[str]) -> list[str]:
+    """Order section ids numerically; parallel branches complete out of order."""
+    return sorted(section_ids, key=lambda x: tuple(int(part) for part in x.split(".")))
+
+
+def _section_update(state: ShallowDiveState, section_id: str, content: str, **extra) -> dict:
+    """Build the partial state update returned by a section node.
+
+    Section nodes run in parallel branches, so they return only the keys they
+    own; list fields are combined by the reducers declared on ShallowDiveState.
+    """
+    update = {
+        f"section_{section_id.replace('.', '_')}": content,
+        "completed_sections": [section_id],
+        "sources": state["sources"],
+        "source_map": state["source_map"],
+    }
+    update.update(extra)
+    return update
+
+
+PromptBuilder = Callable[[ShallowDiveState, list[dict]], str]
+
+
+def _start_section(section_id: str) -> None:
+    """Log the section banner."""
+    title, _ = SECTION_RESEARCH[section_id]
     logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 1.1: COMPANY SNAPSHOT")
+    logger.info(f"ANALYZING SECTION {section_id}: {title}")
     logger.info(f"{'=' * 60}\n")
 
-    research_with_citations = _research_context(state, state.get("web_research", []), limit=10)
-    context = f"""
-    Company: {state['company_name']}
-    Ticker: {state['ticker']}
 
-    Company Overview (from API):
-    {json.dumps(state.get('company_overview', {}), indent=2)}
+def _shared_prefix(state: ShallowDiveState) -> str:
+    """System prompt plus the company's API data, byte-identical for every section of a run.
+
+    Providers cache prompt prefixes automatically (OpenAI, and OpenRouter for
+    models that support it), but OpenAI only from 1,024 tokens on. So the
+    company overview and financial data go here, in a fixed format within
+    fixed budgets, rather than into individual section prompts: with
+    fundamentals available the prefix clears that threshold, and every
+    section-specific block comes after it. All sections run after the gather
+    nodes, so the data no longer changes within a run.
+    """
+    return f"""{config.ANALYST_SYSTEM_PROMPT}
+Company: {state['company_name']}
+Ticker: {state['ticker']}
+
+Company Overview (from API):
+{_json_context(state.get('company_overview', {}), SHARED_OVERVIEW_TOKENS)}
+
+Financial Data (from API):
+{_json_context(state.get('financial_metrics', {}), SHARED_FINANCIALS_TOKENS)}
+"""
+
+
+def _compact_prompt(prompt: str) -> str:
+    """Drop the template indentation and blank-line runs, which are billed as input tokens on every call."""
+    lines = [line.strip() for line in prompt.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def _section_messages(state: ShallowDiveState, research: list[dict], build_prompt: PromptBuilder) -> list:
+    """Build the chat messages for a section LLM call: the shared prefix, then the section prompt."""
+    return [
+        SystemMessage(content=_shared_prefix(state)),
+        HumanMessage(content=_compact_prompt(build_prompt(state, research))),
+    ]
+
+
+def _usage_tokens(response) -> int:
+    """Total tokens reported by the provider, or 0 when usage metadata is missing."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("total_tokens", 0)
+
+
+llm_cache = DiskCache("llm", config.LLM_CACHE_MAX_ENTRIES)
+
+
+def _llm_cache_key(messages: list) -> str | None:
+    """Exact-match key (model, temperature, messages), or None when the LLM cache is off."""
+    if not config.LLM_CACHE or not llm_cache.enabled:
+        return None
+    model = getattr(config.llm, "model_name", None)
+    temperature = getattr(config.llm, "temperature", None)
+    return make_key(model, temperature, [(message.type, message.content) for message in messages])
+
+
+def _cached_completion(cached: dict, section_id: str, stream: bool) -> tuple:
+    """Response and metrics for a cached completion, replayed as one stream event when streaming."""
+    response = AIMessage(content=cached["content"], usage_metadata=cached.get("usage"))
+    metrics = {
+        "ttft_s": None,
+        "generation_s": 0.0,
+        "output_tokens": (cached.get("usage") or {}).get("output_tokens") or estimate_tokens(cached["content"]),
+        "tokens_per_s": None,
+        "input_tokens": 0,
+        "cached_input_tokens": 0,
+        "cached": True,
+    }
+    if stream:
+        write = _stream_writer()
+        write({"section": section_id, "delta": cached["content"]})
+        write({"section": section_id, "done": True, "metrics": metrics})
+    return response, metrics
 
-    Financial Data (from API):
-    {json.dumps(state.get('financial_metrics', {}), indent=2)}
+
+def _completion_entry(response) -> dict:
+    return {"content": response.content, "usage": getattr(response, "usage_metadata", None)}
+
+
+def _store_completion(key: str | None, response) -> None:
+    if key and response.content:
+        llm_cache.set(key, _completion_entry(response), config.LLM_CACHE_TTL_HOURS * 3600)
+
+
+async def _astore_completion(key: str | None, response) -> None:
+    """Async variant of _store_completion."""
+    if key and response.content:
+        await llm_cache.aset(key, _completion_entry(response), config.LLM_CACHE_TTL_HOURS * 3600)
+
+
+def _stream_writer() -> Callable[[dict], None]:
+    """Writer for custom graph stream events, or a no-op outside a running graph."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda _event: None
+
+
+def _llm_metrics(started: float, first_token: float | None, response) -> dict:
+    """Latency, throughput and prompt-cache use of one completion.
+
+    Time-to-first-token is only known for streamed completions; tokens per
+    second is measured from the first token when it is. Cached input tokens
+    are the prompt tokens the provider served from its prefix cache.
+    """
+    finished = time.perf_counter()
+    usage = getattr(response, "usage_metadata", None) or {}
+    tokens = usage.get("output_tokens") or estimate_tokens(response.content)
+    generating = finished - (first_token or started)
+    return {
+        "ttft_s": round(first_token - started, 3) if first_token else None,
+        "generation_s": round(finished - started, 3),
+        "output_tokens": tokens,
+        "tokens_per_s": round(tokens / generating, 1) if generating > 0 else None,
+        "input_tokens": usage.get("input_tokens", 0),
+        "cached_input_tokens": (usage.get("input_token_details") or {}).get("cache_read", 0),
+        "cached": False,
+    }
+
+
+def _invoke_llm(messages: list, section_id: str, stream: bool = False, use_cache: bool = True) -> tuple:
+    """Call the shared LLM within the process-wide LLM request/token budget.
+
+    With ``stream`` the completion is streamed: every chunk is emitted as a
+    custom graph stream event ``{"section", "delta"}``, followed by
+    ``{"section", "done", "metrics"}``. When LLM_CACHE is on, identical
+    requests are answered from the LLM cache; ``use_cache=False`` bypasses
+    the lookup but still stores the fresh completion. Transient API errors
+    are retried under the LLM resilience policy; a stream is only retried
+    before its first token. Returns the response and its metrics.
+    """
+    key = _llm_cache_key(messages)
+    cached = llm_cache.get(key) if key and use_cache else None
+    if cached is not None:
+        return _cached_completion(cached, section_id, stream)
+
+    limiter = get_limiter("llm")
+    estimated = sum(estimate_tokens(message.content) for message in messages)
+    write = _stream_writer() if stream else None
+
+    def attempt() -> tuple:
+        limiter.acquire(estimated)
+        started, first_token = time.perf_counter(), None
+        if not stream:
+            return config.llm.invoke(messages), started, first_token
+        response = None
+        try:
+            for chunk in config.llm.stream(messages):
+                if chunk.content:
+                    first_token = first_token or time.perf_counter()
+                    write({"section": section_id, "delta": chunk.content})
+                response = chunk if response is None else response + chunk
+        except Exception as exc:
+            if first_token:
+                raise PartialResponseError(f"LLM stream for section {section_id} failed mid-response: {exc}") from exc
+            raise
+        return response, started, first_token
+
+    response, started, first_token = get_policy("llm").call(attempt)
+    limiter.settle(estimated, _usage_tokens(response))
+    _store_completion(key, response)
+    metrics = _llm_metrics(started, first_token, response)
+    if stream:
+        write({"section": section_id, "done": True, "metrics": metrics})
+    return response, metrics
+
+
+async def _ainvoke_llm(messages: list, section_id: str, stream: bool = False, use_cache: bool = True) -> tuple:
+    """Async variant of _invoke_llm."""
+    key = _llm_cache_key(messages)
+    cached = await llm_cache.aget(key) if key and use_cache else None
+    if cached is not None:
+        return _cached_completion(cached, section_id, stream)
+
+    limiter = get_limiter("llm")
+    estimated = sum(estimate_tokens(message.content) for message in messages)
+    write = _stream_writer() if stream else None
+
+    async def attempt() -> tuple:
+        await limiter.aacquire(estimated)
+        started, first_token = time.perf_counter(), None
+        if not stream:
+            return await config.llm.ainvoke(messages), started, first_token
+        response = None
+        try:
+            async for chunk in config.llm.astream(messages):
+                if chunk.content:
+                    first_token = first_token or time.perf_counter()
+                    write({"section": section_id, "delta": chunk.content})
+                response = chunk if response is None else response + chunk
+        except Exception as exc:
+            if first_token:
+                raise PartialResponseError(f"LLM stream for section {section_id} failed mid-response: {exc}") from exc
+            raise
+        return response, started, first_token
+
+    response, started, first_token = await get_policy("llm").acall(attempt)
+    limiter.settle(estimated, _usage_tokens(response))
+    await _astore_completion(key, response)
+    metrics = _llm_metrics(started, first_token, response)
+    if stream:
+        write({"section": section_id, "done": True, "metrics": metrics})
+    return response, metrics
+
+
+def _finish_section(
+    state: ShallowDiveState,
+    section_id: str,
+    content: str,
+    postprocess: Callable[[str], dict] | None,
+    metrics: dict,
+    searched: bool = False,
+) -> dict:
+    """Log completion and build the section update (with the corpus when the section searched live)."""
+    if metrics["cached"]:
+        logger.info(f"[OK] Section {section_id} completed ({len(content)} characters, from LLM cache)")
+    else:
+        ttft = f"TTFT {metrics['ttft_s']}s, " if metrics["ttft_s"] is not None else ""
+        logger.info(
+            f"[OK] Section {section_id} completed ({len(content)} characters, "
+            f"{ttft}{metrics['generation_s']}s, {metrics['tokens_per_s']} tokens/s)"
+        )
+    extra = postprocess(content) if postprocess else {}
+    if searched:
+        extra["research_corpus"] = state.get("research_corpus", {})
+    return _section_update(state, section_id, content, llm_metrics={section_id: metrics}, **extra)
+
+
+def _run_section(
+    state: ShallowDiveState,
+    section_id: str,
+    build_prompt: PromptBuilder,
+    postprocess: Callable[[str], dict] | None = None,
+) -> dict:
+    """Prompt and write one section synchronously from its prefetched research."""
+    _start_section(section_id)
+
+    queries = _format_queries(state, SECTION_RESEARCH[section_id][1])
+    missing = _missing_queries(state, queries)
+    state, refs = _collect_research(state, queries, dict(zip(missing, _search_all(missing))))
+
+    messages = _section_messages(state, documents(state, refs), build_prompt)
+    response, metrics = _invoke_llm(
+        messages, section_id, state.get("stream_tokens", False), not state.get("llm_cache_bypass", False)
+    )
+    return _finish_section(state, section_id, response.content, postprocess, metrics, bool(missing))
+
+
+async def _arun_section(
+    state: ShallowDiveState,
+    section_id: str,
+    build_prompt: PromptBuilder,
+    postprocess: Callable[[str], dict] | None = None,
+) -> dict:
+    """Async variant of _run_section."""
+    _start_section(section_id)
+
+    queries = _format_queries(state, SECTION_RESEARCH[section_id][1])
+    missing = _missing_queries(state, queries)
+    state, refs = _collect_research(state, queries, dict(zip(missing, await _asearch_all(missing))))
+
+    # Building the prompt is CPU-bound (pandas return tables, context fitting, tokenisation): off the event loop
+    messages = await asyncio.to_thread(_section_messages, state, documents(state, refs), build_prompt)
+    response, metrics = await _ainvoke_llm(
+        messages, section_id, state.get("stream_tokens", False), not state.get("llm_cache_bypass", False)
+    )
+    return _finish_section(state, section_id, response.content, postprocess, metrics, bool(missing))
+
+
+# Section id -> (log title, Tavily query templates formatted with company_name/ticker)
+SECTION_RESEARCH: dict[str, tuple[str, list[str]]] = {
+    "1.1": ("COMPANY SNAPSHOT", []),
+    "1.2": (
+        "BUSINESS MODEL",
+        [
+            "{company_name} business model value chain products services customers",
+        ],
+    ),
+    "1.3": (
+        "VALUE CREATION (DUPONT)",
+        [
+            "{company_name} profitability margins pricing power",
+            "{company_name} capital efficiency asset turnover working capital",
+            "{company_name} leverage capital structure debt",
+        ],
+    ),
+    "1.4": (
+        "THEME IDENTIFICATION",
+        [
+            "{company_name} emerging market themes trends exposure",
+            "{company_name} digitalization energy transition sustainability",
+            "{company_name} market positioning competitive advantages moat",
+        ],
+    ),
+    "1.5": (
+        "GOVERNANCE & OWNERSHIP",
+        [
+            "{company_name} ownership structure major shareholders control",
+            "{company_name} management team CEO founders history",
+            "{company_name} governance board composition incentives",
+            "{company_name} capital allocation track record M&A",
+        ],
+    ),
+    "2.1": (
+        "KEY VALUE DRIVERS & CATALYSTS",
+        [
+            "{company_name} {ticker} key growth drivers catalysts",
+            "{company_name} margin expansion pricing power trends",
+            "{company_name} competitive advantages market position",
+            "{company_name} industry trends tailwinds headwinds",
+            "{company_name} management strategy capital allocation",
+        ],
+    ),
+    "2.2": (
+        "IMPLIED EXPECTATIONS",
+        [
+            "{company_name} {ticker} valuation expectations multiple",
+            "{company_name} earnings expectations consensus {ticker}",
+            "{company_name} market pricing growth vs margins",
+        ],
+    ),
+    "2.3": (
+        "KEY ASSUMPTIONS VS CONSENSUS",
+        [
+            "{company_name} {ticker} consensus estimates assumptions",
+        ],
+    ),
+    "3.1": (
+        "INDUSTRY PROFIT POOL & VALUE CHAIN",
+        [
+            "{company_name} industry value chain profit pool",
+            "{company_name} industry pricing power drivers",
+            "{company_name} key competitors positioning economics",
+        ],
+    ),
+    "3.2": (
+        "FIVE FORCES",
+        [
+            "{company_name} industry five forces competition suppliers customers",
+        ],
+    ),
+    "3.3": (
+        "INDUSTRY CLASSIFICATION",
+        [
+            "{company_name} industry structure classification fragmented mature network",
+        ],
+    ),
+    "4.1": (
+        "ROIC ANALYSIS",
+        [
+            "{company_name} {ticker} ROIC vs peers returns on capital",
+        ],
+    ),
+    "4.2": (
+        "COMPETITIVE ADVANTAGE (7 POWERS)",
+        [
+            "{company_name} competitive advantages moat barriers to entry",
+            "{company_name} scale economies network effects switching costs",
+            "{company_name} vs competitors differentiation positioning",
+            "{company_name} intellectual property patents technology",
+            "{company_name} customer retention pricing power brand",
+        ],
+    ),
+    "4.3": (
+        "REINVESTMENT OPPORTUNITY",
+        [
+            "{company_name} TAM growth runway capital allocation {ticker}",
+        ],
+    ),
+    "4.4": (
+        "SUSTAINABILITY OF ADVANTAGE",
+        [
+            "{company_name} market share pricing power retention trends",
+        ],
+    ),
+    "5.1": (
+        "RISK IDENTIFICATION & QUANTIFICATION",
+        [
+            "{company_name} risks challenges headwinds concerns",
+            "{company_name} regulatory risks compliance litigation",
+            "{company_name} competitive threats market share pressure",
+            "{company_name} financial leverage debt covenants liquidity",
+            "{company_name} governance controversies related party transactions",
+        ],
+    ),
+    "5.2": (
+        "PRE-MORTEM SCENARIOS",
+        [
+            "{company_name} {ticker} bear case risks scenarios",
+        ],
+    ),
+    "6.1": (
+        "PEER REVIEW",
+        [
+            "{company_name} {ticker} peers profitability growth ROIC comparison",
+        ],
+    ),
+    "6.2": (
+        "RELATIVE VALUATION",
+        [
+            "{company_name} {ticker} valuation peers premium discount history multiples",
+        ],
+    ),
+    "6.3": (
+        "3-YEAR PRICE TARGET",
+        [
+            "{company_name} {ticker} valuation price target analyst estimates",
+            "{company_name} peer valuation multiples comparison",
+            "{company_name} historical valuation PE ratio trends",
+            "{ticker} stock price forecast 2027 2028",
+        ],
+    ),
+    "7.1": (
+        "STEWARDSHIP VS LEGACY",
+        [
+            "{company_name} incremental ROIC reinvestment runway {ticker}",
+        ],
+    ),
+    "8.1": (
+        "CULTURE",
+        [
+            "{company_name} culture values purpose talent retention governance",
+        ],
+    ),
+    "8.2": (
+        "SUSTAINABILITY ASSESSMENT",
+        [
+            "{company_name} sustainability ESG controversies targets",
+        ],
+    ),
+    "8.3": (
+        "RISK MITIGATION VS PEERS",
+        [
+            "{company_name} governance risk premium cost of capital peers",
+        ],
+    ),
+    "8.4": (
+        "ENGAGEMENT PLAN",
+        [
+            "{company_name} governance improvements engagement priorities",
+        ],
+    ),
+}
+
+
+def _prompt_section_1_1(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 1.1 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, documents(state, state.get("web_research", [])), limit=10)
+    context = f"""
+    Company Overview and Financial Data (from API): see the system message.
 
     Web Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -152,42 +837,31 @@ def analyze_section_1_1(state: ShallowDiveState) -> ShallowDiveState:
     - Include citations [X] at the end of factual claims
     - Only use citation numbers that are provided in the context above
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_1_1"] = response.content
-    state["completed_sections"].append("1.1")
 
-    logger.info(f"[OK] Section 1.1 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_1_1(state: ShallowDiveState) -> dict:
+    """Generate Section 1.1: Company Snapshot."""
+    return _run_section(state, "1.1", _prompt_section_1_1)
 
 
-def analyze_section_1_2(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 1.2: What does the company do?"""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 1.2: BUSINESS MODEL")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_1_1(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_1_1."""
+    return await _arun_section(state, "1.1", _prompt_section_1_1)
 
-    results = web_search(f"{state['company_name']} business model value chain products services customers")
-    for result in results:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    all_research = state.get("web_research", []) + results
+def _prompt_section_1_2(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 1.2 prompt from state and the section's search results."""
+    all_research = documents(state, state.get("web_research", []) + research)
     research_with_citations = _research_context(state, all_research[-15:], limit=15)
 
     context = f"""
-    Company: {state['company_name']}
-
     Previous Analysis (Section 1.1):
-    {state.get('section_1_1', '')}
+    {_prior_section(state, '1.1', 500)}
 
     Business Model Research with Citations:
     {chr(10).join(research_with_citations)}
 
-    Company Data:
-    {json.dumps(state.get('company_overview', {}), indent=2)}
-
     IMPORTANT: Use citation numbers [X] when referencing sources.
     """
 
@@ -209,48 +883,39 @@ def analyze_section_1_2(state: ShallowDiveState) -> ShallowDiveState:
     Write in eloquent paragraphs. Be specific about mechanisms. No bullets.
     Include citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_1_2"] = response.content
-    state["completed_sections"].append("1.2")
 
-    logger.info(f"[OK] Section 1.2 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_1_2(state: ShallowDiveState) -> dict:
+    """Generate Section 1.2: What does the company do?"""
+    return _run_section(state, "1.2", _prompt_section_1_2)
 
 
-def analyze_section_1_3(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 1.3: How is value created (DuPont)?"""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 1.3: VALUE CREATION (DUPONT)")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_1_2(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_1_2."""
+    return await _arun_section(state, "1.2", _prompt_section_1_2)
 
-    queries = [
-        f"{state['company_name']} profitability margins pricing power",
-        f"{state['company_name']} capital efficiency asset turnover working capital",
-        f"{state['company_name']} leverage capital structure debt",
-    ]
 
-    additional_research = []
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-        additional_research.extend(results)
+def _returns_context(state: ShallowDiveState, table: Callable[[str, dict], str]) -> str:
+    """Computed returns table for the prompt; without usable periods the prompt points at the shared financial data."""
+    computed = table(state["ticker"], state.get("financial_metrics", {}))
+    if computed:
+        return f"(computed from reported financials)\n{computed}"
+    return "(not computable from the reported periods; see the financial data in the system message)"
+
 
-    all_research = state.get("web_research", []) + additional_research
+def _prompt_section_1_3(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 1.3 prompt from state and the section's search results."""
+    all_research = documents(state, state.get("web_research", []) + research)
     research_with_citations = _research_context(state, all_research[-20:], limit=20)
 
     context = f"""
-    Company: {state['company_name']}
-
     Previous Sections:
-    {state.get('section_1_1', '')}
-    {state.get('section_1_2', '')}
+    {_prior_section(state, '1.1', 400)}
+    {_prior_section(state, '1.2', 400)}
 
     Financial Metrics:
-    {json.dumps(state.get('financial_metrics', {}), indent=2)}
+    {_returns_context(state, dupont_table)}
 
     DuPont Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -297,46 +962,29 @@ def analyze_section_1_3(state: ShallowDiveState) -> ShallowDiveState:
     (operational compounder, leverage-made ROE, working-capital illusion, cycle beneficiary, or M&A veneer).
     Include citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_1_3"] = response.content
-    state["completed_sections"].append("1.3")
 
-    logger.info(f"[OK] Section 1.3 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_1_3(state: ShallowDiveState) -> dict:
+    """Generate Section 1.3: How is value created (DuPont)?"""
+    return _run_section(state, "1.3", _prompt_section_1_3)
 
 
-def analyze_section_1_4(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 1.4: Theme identification & exposure."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 1.4: THEME IDENTIFICATION")
-    logger.info(f"{'=' * 60}\n")
-
-    queries = [
-        f"{state['company_name']} emerging market themes trends exposure",
-        f"{state['company_name']} digitalization energy transition sustainability",
-        f"{state['company_name']} market positioning competitive advantages moat",
-    ]
+async def aanalyze_section_1_3(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_1_3."""
+    return await _arun_section(state, "1.3", _prompt_section_1_3)
 
-    theme_research = []
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-        theme_research.extend(results)
 
-    all_research = state.get("web_research", []) + theme_research
+def _prompt_section_1_4(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 1.4 prompt from state and the section's search results."""
+    all_research = documents(state, state.get("web_research", []) + research)
     research_with_citations = _research_context(state, all_research[-20:], limit=20)
 
     context = f"""
-    Company: {state['company_name']}
-
     Previous Analysis:
-    {state.get('section_1_1', '')}
-    {state.get('section_1_2', '')}
-    {state.get('section_1_3', '')}
+    {_prior_section(state, '1.1', 350)}
+    {_prior_section(state, '1.2', 350)}
+    {_prior_section(state, '1.3', 350)}
 
     Theme Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -389,48 +1037,30 @@ def analyze_section_1_4(state: ShallowDiveState) -> ShallowDiveState:
     Avoid "theme-washing" - only include themes with clear revenue/profit links.
     Include citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_1_4"] = response.content
-    state["completed_sections"].append("1.4")
-
-    logger.info(f"[OK] Section 1.4 completed ({len(response.content)} characters)")
-    return state
 
+def analyze_section_1_4(state: ShallowDiveState) -> dict:
+    """Generate Section 1.4: Theme identification & exposure."""
+    return _run_section(state, "1.4", _prompt_section_1_4)
 
-def analyze_section_1_5(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 1.5: Founders, management, shareholders."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 1.5: GOVERNANCE & OWNERSHIP")
-    logger.info(f"{'=' * 60}\n")
 
-    queries = [
-        f"{state['company_name']} ownership structure major shareholders control",
-        f"{state['company_name']} management team CEO founders history",
-        f"{state['company_name']} governance board composition incentives",
-        f"{state['company_name']} capital allocation track record M&A",
-    ]
+async def aanalyze_section_1_4(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_1_4."""
+    return await _arun_section(state, "1.4", _prompt_section_1_4)
 
-    governance_research = []
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-        governance_research.extend(results)
 
-    all_research = state.get("web_research", []) + governance_research
+def _prompt_section_1_5(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 1.5 prompt from state and the section's search results."""
+    all_research = documents(state, state.get("web_research", []) + research)
     research_with_citations = _research_context(state, all_research[-25:], limit=25)
 
     context = f"""
-    Company: {state['company_name']}
-
     Full Analysis So Far:
-    {state.get('section_1_1', '')}
-    {state.get('section_1_2', '')}
-    {state.get('section_1_3', '')}
-    {state.get('section_1_4', '')}
+    {_prior_section(state, '1.1', 300)}
+    {_prior_section(state, '1.2', 300)}
+    {_prior_section(state, '1.3', 300)}
+    {_prior_section(state, '1.4', 300)}
 
     Governance Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -486,53 +1116,32 @@ def analyze_section_1_5(state: ShallowDiveState) -> ShallowDiveState:
     controller extraction risk, state-influenced hybrid, PE play, or succession overhang).
     Include citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_1_5"] = response.content
-    state["completed_sections"].append("1.5")
 
-    logger.info(f"[OK] Section 1.5 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_1_5(state: ShallowDiveState) -> dict:
+    """Generate Section 1.5: Founders, management, shareholders."""
+    return _run_section(state, "1.5", _prompt_section_1_5)
 
 
-def analyze_section_2_1(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 2.1: Key Value Drivers & Catalysts."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 2.1: KEY VALUE DRIVERS & CATALYSTS")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_1_5(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_1_5."""
+    return await _arun_section(state, "1.5", _prompt_section_1_5)
 
-    queries = [
-        f"{state['company_name']} {state['ticker']} key growth drivers catalysts",
-        f"{state['company_name']} margin expansion pricing power trends",
-        f"{state['company_name']} competitive advantages market position",
-        f"{state['company_name']} industry trends tailwinds headwinds",
-        f"{state['company_name']} management strategy capital allocation",
-    ]
 
-    driver_research = []
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-                driver_research.append(result)
-        logger.info(f"[OK] Search: {query}")
-
-    research_with_citations = _research_context(state, driver_research[-20:], limit=20)
+def _prompt_section_2_1(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 2.1 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-20:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
     Previous Analysis:
-    Section 1.1 (Snapshot): {state.get('section_1_1', '')[:800]}
-    Section 1.3 (Value Creation): {state.get('section_1_3', '')[:800]}
-    Section 1.4 (Themes): {state.get('section_1_4', '')[:800]}
+    Section 1.1 (Snapshot): {_prior_section(state, '1.1', 200)}
+    Section 1.3 (Value Creation): {_prior_section(state, '1.3', 200)}
+    Section 1.4 (Themes): {_prior_section(state, '1.4', 200)}
 
-    Financial Data:
-    {json.dumps(state.get('financial_metrics', {}), indent=2)[:1500]}
+    Financial Data: see the financial data in the system message.
 
     Research on Value Drivers with Citations:
-    {chr(10).join(research_with_citations[:15])}
+    {chr(10).join(research_with_citations)}
     """
 
     prompt = f"""
@@ -593,49 +1202,31 @@ def analyze_section_2_1(state: ShallowDiveState) -> ShallowDiveState:
     - Must select and analyze 3-5 key variables
     - Prioritize by value sensitivity
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_2_1"] = response.content
-    state["completed_sections"].append("2.1")
 
-    logger.info(f"[OK] Section 2.1 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_2_1(state: ShallowDiveState) -> dict:
+    """Generate Section 2.1: Key Value Drivers & Catalysts."""
+    return _run_section(state, "2.1", _prompt_section_2_1)
 
 
-def analyze_section_2_2(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 2.2: Implied expectations from current valuation."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 2.2: IMPLIED EXPECTATIONS")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_2_1(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_2_1."""
+    return await _arun_section(state, "2.1", _prompt_section_2_1)
 
-    queries = [
-        f"{state['company_name']} {state['ticker']} valuation expectations multiple",
-        f"{state['company_name']} earnings expectations consensus {state['ticker']}",
-        f"{state['company_name']} market pricing growth vs margins",
-    ]
-    expectations_research = []
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-                expectations_research.append(result)
-        logger.info(f"[OK] Search: {query}")
-
-    research_with_citations = _research_context(state, expectations_research[-15:], limit=15)
-    context = f"""
-    Company: {state['company_name']} ({state['ticker']})
 
+def _prompt_section_2_2(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 2.2 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
+    context = f"""
     Value Drivers (2.1):
-    {state.get('section_2_1', '')[:1000]}
+    {_prior_section(state, '2.1', 250)}
 
     Snapshot & Value Creation:
-    {state.get('section_1_1', '')[:600]}
-    {state.get('section_1_3', '')[:600]}
+    {_prior_section(state, '1.1', 150)}
+    {_prior_section(state, '1.3', 150)}
 
-    Financial Metrics:
-    {json.dumps(state.get('financial_metrics', {}), indent=2)[:1200]}
+    Financial Metrics: see the financial data in the system message.
 
     Valuation Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -672,36 +1263,28 @@ def analyze_section_2_2(state: ShallowDiveState) -> ShallowDiveState:
     - Dense prose, Claim + Evidence + Implication.
     - Citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_2_2"] = response.content
-    state["completed_sections"].append("2.2")
 
-    logger.info(f"[OK] Section 2.2 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_2_2(state: ShallowDiveState) -> dict:
+    """Generate Section 2.2: Implied expectations from current valuation."""
+    return _run_section(state, "2.2", _prompt_section_2_2)
 
 
-def analyze_section_2_3(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 2.3: Key assumptions & difference vs consensus."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 2.3: KEY ASSUMPTIONS VS CONSENSUS")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_2_2(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_2_2."""
+    return await _arun_section(state, "2.2", _prompt_section_2_2)
 
-    revision_research = web_search(f"{state['company_name']} {state['ticker']} consensus estimates assumptions")
-    for result in revision_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, revision_research[-10:], limit=10)
+def _prompt_section_2_3(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 2.3 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-10:], limit=10)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
     Value Drivers (2.1):
-    {state.get('section_2_1', '')[:800]}
+    {_prior_section(state, '2.1', 200)}
 
     Implied Expectations (2.2):
-    {state.get('section_2_2', '')[:800]}
+    {_prior_section(state, '2.2', 200)}
 
     Revision Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -726,42 +1309,25 @@ def analyze_section_2_3(state: ShallowDiveState) -> ShallowDiveState:
     - Claim + Evidence + Implication.
     - Citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_2_3"] = response.content
-    state["completed_sections"].append("2.3")
 
-    logger.info(f"[OK] Section 2.3 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_2_3(state: ShallowDiveState) -> dict:
+    """Generate Section 2.3: Key assumptions & difference vs consensus."""
+    return _run_section(state, "2.3", _prompt_section_2_3)
 
 
-def analyze_section_3_1(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 3.1: Industry profit pool and value chain."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 3.1: INDUSTRY PROFIT POOL & VALUE CHAIN")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_2_3(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_2_3."""
+    return await _arun_section(state, "2.3", _prompt_section_2_3)
 
-    queries = [
-        f"{state['company_name']} industry value chain profit pool",
-        f"{state['company_name']} industry pricing power drivers",
-        f"{state['company_name']} key competitors positioning economics",
-    ]
-    industry_research = []
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-                industry_research.append(result)
-        logger.info(f"[OK] Search: {query}")
-
-    research_with_citations = _research_context(state, industry_research[-20:], limit=20)
-    context = f"""
-    Company: {state['company_name']} ({state['ticker']})
 
-    Business Model (1.2): {state.get('section_1_2', '')[:700]}
-    Value Drivers (2.1): {state.get('section_2_1', '')[:700]}
+def _prompt_section_3_1(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 3.1 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-20:], limit=20)
+    context = f"""
+    Business Model (1.2): {_prior_section(state, '1.2', 175)}
+    Value Drivers (2.1): {_prior_section(state, '2.1', 175)}
 
     Industry Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -782,33 +1348,25 @@ def analyze_section_3_1(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: dense prose, Claim + Evidence + Implication, citations [X] for facts.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_3_1"] = response.content
-    state["completed_sections"].append("3.1")
 
-    logger.info(f"[OK] Section 3.1 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_3_1(state: ShallowDiveState) -> dict:
+    """Generate Section 3.1: Industry profit pool and value chain."""
+    return _run_section(state, "3.1", _prompt_section_3_1)
 
 
-def analyze_section_3_2(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 3.2: Market structure (Five Forces)."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 3.2: FIVE FORCES")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_3_1(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_3_1."""
+    return await _arun_section(state, "3.1", _prompt_section_3_1)
 
-    forces_research = web_search(f"{state['company_name']} industry five forces competition suppliers customers")
-    for result in forces_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, forces_research[-15:], limit=15)
+def _prompt_section_3_2(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 3.2 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
     Industry Mapping (3.1):
-    {state.get('section_3_1', '')[:900]}
+    {_prior_section(state, '3.1', 225)}
 
     Five Forces Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -829,33 +1387,25 @@ def analyze_section_3_2(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for facts.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_3_2"] = response.content
-    state["completed_sections"].append("3.2")
 
-    logger.info(f"[OK] Section 3.2 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_3_2(state: ShallowDiveState) -> dict:
+    """Generate Section 3.2: Market structure (Five Forces)."""
+    return _run_section(state, "3.2", _prompt_section_3_2)
 
 
-def analyze_section_3_3(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 3.3: Industry structure classification & positioning."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 3.3: INDUSTRY CLASSIFICATION")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_3_2(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_3_2."""
+    return await _arun_section(state, "3.2", _prompt_section_3_2)
 
-    classification_research = web_search(f"{state['company_name']} industry structure classification fragmented mature network")
-    for result in classification_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, classification_research[-15:], limit=15)
+def _prompt_section_3_3(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 3.3 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
     Five Forces (3.2):
-    {state.get('section_3_2', '')[:800]}
+    {_prior_section(state, '3.2', 200)}
 
     Classification Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -875,36 +1425,28 @@ def analyze_section_3_3(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: dense prose; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_3_3"] = response.content
-    state["completed_sections"].append("3.3")
 
-    logger.info(f"[OK] Section 3.3 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_3_3(state: ShallowDiveState) -> dict:
+    """Generate Section 3.3: Industry structure classification & positioning."""
+    return _run_section(state, "3.3", _prompt_section_3_3)
 
 
-def analyze_section_4_1(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 4.1: ROIC analysis vs peers."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 4.1: ROIC ANALYSIS")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_3_3(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_3_3."""
+    return await _arun_section(state, "3.3", _prompt_section_3_3)
 
-    roic_research = web_search(f"{state['company_name']} {state['ticker']} ROIC vs peers returns on capital")
-    for result in roic_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, roic_research[-15:], limit=15)
+def _prompt_section_4_1(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 4.1 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
-    Value Creation (1.3): {state.get('section_1_3', '')[:700]}
-    Industry Structure (3.3): {state.get('section_3_3', '')[:600]}
+    Value Creation (1.3): {_prior_section(state, '1.3', 175)}
+    Industry Structure (3.3): {_prior_section(state, '3.3', 150)}
 
     Financial Metrics:
-    {json.dumps(state.get('financial_metrics', {}), indent=2)[:1200]}
+    {_returns_context(state, roic_table)}
 
     ROIC Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -924,53 +1466,32 @@ def analyze_section_4_1(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_4_1"] = response.content
-    state["completed_sections"].append("4.1")
 
-    logger.info(f"[OK] Section 4.1 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_4_1(state: ShallowDiveState) -> dict:
+    """Generate Section 4.1: ROIC analysis vs peers."""
+    return _run_section(state, "4.1", _prompt_section_4_1)
 
 
-def analyze_section_4_2(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 4.2: Source of Enduring Competitive Advantage (7 Powers)."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 4.2: COMPETITIVE ADVANTAGE (7 POWERS)")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_4_1(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_4_1."""
+    return await _arun_section(state, "4.1", _prompt_section_4_1)
 
-    queries = [
-        f"{state['company_name']} competitive advantages moat barriers to entry",
-        f"{state['company_name']} scale economies network effects switching costs",
-        f"{state['company_name']} vs competitors differentiation positioning",
-        f"{state['company_name']} intellectual property patents technology",
-        f"{state['company_name']} customer retention pricing power brand",
-    ]
 
-    moat_research = []
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-                moat_research.append(result)
-        logger.info(f"[OK] Search: {query}")
-
-    research_with_citations = _research_context(state, moat_research[-20:], limit=20)
+def _prompt_section_4_2(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 4.2 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-20:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
     Previous Analysis:
-    Section 1.2 (Business Model): {state.get('section_1_2', '')[:800]}
-    Section 1.3 (Value Creation): {state.get('section_1_3', '')[:800]}
-    Section 2.1 (Value Drivers): {state.get('section_2_1', '')[:800]}
+    Section 1.2 (Business Model): {_prior_section(state, '1.2', 200)}
+    Section 1.3 (Value Creation): {_prior_section(state, '1.3', 200)}
+    Section 2.1 (Value Drivers): {_prior_section(state, '2.1', 200)}
 
-    Financial Performance:
-    {json.dumps(state.get('financial_metrics', {}), indent=2)[:1500]}
+    Financial Performance: see the financial data in the system message.
 
     Competitive Advantage Research with Citations:
-    {chr(10).join(research_with_citations[:15])}
+    {chr(10).join(research_with_citations)}
     """
 
     prompt = f"""
@@ -1036,33 +1557,25 @@ def analyze_section_4_2(state: ShallowDiveState) -> ShallowDiveState:
     - Explicit failure modes
     - Dense prose, specific examples
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_4_2"] = response.content
-    state["completed_sections"].append("4.2")
 
-    logger.info(f"[OK] Section 4.2 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_4_2(state: ShallowDiveState) -> dict:
+    """Generate Section 4.2: Source of Enduring Competitive Advantage (7 Powers)."""
+    return _run_section(state, "4.2", _prompt_section_4_2)
 
 
-def analyze_section_4_3(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 4.3: Reinvestment opportunity & incremental returns."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 4.3: REINVESTMENT OPPORTUNITY")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_4_2(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_4_2."""
+    return await _arun_section(state, "4.2", _prompt_section_4_2)
 
-    reinvest_research = web_search(f"{state['company_name']} TAM growth runway capital allocation {state['ticker']}")
-    for result in reinvest_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, reinvest_research[-15:], limit=15)
+def _prompt_section_4_3(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 4.3 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
-    Competitive Advantage (4.2): {state.get('section_4_2', '')[:800]}
-    Value Drivers (2.1): {state.get('section_2_1', '')[:700]}
+    Competitive Advantage (4.2): {_prior_section(state, '4.2', 200)}
+    Value Drivers (2.1): {_prior_section(state, '2.1', 175)}
 
     Reinvestment Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1082,36 +1595,28 @@ def analyze_section_4_3(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_4_3"] = response.content
-    state["completed_sections"].append("4.3")
 
-    logger.info(f"[OK] Section 4.3 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_4_3(state: ShallowDiveState) -> dict:
+    """Generate Section 4.3: Reinvestment opportunity & incremental returns."""
+    return _run_section(state, "4.3", _prompt_section_4_3)
 
 
-def analyze_section_4_4(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 4.4: Sustainability of competitive advantage."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 4.4: SUSTAINABILITY OF ADVANTAGE")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_4_3(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_4_3."""
+    return await _arun_section(state, "4.3", _prompt_section_4_3)
 
-    durability_research = web_search(f"{state['company_name']} market share pricing power retention trends")
-    for result in durability_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, durability_research[-15:], limit=15)
+def _prompt_section_4_4(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 4.4 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
     Competitive Advantage (4.2):
-    {state.get('section_4_2', '')[:800]}
+    {_prior_section(state, '4.2', 200)}
 
     Reinvestment (4.3):
-    {state.get('section_4_3', '')[:600]}
+    {_prior_section(state, '4.3', 150)}
 
     Durability Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1131,52 +1636,31 @@ def analyze_section_4_4(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_4_4"] = response.content
-    state["completed_sections"].append("4.4")
 
-    logger.info(f"[OK] Section 4.4 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_4_4(state: ShallowDiveState) -> dict:
+    """Generate Section 4.4: Sustainability of competitive advantage."""
+    return _run_section(state, "4.4", _prompt_section_4_4)
 
 
-def analyze_section_5_1(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 5.1: Risk Identification, Quantification & Assessment."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 5.1: RISK IDENTIFICATION & QUANTIFICATION")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_4_4(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_4_4."""
+    return await _arun_section(state, "4.4", _prompt_section_4_4)
 
-    queries = [
-        f"{state['company_name']} risks challenges headwinds concerns",
-        f"{state['company_name']} regulatory risks compliance litigation",
-        f"{state['company_name']} competitive threats market share pressure",
-        f"{state['company_name']} financial leverage debt covenants liquidity",
-        f"{state['company_name']} governance controversies related party transactions",
-    ]
 
-    risk_research = []
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-                risk_research.append(result)
-        logger.info(f"[OK] Search: {query}")
-
-    research_with_citations = _research_context(state, risk_research[-20:], limit=20)
+def _prompt_section_5_1(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 5.1 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-20:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
     Previous Analysis:
-    Section 2.1 (Value Drivers): {state.get('section_2_1', '')[:800]}
-    Section 4.2 (Competitive Advantage): {state.get('section_4_2', '')[:800]}
+    Section 2.1 (Value Drivers): {_prior_section(state, '2.1', 200)}
+    Section 4.2 (Competitive Advantage): {_prior_section(state, '4.2', 200)}
 
-    Financial Position:
-    {json.dumps(state.get('financial_metrics', {}), indent=2)[:1500]}
+    Financial Position: see the financial data in the system message.
 
     Risk Research with Citations:
-    {chr(10).join(research_with_citations[:15])}
+    {chr(10).join(research_with_citations)}
     """
 
     prompt = f"""
@@ -1272,34 +1756,26 @@ def analyze_section_5_1(state: ShallowDiveState) -> ShallowDiveState:
     - Overlooked risks from peer/industry analysis
     - Monitoring indicators specified
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_5_1"] = response.content
-    state["completed_sections"].append("5.1")
 
-    logger.info(f"[OK] Section 5.1 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_5_1(state: ShallowDiveState) -> dict:
+    """Generate Section 5.1: Risk Identification, Quantification & Assessment."""
+    return _run_section(state, "5.1", _prompt_section_5_1)
 
 
-def analyze_section_5_2(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 5.2: Pre-mortem scenarios."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 5.2: PRE-MORTEM SCENARIOS")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_5_1(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_5_1."""
+    return await _arun_section(state, "5.1", _prompt_section_5_1)
 
-    premortem_research = web_search(f"{state['company_name']} {state['ticker']} bear case risks scenarios")
-    for result in premortem_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, premortem_research[-10:], limit=10)
+def _prompt_section_5_2(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 5.2 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-10:], limit=10)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
-    Risks (5.1): {state.get('section_5_1', '')[:900]}
-    Value Drivers (2.1): {state.get('section_2_1', '')[:600]}
-    Competitive Advantage (4.2): {state.get('section_4_2', '')[:600]}
+    Risks (5.1): {_prior_section(state, '5.1', 225)}
+    Value Drivers (2.1): {_prior_section(state, '2.1', 150)}
+    Competitive Advantage (4.2): {_prior_section(state, '4.2', 150)}
 
     Scenario Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1320,33 +1796,25 @@ def analyze_section_5_2(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: dense prose; Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_5_2"] = response.content
-    state["completed_sections"].append("5.2")
 
-    logger.info(f"[OK] Section 5.2 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_5_2(state: ShallowDiveState) -> dict:
+    """Generate Section 5.2: Pre-mortem scenarios."""
+    return _run_section(state, "5.2", _prompt_section_5_2)
 
 
-def analyze_section_6_1(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 6.1: Peer review (growth/profitability/ROIC)."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 6.1: PEER REVIEW")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_5_2(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_5_2."""
+    return await _arun_section(state, "5.2", _prompt_section_5_2)
 
-    peer_research = web_search(f"{state['company_name']} {state['ticker']} peers profitability growth ROIC comparison")
-    for result in peer_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, peer_research[-15:], limit=15)
+def _prompt_section_6_1(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 6.1 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
-    ROIC (4.1): {state.get('section_4_1', '')[:600]}
-    Competitive Advantage (4.2): {state.get('section_4_2', '')[:600]}
+    ROIC (4.1): {_prior_section(state, '4.1', 150)}
+    Competitive Advantage (4.2): {_prior_section(state, '4.2', 150)}
 
     Peer Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1366,33 +1834,25 @@ def analyze_section_6_1(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_6_1"] = response.content
-    state["completed_sections"].append("6.1")
 
-    logger.info(f"[OK] Section 6.1 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_6_1(state: ShallowDiveState) -> dict:
+    """Generate Section 6.1: Peer review (growth/profitability/ROIC)."""
+    return _run_section(state, "6.1", _prompt_section_6_1)
 
 
-def analyze_section_6_2(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 6.2: Relative valuation."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 6.2: RELATIVE VALUATION")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_6_1(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_6_1."""
+    return await _arun_section(state, "6.1", _prompt_section_6_1)
 
-    valuation_research = web_search(f"{state['company_name']} {state['ticker']} valuation peers premium discount history multiples")
-    for result in valuation_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, valuation_research[-15:], limit=15)
+def _prompt_section_6_2(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 6.2 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
-    Peer Review (6.1): {state.get('section_6_1', '')[:700]}
-    ROIC (4.1): {state.get('section_4_1', '')[:600]}
+    Peer Review (6.1): {_prior_section(state, '6.1', 175)}
+    ROIC (4.1): {_prior_section(state, '4.1', 150)}
 
     Valuation Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1412,52 +1872,32 @@ def analyze_section_6_2(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_6_2"] = response.content
-    state["completed_sections"].append("6.2")
 
-    logger.info(f"[OK] Section 6.2 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_6_2(state: ShallowDiveState) -> dict:
+    """Generate Section 6.2: Relative valuation."""
+    return _run_section(state, "6.2", _prompt_section_6_2)
 
 
-def analyze_section_6_3(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 6.3: 3-Year Valuation Target."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 6.3: 3-YEAR PRICE TARGET")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_6_2(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_6_2."""
+    return await _arun_section(state, "6.2", _prompt_section_6_2)
 
-    queries = [
-        f"{state['company_name']} {state['ticker']} valuation price target analyst estimates",
-        f"{state['company_name']} peer valuation multiples comparison",
-        f"{state['company_name']} historical valuation PE ratio trends",
-        f"{state['ticker']} stock price forecast 2027 2028",
-    ]
 
-    valuation_research = []
-    for query in queries:
-        results = web_search(query)
-        for result in results:
-            if result.get("url"):
-                state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
-                valuation_research.append(result)
-        logger.info(f"[OK] Search: {query}")
-
-    research_with_citations = _research_context(state, valuation_research[-15:], limit=15)
+def _prompt_section_6_3(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 6.3 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
     Investment Thesis:
-    Value Drivers (2.1): {state.get('section_2_1', '')[:1000]}
-    Competitive Advantage (4.2): {state.get('section_4_2', '')[:1000]}
-    Risks (5.1): {state.get('section_5_1', '')[:1000]}
+    Value Drivers (2.1): {_prior_section(state, '2.1', 250)}
+    Competitive Advantage (4.2): {_prior_section(state, '4.2', 250)}
+    Risks (5.1): {_prior_section(state, '5.1', 250)}
 
     Financial Snapshot (1.1):
-    {state.get('section_1_1', '')[:800]}
+    {_prior_section(state, '1.1', 200)}
 
-    Financial Metrics:
-    {json.dumps(state.get('financial_metrics', {}), indent=2)[:1500]}
+    Financial Metrics: see the financial data in the system message.
 
     Valuation Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1567,45 +2007,46 @@ def analyze_section_6_3(state: ShallowDiveState) -> ShallowDiveState:
     - Citations [X] for current valuations and peer multiples
     - Dense prose, specific numbers
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_6_3"] = response.content
-    state["completed_sections"].append("6.3")
 
-    rating_match = re.search(r"RATING:\s*(BUY|HOLD|SELL)", response.content, re.IGNORECASE)
-    target_match = re.search(r"[Bb]ase.*?[Tt]arget.*?\\$(\\d+)", response.content)
-    upside_match = re.search(r"[Uu]pside.*?([+-]\\d+)%", response.content)
+def _parse_price_target(content: str) -> dict:
+    """Extract rating, target price and upside from the Section 6.3 text."""
+    rating_match = re.search(r"RATING:\s*(BUY|HOLD|SELL)", content, re.IGNORECASE)
+    target_match = re.search(r"[Bb]ase.*?[Tt]arget.*?\\$(\\d+)", content)
+    upside_match = re.search(r"[Uu]pside.*?([+-]\\d+)%", content)
 
-    state["investment_rating"] = rating_match.group(1).upper() if rating_match else "HOLD"
-    state["target_price"] = f"${target_match.group(1)}" if target_match else "Target TBD"
-    state["upside_potential"] = f"{upside_match.group(1)}%" if upside_match else "Upside TBD"
+    investment_rating = rating_match.group(1).upper() if rating_match else "HOLD"
+    target_price = f"${target_match.group(1)}" if target_match else "Target TBD"
+    upside_potential = f"{upside_match.group(1)}%" if upside_match else "Upside TBD"
 
-    logger.info(f"[OK] Section 6.3 completed ({len(response.content)} characters)")
-    logger.info(f"  Rating: {state['investment_rating']}")
-    logger.info(f"  Target: {state['target_price']}")
-    logger.info(f"  Upside: {state['upside_potential']}")
-    return state
+    logger.info(f"  Rating: {investment_rating}")
+    logger.info(f"  Target: {target_price}")
+    logger.info(f"  Upside: {upside_potential}")
+    return {
+        "investment_rating": investment_rating,
+        "target_price": target_price,
+        "upside_potential": upside_potential,
+    }
 
 
-def analyze_section_7_1(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 7.1: Stewardship vs Legacy classification."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 7.1: STEWARDSHIP VS LEGACY")
-    logger.info(f"{'=' * 60}\n")
+def analyze_section_6_3(state: ShallowDiveState) -> dict:
+    """Generate Section 6.3: 3-Year Valuation Target."""
+    return _run_section(state, "6.3", _prompt_section_6_3, _parse_price_target)
 
-    runway_research = web_search(f"{state['company_name']} incremental ROIC reinvestment runway {state['ticker']}")
-    for result in runway_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, runway_research[-10:], limit=10)
-    context = f"""
-    Company: {state['company_name']} ({state['ticker']})
+async def aanalyze_section_6_3(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_6_3."""
+    return await _arun_section(state, "6.3", _prompt_section_6_3, _parse_price_target)
 
-    ROIC (4.1): {state.get('section_4_1', '')[:600]}
-    Reinvestment (4.3): {state.get('section_4_3', '')[:700]}
-    Valuation (6.3): {state.get('section_6_3', '')[:700]}
+
+def _prompt_section_7_1(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 7.1 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-10:], limit=10)
+    context = f"""
+    ROIC (4.1): {_prior_section(state, '4.1', 150)}
+    Reinvestment (4.3): {_prior_section(state, '4.3', 175)}
+    Valuation (6.3): {_prior_section(state, '6.3', 175)}
 
     Runway Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1627,32 +2068,24 @@ def analyze_section_7_1(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_7_1"] = response.content
-    state["completed_sections"].append("7.1")
 
-    logger.info(f"[OK] Section 7.1 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_7_1(state: ShallowDiveState) -> dict:
+    """Generate Section 7.1: Stewardship vs Legacy classification."""
+    return _run_section(state, "7.1", _prompt_section_7_1)
 
 
-def analyze_section_8_1(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 8.1: Culture, values, and purpose."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 8.1: CULTURE")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_7_1(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_7_1."""
+    return await _arun_section(state, "7.1", _prompt_section_7_1)
 
-    culture_research = web_search(f"{state['company_name']} culture values purpose talent retention governance")
-    for result in culture_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, culture_research[-15:], limit=15)
+def _prompt_section_8_1(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 8.1 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
-    Industry Rules (3.3): {state.get('section_3_3', '')[:600]}
+    Industry Rules (3.3): {_prior_section(state, '3.3', 150)}
 
     Culture Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1672,32 +2105,24 @@ def analyze_section_8_1(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_8_1"] = response.content
-    state["completed_sections"].append("8.1")
 
-    logger.info(f"[OK] Section 8.1 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_8_1(state: ShallowDiveState) -> dict:
+    """Generate Section 8.1: Culture, values, and purpose."""
+    return _run_section(state, "8.1", _prompt_section_8_1)
 
 
-def analyze_section_8_2(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 8.2: Sustainability assessment."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 8.2: SUSTAINABILITY ASSESSMENT")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_8_1(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_8_1."""
+    return await _arun_section(state, "8.1", _prompt_section_8_1)
 
-    sustainability_research = web_search(f"{state['company_name']} sustainability ESG controversies targets")
-    for result in sustainability_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, sustainability_research[-15:], limit=15)
+def _prompt_section_8_2(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 8.2 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
-    Culture (8.1): {state.get('section_8_1', '')[:600]}
+    Culture (8.1): {_prior_section(state, '8.1', 150)}
 
     Sustainability Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1716,33 +2141,25 @@ def analyze_section_8_2(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_8_2"] = response.content
-    state["completed_sections"].append("8.2")
 
-    logger.info(f"[OK] Section 8.2 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_8_2(state: ShallowDiveState) -> dict:
+    """Generate Section 8.2: Sustainability assessment."""
+    return _run_section(state, "8.2", _prompt_section_8_2)
 
 
-def analyze_section_8_3(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 8.3: Risk mitigation vs peers."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 8.3: RISK MITIGATION VS PEERS")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_8_2(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_8_2."""
+    return await _arun_section(state, "8.2", _prompt_section_8_2)
 
-    cost_of_capital_research = web_search(f"{state['company_name']} governance risk premium cost of capital peers")
-    for result in cost_of_capital_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, cost_of_capital_research[-15:], limit=15)
+def _prompt_section_8_3(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 8.3 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-15:], limit=15)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
-    Sustainability Assessment (8.2): {state.get('section_8_2', '')[:700]}
-    Risks (5.1): {state.get('section_5_1', '')[:700]}
+    Sustainability Assessment (8.2): {_prior_section(state, '8.2', 175)}
+    Risks (5.1): {_prior_section(state, '5.1', 175)}
 
     Cost of Capital Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1761,33 +2178,25 @@ def analyze_section_8_3(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_8_3"] = response.content
-    state["completed_sections"].append("8.3")
 
-    logger.info(f"[OK] Section 8.3 completed ({len(response.content)} characters)")
-    return state
+def analyze_section_8_3(state: ShallowDiveState) -> dict:
+    """Generate Section 8.3: Risk mitigation vs peers."""
+    return _run_section(state, "8.3", _prompt_section_8_3)
 
 
-def analyze_section_8_4(state: ShallowDiveState) -> ShallowDiveState:
-    """Generate Section 8.4: Engagement opportunities & plan."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("ANALYZING SECTION 8.4: ENGAGEMENT PLAN")
-    logger.info(f"{'=' * 60}\n")
+async def aanalyze_section_8_3(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_8_3."""
+    return await _arun_section(state, "8.3", _prompt_section_8_3)
 
-    engagement_research = web_search(f"{state['company_name']} governance improvements engagement priorities")
-    for result in engagement_research:
-        if result.get("url"):
-            state, _ = add_source(state, result["url"], result.get("title", "Untitled"), result.get("content", ""))
 
-    research_with_citations = _research_context(state, engagement_research[-10:], limit=10)
+def _prompt_section_8_4(state: ShallowDiveState, research: list[dict]) -> str:
+    """Build the Section 8.4 prompt from state and the section's search results."""
+    research_with_citations = _research_context(state, research[-10:], limit=10)
     context = f"""
-    Company: {state['company_name']} ({state['ticker']})
-
-    Sustainability (8.2): {state.get('section_8_2', '')[:600]}
-    Risk Mitigation (8.3): {state.get('section_8_3', '')[:600]}
+    Sustainability (8.2): {_prior_section(state, '8.2', 150)}
+    Risk Mitigation (8.3): {_prior_section(state, '8.3', 150)}
 
     Engagement Research with Citations:
     {chr(10).join(research_with_citations)}
@@ -1808,24 +2217,92 @@ def analyze_section_8_4(state: ShallowDiveState) -> ShallowDiveState:
 
     Requirements: Claim + Evidence + Implication; citations [X] for factual claims.
     """
+    return prompt
 
-    messages = [SystemMessage(content=config.ANALYST_SYSTEM_PROMPT), HumanMessage(content=prompt)]
-    response = config.llm.invoke(messages)
-    state["section_8_4"] = response.content
-    state["completed_sections"].append("8.4")
-
-    logger.info(f"[OK] Section 8.4 completed ({len(response.content)} characters)")
-    return state
-
-
-def compile_final_report(state: ShallowDiveState) -> ShallowDiveState:
-    """Compile all sections into final investment-grade report."""
-    logger.info(f"\n{'=' * 60}")
-    logger.info("COMPILING FINAL REPORT")
-    logger.info(f"{'=' * 60}\n")
 
-    references = generate_references_section(state)
-    report = f"""
+def analyze_section_8_4(state: ShallowDiveState) -> dict:
+    """Generate Section 8.4: Engagement opportunities & plan."""
+    return _run_section(state, "8.4", _prompt_section_8_4)
+
+
+async def aanalyze_section_8_4(state: ShallowDiveState) -> dict:
+    """Async variant of analyze_section_8_4."""
+    return await _arun_section(state, "8.4", _prompt_section_8_4)
+
+
+# Report parts and section headings, in report order
+REPORT_OUTLINE: list[tuple[str, list[tuple[str, str]]]] = [
+    (
+        "SECTION 1: PROFILE",
+        [
+            ("1.1", "Company Snapshot"),
+            ("1.2", "What Does the Company Do?"),
+            ("1.3", "How Is Value Created? (DuPont Analysis)"),
+            ("1.4", "Theme Identification & Exposure"),
+            ("1.5", "Founders, Management, Shareholders"),
+        ],
+    ),
+    (
+        "SECTION 2: INVESTMENT THESIS",
+        [
+            ("2.1", "Key Value Drivers & Catalysts"),
+            ("2.2", "Implied Expectations"),
+            ("2.3", "Key Assumptions & Difference vs Consensus"),
+        ],
+    ),
+    (
+        "SECTION 3: INDUSTRY",
+        [
+            ("3.1", "Profit Pool & Value Chain"),
+            ("3.2", "Market Structure (Five Forces)"),
+            ("3.3", "Industry Structure Classification & Positioning"),
+        ],
+    ),
+    (
+        "SECTION 4: COMPETITIVE ADVANTAGE",
+        [
+            ("4.1", "ROIC Analysis vs Peers"),
+            ("4.2", "Source of Enduring Competitive Advantage (7 Powers)"),
+            ("4.3", "Reinvestment Opportunity & Incremental Returns"),
+            ("4.4", "Sustainability of Competitive Advantage"),
+        ],
+    ),
+    (
+        "SECTION 5: RISKS",
+        [
+            ("5.1", "Risk Identification, Quantification & Probability Assessment"),
+            ("5.2", "Pre-Mortem Scenarios & Likelihood"),
+        ],
+    ),
+    (
+        "SECTION 6: VALUATION",
+        [
+            ("6.1", "Peer Review (Growth, Profitability, ROIC)"),
+            ("6.2", "Relative Valuation (Peers & History)"),
+            ("6.3", "Three-Year Price Target & Scenarios"),
+        ],
+    ),
+    (
+        "SECTION 7: IDENTIFICATION",
+        [
+            ("7.1", "Stewardship vs Legacy Classification"),
+        ],
+    ),
+    (
+        "SECTION 8: ENGAGEMENT",
+        [
+            ("8.1", "Culture: Values & Purpose"),
+            ("8.2", "Sustainability Assessment"),
+            ("8.3", "Addressing Risk vs Peers (Cost of Capital)"),
+            ("8.4", "Engagement Opportunities & Plan"),
+        ],
+    ),
+]
+
+
+def _report_header(state: ShallowDiveState) -> str:
+    """Title block and investment recommendation."""
+    return f"""
 # INVESTMENT-GRADE SHALLOW DIVE ANALYSIS
 ## {state['company_name']} ({state['ticker']})
 
@@ -1843,173 +2320,43 @@ Analysis Date: {datetime.now().strftime('%Y-%m-%d')}
 
 ---
 
-## SECTION 1: PROFILE
-
-### 1.1 Company Snapshot
-
-{state.get('section_1_1', 'Not completed')}
-
----
-
-### 1.2 What Does the Company Do?
-
-{state.get('section_1_2', 'Not completed')}
-
----
+"""
 
-### 1.3 How Is Value Created? (DuPont Analysis)
 
-{state.get('section_1_3', 'Not completed')}
+def _report_sections(state: ShallowDiveState, pending: str | None = None) -> str:
+    """All report parts with their section text.
 
----
-
-### 1.4 Theme Identification & Exposure
-
-{state.get('section_1_4', 'Not completed')}
-
----
-
-### 1.5 Founders, Management, Shareholders
-
-{state.get('section_1_5', 'Not completed')}
-
----
-
-## SECTION 2: INVESTMENT THESIS
-
-### 2.1 Key Value Drivers & Catalysts
-
-{state.get('section_2_1', 'Not completed')}
-
----
-
-### 2.2 Implied Expectations
-
-{state.get('section_2_2', 'Not completed')}
-
----
-
-### 2.3 Key Assumptions & Difference vs Consensus
-
-{state.get('section_2_3', 'Not completed')}
-
----
-
-## SECTION 3: INDUSTRY
-
-### 3.1 Profit Pool & Value Chain
-
-{state.get('section_3_1', 'Not completed')}
-
----
-
-### 3.2 Market Structure (Five Forces)
-
-{state.get('section_3_2', 'Not completed')}
-
----
-
-### 3.3 Industry Structure Classification & Positioning
-
-{state.get('section_3_3', 'Not completed')}
-
----
-
-## SECTION 4: COMPETITIVE ADVANTAGE
-
-### 4.1 ROIC Analysis vs Peers
-
-{state.get('section_4_1', 'Not completed')}
-
----
-
-### 4.2 Source of Enduring Competitive Advantage (7 Powers)
-
-{state.get('section_4_2', 'Not completed')}
-
----
-
-### 4.3 Reinvestment Opportunity & Incremental Returns
-
-{state.get('section_4_3', 'Not completed')}
-
----
-
-### 4.4 Sustainability of Competitive Advantage
-
-{state.get('section_4_4', 'Not completed')}
-
----
-
-## SECTION 5: RISKS
-
-### 5.1 Risk Identification, Quantification & Probability Assessment
-
-{state.get('section_5_1', 'Not completed')}
-
----
-
-### 5.2 Pre-Mortem Scenarios & Likelihood
-
-{state.get('section_5_2', 'Not completed')}
-
----
-
-## SECTION 6: VALUATION
-
-### 6.1 Peer Review (Growth, Profitability, ROIC)
-
-{state.get('section_6_1', 'Not completed')}
-
----
-
-### 6.2 Relative Valuation (Peers & History)
-
-{state.get('section_6_2', 'Not completed')}
-
----
-
-### 6.3 Three-Year Price Target & Scenarios
-
-{state.get('section_6_3', 'Not completed')}
-
----
-
-## SECTION 7: IDENTIFICATION
-
-### 7.1 Stewardship vs Legacy Classification
-
-{state.get('section_7_1', 'Not completed')}
-
----
-
-## SECTION 8: ENGAGEMENT
-
-### 8.1 Culture: Values & Purpose
-
-{state.get('section_8_1', 'Not completed')}
-
----
-
-### 8.2 Sustainability Assessment
-
-{state.get('section_8_2', 'Not completed')}
-
----
-
-### 8.3 Addressing Risk vs Peers (Cost of Capital)
-
-{state.get('section_8_3', 'Not completed')}
-
----
-
-### 8.4 Engagement Opportunities & Plan
+    ``pending`` replaces empty sections (used while the graph is still running);
+    otherwise a missing section reads "Not completed".
+    """
+    blocks = []
+    for part, section_list in REPORT_OUTLINE:
+        blocks.append(f"## {part}\n\n")
+        for section_id, title in section_list:
+            key = f"section_{section_id.replace('.', '_')}"
+            content = (state.get(key) or pending) if pending is not None else state.get(key, "Not completed")
+            blocks.append(f"### {section_id} {title}\n\n{content}\n\n---\n\n")
+    return "".join(blocks)
+
+
+def render_partial_report(state: ShallowDiveState) -> str:
+    """Report as far as the run has got: finished sections, placeholders for the rest."""
+    done = len(state.get("completed_sections", []))
+    return (
+        _report_header(state)
+        + _report_sections(state, pending="*Pending...*")
+        + f"*Report in progress: {done}/25 sections complete. References and metadata are added when the run finishes.*\n"
+    )
 
-{state.get('section_8_4', 'Not completed')}
 
----
+def compile_final_report(state: ShallowDiveState) -> ShallowDiveState:
+    """Compile all sections into final investment-grade report."""
+    logger.info(f"\n{'=' * 60}")
+    logger.info("COMPILING FINAL REPORT")
+    logger.info(f"{'=' * 60}\n")
 
-{references}
+    references = generate_references_section(state)
+    report = _report_header(state) + _report_sections(state) + f"""{references}
 
 ---
 
@@ -2017,7 +2364,7 @@ Analysis Date: {datetime.now().strftime('%Y-%m-%d')}
 
 **Phase**: Phase 1 - Core Investment Analysis
 
-**Completed Sections:** {', '.join(state.get('completed_sections', []))}
+**Completed Sections:** {', '.join(sorted_sections(state.get('completed_sections', [])))}
 
 **Section Coverage:**
 - Profile Analysis: Sections 1.1-1.5 [OK]
@@ -2033,6 +2380,8 @@ Analysis Date: {datetime.now().strftime('%Y-%m-%d')}
 - Financial APIs: {'Yes' if config.FMP_API_KEY else 'No'}
 - Web Research Queries: {len(state.get('web_research', []))}
 - Total Sources Cited: {len(state.get('sources', []))}
+- LLM Responses From Cache: {sum(1 for m in state.get('llm_metrics', {}).values() if m.get('cached'))}/{len(state.get('llm_metrics', {}))}
+- Prompt Tokens From Provider Cache: {sum(m.get('cached_input_tokens', 0) for m in state.get('llm_metrics', {}).values())}/{sum(m.get('input_tokens', 0) for m in state.get('llm_metrics', {}).values())}
 
 **Quality Metrics:**
 - Investment Rating: {state.get('investment_rating', 'Pending')}
@@ -2047,11 +2396,9 @@ Analysis Date: {datetime.now().strftime('%Y-%m-%d')}
 *This investment-grade analysis was generated using an automated LangGraph workflow implementing Phase 1 of the comprehensive shallow dive framework. The analysis includes value drivers, competitive advantage assessment (7 Powers), risk quantification, and a 3-year price target with BUY/HOLD/SELL recommendation.*
     """
 
-    state["final_report"] = report
-
     logger.info("[OK] Final report compiled")
     logger.info(f"Total length: {len(report)} characters")
     logger.info(f"Completed sections: {len(state.get('completed_sections', []))}/25 (Phase 1)")
     logger.info(f"Total sources cited: {len(state.get('sources', []))}")
     logger.info(f"Investment Rating: {state.get('investment_rating', 'TBD')}")
-    return state
+    return {"final_report": report}
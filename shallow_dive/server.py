@@ -0,0 +1,91 @@
+"""Resident analysis service keeping the compiled graph and provider clients warm.
+
+Jobs are submitted as ``POST /analyze`` with a JSON body
+``{"company": ..., "ticker": ..., "output_dir": ..., "resume": ..., "run_id": ...,
+"stream_report": ..., "stream_tokens": ...}``
+(only company and ticker are required). The response is
+newline-delimited JSON: one ``progress`` event per completed node, then a
+``result`` event with the same summary analyze_single_company returns. With
+``stream_tokens``, ``token`` events carry LLM output as it is generated.
+"""
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import checkpoints, config
+from .runner import analyze_single_company
+from .workflow import get_workflow
+
+logger = config.logger
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    """Handle health checks and streaming analysis jobs."""
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404)
+            return
+        self._send_json(200, {"status": "ok"})
+
+    def do_POST(self):
+        if self.path != "/analyze":
+            self.send_error(404)
+            return
+
+        try:
+            job = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            company, ticker = job["company"], job["ticker"]
+        except (ValueError, KeyError) as exc:
+            self._send_json(400, {"event": "error", "error": f"Invalid job: {exc}"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+
+        self._emit({"event": "accepted", "company": company, "ticker": ticker})
+        result = analyze_single_company(
+            company,
+            ticker,
+            job.get("output_dir", "."),
+            on_progress=lambda node: self._emit({"event": "progress", "node": node}),
+            resume=bool(job.get("resume")),
+            run_id=job.get("run_id"),
+            stream_report=bool(job.get("stream_report")),
+            stream_tokens=bool(job.get("stream_tokens")),
+            on_tokens=lambda event: self._emit({"event": "token", **event}),
+        )
+        self._emit({"event": "result", **result})
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _emit(self, event: dict) -> None:
+        """Write one NDJSON event; a disconnected client must not abort the job."""
+        try:
+            self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):  # noqa: A002 - BaseHTTPRequestHandler signature
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765) -> None:
+    """Compile the graph once and serve analysis jobs until interrupted."""
+    get_workflow(use_async=False, checkpoint=checkpoints.enabled())  # The variant jobs run (analyze_single_company)
+    server = ThreadingHTTPServer((host, port), AnalysisHandler)
+    logger.info(f"[OK] Shallow Dive service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down service")
+    finally:
+        server.server_close()
@@ -0,0 +1,65 @@
+"""Single-flight deduplication of identical in-flight provider calls.
+
+When concurrent workers ask for the same search or FMP endpoint at the same
+moment, the first caller makes the request and the others wait for its
+result. This covers the window a response cache cannot: before the first
+response has arrived. Deduplication is per process (threads and tasks on an
+event loop); process-pool workers each have their own.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._tasks: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` unless an identical call is in flight, in which case wait for its result."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of do; calls are shared between tasks on the same event loop."""
+        task_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _: self._forget(task_key))
+            else:
+                self.shared += 1
+        # Shield so one cancelled waiter does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, task_key: Tuple[int, str]) -> None:
+        with self._lock:
+            self._tasks.pop(task_key, None)
@@ -1,6 +1,30 @@
 """State definition for the Shallow Dive workflow."""
 
-from typing import TypedDict, List, Dict, Any
+import operator
+from typing import Annotated, TypedDict, List, Dict, Any
+
+
+def merge_sources(left: List[Dict[str, Any]], right: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge source lists from parallel branches, keeping one entry per URL in citation order."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for source in (left or []) + (right or []):
+        merged.setdefault(source["url"], source)
+    return sorted(merged.values(), key=lambda x: x["number"])
+
+
+def merge_source_map(left: Dict[str, int], right: Dict[str, int]) -> Dict[str, int]:
+    """Merge URL -> citation number maps from parallel branches."""
+    return {**(left or {}), **(right or {})}
+
+
+def merge_refs(left: List[str], right: List[str]) -> List[str]:
+    """Ordered union of document id lists from parallel branches."""
+    return list(dict.fromkeys((left or []) + (right or [])))
+
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge per-section dicts written by parallel branches."""
+    return {**(left or {}), **(right or {})}
 
 
 class ShallowDiveState(TypedDict):
@@ -15,11 +39,14 @@ class ShallowDiveState(TypedDict):
     financial_metrics: Dict[str, Any]
     ownership_data: Dict[str, Any]
     market_data: Dict[str, Any]
-    web_research: List[Dict[str, Any]]
+    research_corpus: Annotated[Dict[str, Dict[str, Any]], merge_dicts]  # Document id -> search document, stored once
+    web_research: Annotated[List[str], merge_refs]  # Document ids from initial and financial research
+    research_results: Dict[str, List[str]]  # Prefetched document ids keyed by query
+    fmp_prefetch: Dict[str, Any]  # FMP profile/financial data prefetched by a batch run
 
-    # Source Tracking
-    sources: List[Dict[str, Any]]
-    source_map: Dict[str, int]
+    # Source Tracking (reducers let parallel section nodes write concurrently)
+    sources: Annotated[List[Dict[str, Any]], merge_sources]
+    source_map: Annotated[Dict[str, int], merge_source_map]
 
     # Analysis Sections - Profile
     section_1_1: str
@@ -69,8 +96,11 @@ class ShallowDiveState(TypedDict):
 
     # Workflow Control
     current_section: str
-    completed_sections: List[str]
-    errors: List[str]
+    completed_sections: Annotated[List[str], operator.add]
+    errors: Annotated[List[str], operator.add]
+    stream_tokens: bool  # Stream LLM completions as custom graph events
+    llm_cache_bypass: bool  # Skip LLM cache lookups (fresh completions are still stored)
+    llm_metrics: Annotated[Dict[str, Dict[str, Any]], merge_dicts]  # Section id -> TTFT / duration / tokens per second
 
     # Final Output
     final_report: str
@@ -0,0 +1,66 @@
+"""Incremental Markdown report kept on disk while the graph runs.
+
+Driven by ``app.stream``: every completed node refreshes the file with the
+sections finished so far, so a long run shows useful content early and a
+crashed run still leaves a readable partial report. The final pass (the
+compiled report with references and metadata) replaces it at the end.
+"""
+
+import os
+import time
+from typing import Dict
+
+from . import config
+from .sections import render_partial_report
+
+logger = config.logger
+
+# Update keys that are plain values (not reducer deltas) and can be applied as-is
+_VALUE_KEYS = ("investment_rating", "target_price", "upside_potential")
+
+# Minimum seconds between rewrites while tokens are streaming in
+_TOKEN_WRITE_INTERVAL = 1.0
+
+
+class StreamingReport:
+    """Partial report file refreshed from streamed graph updates."""
+
+    def __init__(self, path: str, company_name: str, ticker: str):
+        self.path = path
+        self.state: Dict = {"company_name": company_name, "ticker": ticker, "completed_sections": []}
+        self._last_write = 0.0
+
+    def apply(self, node: str, update: Dict | None) -> None:
+        """Merge one node's update and rewrite the file if it finished a section."""
+        if not update or not update.get("completed_sections"):
+            return
+        for key, value in update.items():
+            if key.startswith("section_") or key in _VALUE_KEYS:
+                self.state[key] = value
+        self.state["completed_sections"] = self.state["completed_sections"] + update["completed_sections"]
+        self.write()
+
+    def append(self, section_id: str, delta: str) -> None:
+        """Add streamed LLM tokens to an in-progress section, rewriting at most once a second."""
+        key = f"section_{section_id.replace('.', '_')}"
+        self.state[key] = self.state.get(key, "") + delta
+        if time.monotonic() - self._last_write >= _TOKEN_WRITE_INTERVAL:
+            self.write()
+
+    def refresh(self, state: Dict) -> None:
+        """Replace the tracked state with a full snapshot (e.g. a resumed checkpoint) and rewrite."""
+        self.state = {**self.state, **state}
+        self.write()
+
+    def write(self) -> None:
+        """Atomically replace the report file with the current partial report."""
+        self._last_write = time.monotonic()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        partial_path = f"{self.path}.partial"
+        try:
+            with open(partial_path, "w", encoding="utf-8") as file:
+                file.write(render_partial_report(self.state))
+            os.replace(partial_path, self.path)
+        except OSError as exc:
+            # The streaming copy is best-effort; the final report is still written
+            logger.warning(f"Could not update streaming report {self.path}: {exc}")
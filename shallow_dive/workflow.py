@@ -1,8 +1,39 @@
 """Build and compile the LangGraph workflow."""
 
-from langgraph.graph import StateGraph, END
+from functools import lru_cache
+from typing import Iterable
+
+from langgraph.graph import StateGraph, START, END
 
 from .sections import (
+    aanalyze_section_1_1,
+    aanalyze_section_1_2,
+    aanalyze_section_1_3,
+    aanalyze_section_1_4,
+    aanalyze_section_1_5,
+    aanalyze_section_2_1,
+    aanalyze_section_2_2,
+    aanalyze_section_2_3,
+    aanalyze_section_3_1,
+    aanalyze_section_3_2,
+    aanalyze_section_3_3,
+    aanalyze_section_4_1,
+    aanalyze_section_4_2,
+    aanalyze_section_4_3,
+    aanalyze_section_4_4,
+    aanalyze_section_5_1,
+    aanalyze_section_5_2,
+    aanalyze_section_6_1,
+    aanalyze_section_6_2,
+    aanalyze_section_6_3,
+    aanalyze_section_7_1,
+    aanalyze_section_8_1,
+    aanalyze_section_8_2,
+    aanalyze_section_8_3,
+    aanalyze_section_8_4,
+    agather_financial_data,
+    ainitialize_research,
+    aplan_research,
     analyze_section_1_1,
     analyze_section_1_2,
     analyze_section_1_3,
@@ -31,78 +62,105 @@ from .sections import (
     compile_final_report,
     gather_financial_data,
     initialize_research,
+    plan_research,
 )
+from . import checkpoints
 from .state import ShallowDiveState
 
 
-def build_workflow():
-    """Build and compile the LangGraph workflow."""
-    workflow = StateGraph(ShallowDiveState)
-
-    workflow.add_node("initialize", initialize_research)
-    workflow.add_node("gather_financials", gather_financial_data)
-    workflow.add_node("section_1_1", analyze_section_1_1)
-    workflow.add_node("section_1_2", analyze_section_1_2)
-    workflow.add_node("section_1_3", analyze_section_1_3)
-    workflow.add_node("section_1_4", analyze_section_1_4)
-    workflow.add_node("section_1_5", analyze_section_1_5)
-
-    workflow.add_node("section_2_1", analyze_section_2_1)
-    workflow.add_node("section_2_2", analyze_section_2_2)
-    workflow.add_node("section_2_3", analyze_section_2_3)
+# Section node -> (sync node, async node, upstream nodes whose output it reads).
+# Sections only wait on the nodes they actually consume, so independent
+# branches (e.g. industry 3.x vs competitive advantage 4.2) run concurrently.
+SECTION_NODES = {
+    "section_1_1": (analyze_section_1_1, aanalyze_section_1_1, ["gather_financials"]),
+    "section_1_2": (analyze_section_1_2, aanalyze_section_1_2, ["section_1_1"]),
+    "section_1_3": (analyze_section_1_3, aanalyze_section_1_3, ["section_1_1", "section_1_2"]),
+    "section_1_4": (analyze_section_1_4, aanalyze_section_1_4, ["section_1_1", "section_1_2", "section_1_3"]),
+    "section_1_5": (analyze_section_1_5, aanalyze_section_1_5, ["section_1_1", "section_1_2", "section_1_3", "section_1_4"]),
+    "section_2_1": (analyze_section_2_1, aanalyze_section_2_1, ["section_1_1", "section_1_3", "section_1_4"]),
+    "section_2_2": (analyze_section_2_2, aanalyze_section_2_2, ["section_1_1", "section_1_3", "section_2_1"]),
+    "section_2_3": (analyze_section_2_3, aanalyze_section_2_3, ["section_2_1", "section_2_2"]),
+    "section_3_1": (analyze_section_3_1, aanalyze_section_3_1, ["section_1_2", "section_2_1"]),
+    "section_3_2": (analyze_section_3_2, aanalyze_section_3_2, ["section_3_1"]),
+    "section_3_3": (analyze_section_3_3, aanalyze_section_3_3, ["section_3_2"]),
+    "section_4_1": (analyze_section_4_1, aanalyze_section_4_1, ["section_1_3", "section_3_3"]),
+    "section_4_2": (analyze_section_4_2, aanalyze_section_4_2, ["section_1_2", "section_1_3", "section_2_1"]),
+    "section_4_3": (analyze_section_4_3, aanalyze_section_4_3, ["section_2_1", "section_4_2"]),
+    "section_4_4": (analyze_section_4_4, aanalyze_section_4_4, ["section_4_2", "section_4_3"]),
+    "section_5_1": (analyze_section_5_1, aanalyze_section_5_1, ["section_2_1", "section_4_2"]),
+    "section_5_2": (analyze_section_5_2, aanalyze_section_5_2, ["section_2_1", "section_4_2", "section_5_1"]),
+    "section_6_1": (analyze_section_6_1, aanalyze_section_6_1, ["section_4_1", "section_4_2"]),
+    "section_6_2": (analyze_section_6_2, aanalyze_section_6_2, ["section_4_1", "section_6_1"]),
+    "section_6_3": (analyze_section_6_3, aanalyze_section_6_3, ["section_1_1", "section_2_1", "section_4_2", "section_5_1"]),
+    "section_7_1": (analyze_section_7_1, aanalyze_section_7_1, ["section_4_1", "section_4_3", "section_6_3"]),
+    "section_8_1": (analyze_section_8_1, aanalyze_section_8_1, ["section_3_3"]),
+    "section_8_2": (analyze_section_8_2, aanalyze_section_8_2, ["section_8_1"]),
+    "section_8_3": (analyze_section_8_3, aanalyze_section_8_3, ["section_5_1", "section_8_2"]),
+    "section_8_4": (analyze_section_8_4, aanalyze_section_8_4, ["section_8_2", "section_8_3"]),
+}
 
-    workflow.add_node("section_3_1", analyze_section_3_1)
-    workflow.add_node("section_3_2", analyze_section_3_2)
-    workflow.add_node("section_3_3", analyze_section_3_3)
 
-    workflow.add_node("section_4_1", analyze_section_4_1)
-    workflow.add_node("section_4_2", analyze_section_4_2)
-    workflow.add_node("section_4_3", analyze_section_4_3)
-    workflow.add_node("section_4_4", analyze_section_4_4)
+def downstream_nodes(names: Iterable[str]) -> list[str]:
+    """Section nodes in ``names`` plus every section that (transitively) reads them, in graph order."""
+    selected = set(names)
+    # SECTION_NODES is declared in dependency order, so one pass reaches every descendant
+    for name, (_, _, upstream) in SECTION_NODES.items():
+        if selected.intersection(upstream):
+            selected.add(name)
+    return [name for name in SECTION_NODES if name in selected]
 
-    workflow.add_node("section_5_1", analyze_section_5_1)
-    workflow.add_node("section_5_2", analyze_section_5_2)
 
-    workflow.add_node("section_6_1", analyze_section_6_1)
-    workflow.add_node("section_6_2", analyze_section_6_2)
-    workflow.add_node("section_6_3", analyze_section_6_3)
+def build_workflow(use_async: bool = False, checkpointer=None, sections: Iterable[str] | None = None):
+    """Build and compile the LangGraph workflow.
 
-    workflow.add_node("section_7_1", analyze_section_7_1)
-    workflow.add_node("section_8_1", analyze_section_8_1)
-    workflow.add_node("section_8_2", analyze_section_8_2)
-    workflow.add_node("section_8_3", analyze_section_8_3)
-    workflow.add_node("section_8_4", analyze_section_8_4)
+    With use_async=True every research node is a coroutine, so the compiled app
+    must be run with ``ainvoke``/``astream``. A checkpointer persists state after
+    every step so interrupted runs can resume. ``sections`` restricts the graph
+    to those section nodes (plus compile_report), starting from a stored state
+    instead of fresh research.
+    """
+    workflow = StateGraph(ShallowDiveState)
+    only = None if sections is None else set(sections)
+    section_nodes = {name: spec for name, spec in SECTION_NODES.items() if only is None or name in only}
 
+    if only is None:
+        workflow.add_node("initialize", ainitialize_research if use_async else initialize_research)
+        workflow.add_node("plan_research", aplan_research if use_async else plan_research)
+        workflow.add_node("gather_financials", agather_financial_data if use_async else gather_financial_data)
+    for name, (node, async_node, _) in section_nodes.items():
+        workflow.add_node(name, async_node if use_async else node)
     workflow.add_node("compile_report", compile_final_report)
 
-    workflow.set_entry_point("initialize")
-    workflow.add_edge("initialize", "gather_financials")
-    workflow.add_edge("gather_financials", "section_1_1")
-    workflow.add_edge("section_1_1", "section_1_2")
-    workflow.add_edge("section_1_2", "section_1_3")
-    workflow.add_edge("section_1_3", "section_1_4")
-    workflow.add_edge("section_1_4", "section_1_5")
-    workflow.add_edge("section_1_5", "section_2_1")
-    workflow.add_edge("section_2_1", "section_2_2")
-    workflow.add_edge("section_2_2", "section_2_3")
-    workflow.add_edge("section_2_3", "section_3_1")
-    workflow.add_edge("section_3_1", "section_3_2")
-    workflow.add_edge("section_3_2", "section_3_3")
-    workflow.add_edge("section_3_3", "section_4_1")
-    workflow.add_edge("section_4_1", "section_4_2")
-    workflow.add_edge("section_4_2", "section_4_3")
-    workflow.add_edge("section_4_3", "section_4_4")
-    workflow.add_edge("section_4_4", "section_5_1")
-    workflow.add_edge("section_5_1", "section_5_2")
-    workflow.add_edge("section_5_2", "section_6_1")
-    workflow.add_edge("section_6_1", "section_6_2")
-    workflow.add_edge("section_6_2", "section_6_3")
-    workflow.add_edge("section_6_3", "section_7_1")
-    workflow.add_edge("section_7_1", "section_8_1")
-    workflow.add_edge("section_8_1", "section_8_2")
-    workflow.add_edge("section_8_2", "section_8_3")
-    workflow.add_edge("section_8_3", "section_8_4")
-    workflow.add_edge("section_8_4", "compile_report")
+    if only is None:
+        workflow.set_entry_point("initialize")
+        workflow.add_edge("initialize", "plan_research")
+        workflow.add_edge("plan_research", "gather_financials")
+    for name, (_, _, upstream) in section_nodes.items():
+        if only is not None:
+            upstream = [node for node in upstream if node in only]
+        if not upstream:
+            workflow.add_edge(START, name)
+        else:
+            # A list of sources makes LangGraph wait for all of them before running the node
+            workflow.add_edge(upstream if len(upstream) > 1 else upstream[0], name)
+
+    # Join every section before compiling the report
+    workflow.add_edge(list(section_nodes), "compile_report")
     workflow.add_edge("compile_report", END)
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def get_workflow(use_async: bool = False, checkpoint: bool = False):
+    """Return a compiled workflow, building it once per process and reusing it afterwards.
+
+    The sync graph uses the shared SQLite checkpointer; async callers attach an
+    event-loop bound saver with ``app.copy(update={"checkpointer": saver})``.
+    """
+    return _compiled_workflow(bool(use_async), bool(checkpoint))
+
+
+@lru_cache(maxsize=None)
+def _compiled_workflow(use_async: bool, checkpoint: bool):
+    # Positional, normalised arguments: lru_cache keys on how a call spells them
+    return build_workflow(use_async, checkpoints.get_saver() if checkpoint and not use_async else None)
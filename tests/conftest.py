@@ -0,0 +1,14 @@
+"""Shared fixtures: a throwaway provider cache database per test."""
+
+import pytest
+
+from shallow_dive import cache, config
+
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_DB", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(cache, "_conn", None)
+    yield config.CACHE_DB
+    if cache._conn is not None:
+        cache._conn.close()
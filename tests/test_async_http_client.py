@@ -0,0 +1,33 @@
+"""Async FMP and Alpha Vantage calls share one pooled client per event loop."""
+
+import asyncio
+
+from shallow_dive import config, data_sources
+
+
+def test_calls_on_one_loop_share_a_client_until_closed(monkeypatch):
+    monkeypatch.setattr(config, "CASSETTE_MODE", "")
+    clients = []
+
+    async def fmp_get(client, endpoint, ticker, api_key, **params):
+        clients.append(client)
+        return [{"symbol": ticker}]
+
+    monkeypatch.setattr(data_sources, "_afmp_get", fmp_get)
+
+    async def run():
+        await asyncio.gather(
+            data_sources.aget_company_profile("ACME", "key"),
+            data_sources.aget_financial_data("GBX", "key"),
+        )
+        shared = clients[0]
+        await data_sources.aclose_http_clients()
+        await data_sources.aget_company_profile("ACME", "key")
+        await data_sources.aclose_http_clients()
+        return shared
+
+    shared = asyncio.run(run())
+
+    assert all(client is shared for client in clients[:5])
+    assert shared.is_closed
+    assert clients[5] is not shared and clients[5].is_closed
@@ -0,0 +1,96 @@
+"""The async path keeps blocking fundamentals and prompt work off the event loop."""
+
+import asyncio
+import threading
+
+from langchain_core.messages import AIMessage
+
+from shallow_dive import data_sources, fundamentals_store, sections
+
+
+def _on_loop_thread(threads, name):
+    threads[name] = threading.current_thread() is threading.main_thread()
+
+
+def test_alpha_vantage_normalizes_off_loop(monkeypatch):
+    threads = {}
+
+    async def response(client, function, ticker, api_key):
+        return {}
+
+    def normalize(ticker, overview, income, balance):
+        _on_loop_thread(threads, "normalize")
+        return {"provider": "Alpha Vantage", "metrics": [{"date": "2024-12-31"}]}
+
+    monkeypatch.setattr(data_sources, "_aav_get", response)
+    monkeypatch.setattr(data_sources, "_normalize_alpha_vantage", normalize)
+
+    assert asyncio.run(data_sources.aget_alpha_vantage_financials("ACME", "key"))["provider"] == "Alpha Vantage"
+    assert threads == {"normalize": False}
+
+
+def test_async_financials_ingest_off_loop(monkeypatch):
+    threads = {}
+    financial_data = {"provider": "Financial Modeling Prep", "metrics": [{"date": "2024-12-31"}]}
+
+    async def fundamentals(ticker, fmp_data=None):
+        return financial_data
+
+    async def search_all(queries, num_results=None):
+        return [[] for _ in queries]
+
+    monkeypatch.setattr(sections, "aget_fundamentals", fundamentals)
+    monkeypatch.setattr(sections, "_asearch_all", search_all)
+    monkeypatch.setattr(fundamentals_store, "ingest", lambda ticker, data: _on_loop_thread(threads, "ingest"))
+    state = {"company_name": "Acme", "ticker": "ACME", "sources": [], "source_map": {}, "research_results": {}}
+
+    update = asyncio.run(sections.agather_financial_data(state))
+
+    assert update["financial_metrics"] == financial_data
+    assert threads == {"ingest": False}
+
+
+def test_async_section_builds_prompt_off_loop(monkeypatch):
+    threads = {}
+
+    def build_prompt(state, research):
+        _on_loop_thread(threads, "prompt")
+        return "Write Section 1.1"
+
+    async def invoke(messages, section_id, stream=False, use_cache=True):
+        return AIMessage(content="Snapshot."), {"ttft_s": None, "generation_s": 0.1, "tokens_per_s": 10, "cached": False}
+
+    monkeypatch.setattr(sections, "_ainvoke_llm", invoke)
+    state = {"company_name": "Acme", "ticker": "ACME", "sources": [], "source_map": {}, "research_results": {}}
+
+    update = asyncio.run(sections._arun_section(state, "1.1", build_prompt))
+
+    assert update["section_1_1"] == "Snapshot."
+    assert threads == {"prompt": False}
+
+
+def test_alpha_vantage_cache_off_loop(cache_db, monkeypatch):
+    threads = {}
+    for name in ("get", "set"):
+        method = getattr(data_sources.av_cache, name)
+
+        def recorded(*args, _method=method, _name=name):
+            threads[_name] = threading.current_thread() is threading.main_thread()
+            return _method(*args)
+
+        monkeypatch.setattr(data_sources.av_cache, name, recorded)
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {"Symbol": "ACME"}
+
+    class Client:
+        async def get(self, url, params=None):
+            return Response()
+
+    data = asyncio.run(data_sources._aav_get(Client(), "OVERVIEW", "ACME", "key"))
+
+    assert data == {"Symbol": "ACME"}
+    assert threads == {"get": False, "set": False}
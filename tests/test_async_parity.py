@@ -0,0 +1,66 @@
+"""The async workflow produces the same report state as the sync one."""
+
+import asyncio
+import hashlib
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from shallow_dive import config, data_sources, runner
+from shallow_dive.workflow import build_workflow
+
+
+class _Search:
+    def invoke(self, request):
+        digest = hashlib.sha256(request["query"].encode()).hexdigest()[:8]
+        return [{"url": f"https://example.com/{digest}", "title": request["query"], "content": f"Finding {digest}."}]
+
+    async def ainvoke(self, request):
+        return self.invoke(request)
+
+
+class _LLM:
+    """Answers with a digest of the prompt, so equal reports mean equal prompts."""
+
+    model_name = "test-model"
+    temperature = 0.3
+
+    def invoke(self, messages, **kwargs):
+        digest = hashlib.sha256("".join(message.content for message in messages).encode()).hexdigest()[:12]
+        return AIMessage(content=f"Analysis {digest}.")
+
+    async def ainvoke(self, messages, **kwargs):
+        return self.invoke(messages)
+
+
+def _fmp(endpoint, url):
+    return [{"date": f"{year}-12-31", "symbol": "ACME", "revenue": year * 10.0, "netIncome": year * 1.0} for year in (2023, 2022)]
+
+
+async def _afmp(client, endpoint, url):
+    return _fmp(endpoint, url)
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_DB", "")
+    monkeypatch.setattr(config, "FUNDAMENTALS_STORE", str(tmp_path / "fundamentals"))
+    monkeypatch.setattr(config, "FMP_API_KEY", "key")
+    monkeypatch.setattr(config, "ALPHA_VANTAGE_KEY", None)
+    monkeypatch.setattr(config, "search_tool", _Search())
+    monkeypatch.setattr(config, "llm", _LLM())
+    monkeypatch.setattr(data_sources, "_fmp_request", _fmp)
+    monkeypatch.setattr(data_sources, "_afmp_request", _afmp)
+
+
+def test_sync_and_async_runs_agree(offline):
+    state = runner._initial_state("Acme", "ACME")
+
+    sync_state = build_workflow().invoke(dict(state))
+    async_state = asyncio.run(runner._closing_http_clients(build_workflow(use_async=True).ainvoke(dict(state))))
+
+    section_keys = [key for key in state if key.startswith("section_")]
+    assert all(sync_state[key].startswith("Analysis ") for key in section_keys)
+    assert {key: async_state[key] for key in section_keys} == {key: sync_state[key] for key in section_keys}
+    assert async_state["financial_metrics"] == sync_state["financial_metrics"] and sync_state["financial_metrics"]["income_statement"]
+    assert async_state["source_map"] == sync_state["source_map"]
@@ -0,0 +1,40 @@
+"""Per-run CLI flags reach every company of a batch, whichever way the batch runs."""
+
+import json
+import sys
+
+import pytest
+
+from shallow_dive import config, runner
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    companies = tmp_path / "companies.json"
+    companies.write_text(json.dumps([{"name": "Acme", "ticker": "ACME"}, {"name": "Globex", "ticker": "GBX"}]))
+    monkeypatch.setattr(config, "FMP_API_KEY", None)
+    monkeypatch.setattr(config, "validate_api_keys", lambda: [])
+    calls = []
+
+    def analyze(company_name, ticker, output_dir=".", **kwargs):
+        calls.append(kwargs)
+        return {"company": company_name, "ticker": ticker, "status": "Success"}
+
+    async def aanalyze(company_name, ticker, output_dir=".", **kwargs):
+        return analyze(company_name, ticker, output_dir, **kwargs)
+
+    monkeypatch.setattr(runner, "analyze_single_company", analyze)
+    monkeypatch.setattr(runner, "aanalyze_single_company", aanalyze)
+    return str(companies), tmp_path, calls
+
+
+@pytest.mark.parametrize("mode", [[], ["--concurrency", "2"], ["--async", "--concurrency", "2"]])
+def test_stream_tokens_and_cache_bypass_reach_every_company(batch, monkeypatch, mode):
+    companies, output_dir, calls = batch
+    argv = ["shallow_dive", "--batch", companies, "--output-dir", str(output_dir), "--stream-tokens", "--no-llm-cache"]
+    monkeypatch.setattr(sys, "argv", argv + mode)
+
+    runner.main()
+
+    assert len(calls) == 2
+    assert all(call["stream_tokens"] and call["llm_cache_bypass"] for call in calls)
@@ -0,0 +1,53 @@
+"""Cache entries expire after their TTL and each namespace evicts its least recently used entries."""
+
+import pytest
+
+from shallow_dive import cache
+
+
+@pytest.fixture
+def clock(cache_db, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_but_stay_peekable(clock):
+    store = cache.DiskCache("search", max_entries=10)
+    store.set("q", ["result"], ttl_seconds=60)
+
+    clock[0] += 59
+    assert store.get("q") == ["result"]
+    clock[0] += 2
+    assert store.get("q") is None
+    assert store.peek("q") == ["result"]
+    assert store.stats() == {"hits": 1, "misses": 1}
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    store = cache.DiskCache("search", max_entries=2)
+    store.set("a", 1, ttl_seconds=60)
+    clock[0] += 1
+    store.set("b", 2, ttl_seconds=60)
+    clock[0] += 1
+    store.get("a")  # Reading "a" makes "b" the least recently used
+    clock[0] += 1
+    store.set("c", 3, ttl_seconds=60)
+
+    assert [store.peek(key) for key in ("a", "b", "c")] == [1, None, 3]
+
+
+def test_namespaces_are_capped_separately(clock):
+    search, llm = cache.DiskCache("search", max_entries=1), cache.DiskCache("llm", max_entries=1)
+    search.set("k", "search value", ttl_seconds=60)
+    llm.set("k", "llm value", ttl_seconds=60)
+
+    assert (search.get("k"), llm.get("k")) == ("search value", "llm value")
+
+
+def test_disabled_without_a_database(monkeypatch):
+    monkeypatch.setattr(cache.config, "CACHE_DB", "")
+    store = cache.DiskCache("search", max_entries=10)
+    store.set("q", ["result"], ttl_seconds=60)
+
+    assert store.get("q") is None and not store.enabled
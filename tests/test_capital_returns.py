@@ -0,0 +1,78 @@
+"""Return metrics computed from reported fundamentals."""
+
+import pandas as pd
+import pytest
+
+from shallow_dive import capital_returns
+
+
+def _metrics(**metric_fields):
+    return {
+        "income_statement": [{"date": "2023-12-31", "revenue": 1000, "operatingIncome": 200, "incomeBeforeTax": 180, "incomeTaxExpense": 45, "netIncome": 135}],
+        "metrics": [{"date": "2023-12-31", **metric_fields}],
+    }
+
+
+def test_cash_conversion_falls_back_to_operating_cash_flow_over_net_income():
+    # FCF yield x market cap would give 50 / 135; the column is OCF / NI
+    fields = {"operatingCashFlowPerShare": 6.0, "netIncomePerShare": 4.0, "freeCashFlowYield": 0.05, "marketCap": 1000}
+    results = capital_returns.compute_returns(capital_returns.company_frame("EXM", _metrics(**fields)))
+
+    assert results["cash_conversion"].iloc[0] == pytest.approx(1.5)
+
+
+def test_cash_conversion_prefers_reported_income_quality():
+    fields = {"incomeQuality": 1.2, "operatingCashFlowPerShare": 6.0, "netIncomePerShare": 4.0}
+    results = capital_returns.compute_returns(capital_returns.company_frame("EXM", _metrics(**fields)))
+
+    assert results["cash_conversion"].iloc[0] == pytest.approx(1.2)
+
+
+FINANCIALS = {
+    "income_statement": [
+        {"date": "2022-12-31", "revenue": 1000, "operatingIncome": 200, "incomeBeforeTax": 180, "incomeTaxExpense": 45, "netIncome": 135},
+        {"date": "2023-12-31", "revenue": 1200, "operatingIncome": 260, "incomeBeforeTax": 240, "incomeTaxExpense": 60, "netIncome": 180},
+    ],
+    "metrics": [
+        {"date": "2022-12-31", "investedCapital": 1000},
+        {"date": "2023-12-31", "investedCapital": 1200},
+    ],
+    "ratios": [
+        {"date": "2022-12-31", "assetTurnover": 0.5, "financialLeverageRatio": 2.0},
+        {"date": "2023-12-31", "assetTurnover": 0.6, "financialLeverageRatio": 2.0},
+    ],
+}
+
+
+def test_dupont_and_roic_from_reported_statements():
+    latest = capital_returns.compute_returns(capital_returns.company_frame("EXM", FINANCIALS)).iloc[-1]
+
+    assert latest["revenue_growth"] == pytest.approx(0.2)
+    assert latest["operating_margin"] == pytest.approx(260 / 1200)
+    assert (latest["interest_burden"], latest["tax_burden"]) == pytest.approx((240 / 260, 0.75))
+    assert latest["net_margin"] == pytest.approx(0.15)
+    assert latest["roe"] == pytest.approx(0.15 * 0.6 * 2.0)  # Margin x turnover x leverage without a reported ROE
+    assert latest["roic"] == pytest.approx(260 * 0.75 / 1200)
+    assert latest["incremental_roic"] == pytest.approx((195 - 150) / 200)
+
+
+def test_universe_periods_do_not_leak_across_tickers():
+    frame = capital_returns.company_frame("AAA", FINANCIALS)
+    other = capital_returns.company_frame("BBB", FINANCIALS)
+
+    results = capital_returns.compute_returns(pd.concat([other, frame], ignore_index=True))
+
+    assert list(results["ticker"]) == ["AAA", "AAA", "BBB", "BBB"]
+    first_periods = results.iloc[[0, 2]]  # Nothing earlier to grow from within each ticker
+    assert first_periods[["revenue_growth", "incremental_roic"]].isna().all().all()
+    assert results["revenue_growth"].iloc[[1, 3]].tolist() == pytest.approx([0.2, 0.2])
+
+
+def test_tables_are_markdown_with_summaries():
+    dupont = capital_returns.dupont_table("EXM", FINANCIALS)
+    roic = capital_returns.roic_table("EXM", FINANCIALS)
+
+    assert "| 2023-12 | 20.0% | 21.7% |" in dupont
+    assert "DuPont ROE log change 2022->2023" in dupont
+    assert "Period averages: ROIC 15.6%" in roic
+    assert capital_returns.dupont_table("EXM", {}) == ""
@@ -0,0 +1,102 @@
+"""Recorded provider calls replay offline, without API keys or tiktoken data."""
+
+import sys
+import types
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from shallow_dive import cassettes, config, context_budget, sections
+
+
+class _LLM:
+    model_name = "test-model"
+    temperature = 0.3
+
+    def invoke(self, messages, **kwargs):
+        return AIMessage(content="Recorded snapshot.", usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12})
+
+
+def _tiktoken(available: bool) -> types.ModuleType:
+    """A tiktoken stand-in counting one token per character, or one that cannot load its data."""
+    module = types.ModuleType("tiktoken")
+    encoding = types.SimpleNamespace(encode=lambda text, **kwargs: list(text), decode="".join)
+
+    def encoding_for_model(model):
+        if not available:
+            raise OSError("no tiktoken data offline")
+        return encoding
+
+    module.encoding_for_model = encoding_for_model
+    module.get_encoding = encoding_for_model
+    return module
+
+
+STATE = {
+    "company_name": "Example Corp",
+    "ticker": "EXM",
+    "company_overview": {"sector": "Industrials", "description": "Makes widgets. " * 40},
+    # Longer than its 1,500-token budget under either count, so the fitted JSON depends on the tokenizer
+    "financial_metrics": {f"{year}-12-31": {"revenue": year * 1000, "netIncome": year * 100} for year in range(1900, 2024)},
+    "web_research": [],
+}
+
+
+@pytest.fixture
+def cassette(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CASSETTE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "LLM_CACHE", False)
+    context_budget._encoding.cache_clear()
+    yield
+    context_budget._encoding.cache_clear()
+
+
+def _run(monkeypatch, mode: str, tiktoken_available: bool, llm) -> str:
+    monkeypatch.setattr(config, "CASSETTE_MODE", mode)
+    monkeypatch.setitem(sys.modules, "tiktoken", _tiktoken(tiktoken_available))
+    monkeypatch.setattr(config, "llm", llm)
+    context_budget._encoding.cache_clear()
+    messages = sections._section_messages(STATE, [], sections._prompt_section_1_1)
+    response, _ = sections._invoke_llm(messages, "1.1")
+    return response.content
+
+
+def test_recorded_section_replays_without_tiktoken_data(cassette, monkeypatch):
+    recorded = _run(monkeypatch, "record", True, cassettes.RecordingLLM(_LLM()))
+    replayed = _run(monkeypatch, "replay", False, cassettes.ReplayLLM())
+
+    assert replayed == recorded == "Recorded snapshot."
+
+
+class _Tool:
+    def invoke(self, payload):
+        return [{"url": "https://example.com/a", "title": "A", "content": payload["query"]}]
+
+
+class _Response:
+    status_code = 200
+    headers = {}
+
+    def json(self):
+        return [{"symbol": "EXM", "revenue": 100.0}]
+
+
+class _Session:
+    def get(self, url, params=None, **kwargs):
+        return _Response()
+
+
+def test_search_and_http_round_trip_without_api_keys(cassette, monkeypatch):
+    monkeypatch.setattr(config, "CASSETTE_LATENCY", "")
+    url = "https://financialmodelingprep.com/stable/profile?symbol=EXM&apikey={key}"
+    payload = {"query": "Example Corp margins", "max_results": 5}
+    searched = cassettes.RecordingSearch(_Tool()).invoke(payload)
+    fetched = cassettes.RecordingSession(_Session()).get(url.format(key="recording-key")).json()
+
+    assert cassettes.recorded("http/fmp") and cassettes.recorded("search")
+    assert cassettes.ReplaySearch().invoke(payload) == searched
+    assert cassettes.ReplaySession().get(url.format(key="other-key")).json() == fetched
+    assert cassettes.ReplaySearch().invoke({**payload, "query": "unrecorded"}) == []
+    assert cassettes.ReplaySession().get(url.format(key="k").replace("EXM", "NONE")).status_code == 404
+    with pytest.raises(cassettes.CassetteMiss):
+        cassettes.ReplayLLM().invoke([AIMessage(content="unrecorded")])
@@ -0,0 +1,69 @@
+"""Context blocks are fitted to their token budgets without breaking their structure."""
+
+import copy
+import json
+
+import pytest
+
+from shallow_dive import config, context_budget
+from shallow_dive.context_budget import budget, condense, count_tokens, fit_blocks, fit_json
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Four characters per token, whatever tiktoken data this machine has
+    monkeypatch.setattr(context_budget, "_encoding", lambda: None)
+
+
+METRICS = {
+    "income_statement": [{"date": f"{year}-12-31", "revenue": year * 1000.0, "netIncome": year * 100.0, "note": None} for year in range(2023, 2013, -1)],
+    "profile": {"description": "Acme makes widgets for water utilities. " * 40, "sector": "Industrials"},
+}
+
+
+def test_fit_json_keeps_valid_json_and_the_newest_periods():
+    original = copy.deepcopy(METRICS)
+
+    text = fit_json(METRICS, 200)
+    fitted = json.loads(text)
+
+    assert count_tokens(text) <= 200
+    assert fitted["income_statement"][0]["date"] == "2023-12-31"
+    assert len(fitted["income_statement"]) < 10
+    assert "note" not in fitted["income_statement"][0]
+    assert METRICS == original
+
+
+def test_fit_json_within_budget_is_only_compacted():
+    small = {"revenue": 1.0, "margin": None}
+
+    assert fit_json(small, 100) == '{"revenue":1.0}'
+
+
+def test_fit_blocks_keeps_whole_blocks_then_condenses_the_one_that_overflows():
+    first, second = "A" * 200, "First claim here. Second claim follows. " * 10
+    fitted = fit_blocks([first, second, "Never reached."], 130)
+
+    assert fitted[0] == first
+    assert fitted[1].startswith("First claim here.") and fitted[1] != second.strip()
+    assert len(fitted) == 2 and sum(count_tokens(block) + 1 for block in fitted) <= 130
+
+
+def test_fit_blocks_drops_a_remainder_too_small_to_condense():
+    assert fit_blocks(["A" * 200, "B" * 400], 60) == ["A" * 200]
+
+
+def test_condense_keeps_every_paragraphs_lead_sentence_first():
+    text = "\n\n".join(f"Lead {n} holds the claim. Detail {n} supports it at length. More detail {n} follows." for n in range(3))
+
+    condensed = condense(text, 30)
+
+    assert count_tokens(condensed) <= 30
+    assert [paragraph.split(".")[0] for paragraph in condensed.split("\n\n")] == ["Lead 0 holds the claim", "Lead 1 holds the claim", "Lead 2 holds the claim"]
+    assert "Detail" not in condensed and condensed.endswith("…")
+
+
+def test_budget_scale(monkeypatch):
+    monkeypatch.setattr(config, "CONTEXT_BUDGET_SCALE", 0.5)
+
+    assert budget(1500) == 750
@@ -0,0 +1,111 @@
+"""FMP statements are cached per endpoint and revalidated by the latest reported period."""
+
+import asyncio
+import threading
+
+import pytest
+
+from shallow_dive import cache, data_sources
+from shallow_dive.resilience import ProviderError
+
+ROWS_2023 = [{"date": "2023-12-31", "revenue": 100.0}]
+ROWS_2024 = [{"date": "2024-12-31", "revenue": 120.0}]
+
+
+def _expire_all():
+    conn = cache._connection()
+    conn.execute("UPDATE cache SET expires_at = 0")
+    conn.commit()
+
+
+@pytest.fixture
+def fmp(cache_db, monkeypatch):
+    """Fake FMP API: statements return ``rows``; the one-row period probe can be made to fail."""
+    server = {"rows": ROWS_2023, "probe_error": None, "fetch_error": None, "urls": []}
+
+    def respond(url):
+        server["urls"].append(url)
+        if "limit=1" in url:
+            if server["probe_error"]:
+                raise server["probe_error"]
+            return server["rows"][:1]
+        if server["fetch_error"]:
+            raise server["fetch_error"]
+        return server["rows"]
+
+    async def arespond(client, endpoint, url):
+        return respond(url)
+
+    monkeypatch.setattr(data_sources, "_fmp_request", lambda endpoint, url: respond(url))
+    monkeypatch.setattr(data_sources, "_afmp_request", arespond)
+    return server
+
+
+def _get(mode):
+    if mode == "sync":
+        return data_sources._fmp_get("income-statement", "ACME", "key", limit=5)
+    return asyncio.run(data_sources._afmp_get(None, "income-statement", "ACME", "key", limit=5))
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_unchanged_period_renews_without_downloading(fmp, mode):
+    _get(mode)
+    _expire_all()
+    fmp["urls"].clear()
+
+    assert _get(mode) == ROWS_2023
+    assert [("limit=1" in url) for url in fmp["urls"]] == [True]  # Only the one-row period probe
+    assert _get(mode) == ROWS_2023 and len(fmp["urls"]) == 1  # Renewed: served from the cache again
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_new_period_downloads_again(fmp, mode):
+    _get(mode)
+    _expire_all()
+    fmp["rows"] = ROWS_2024
+
+    assert _get(mode) == ROWS_2024
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_failed_period_probe_falls_back_to_a_fetch(fmp, mode):
+    _get(mode)
+    _expire_all()
+    fmp["rows"] = ROWS_2024
+    fmp["probe_error"] = ProviderError("circuit open for fmp", retryable=True)
+
+    assert _get(mode) == ROWS_2024
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_expired_copy_served_when_probe_and_fetch_fail(fmp, mode):
+    _get(mode)
+    _expire_all()
+    fmp["probe_error"] = fmp["fetch_error"] = ProviderError("circuit open for fmp", retryable=True)
+
+    assert _get(mode) == ROWS_2023
+
+
+def test_missing_entry_still_raises(fmp):
+    fmp["fetch_error"] = ProviderError("circuit open for fmp", retryable=True)
+
+    with pytest.raises(ProviderError):
+        _get("sync")
+
+
+def test_async_cache_access_off_the_event_loop(fmp, monkeypatch):
+    threads = {}
+    for name in ("get", "peek", "renew", "set"):
+        method = getattr(data_sources.fmp_cache, name)
+
+        def recorded(*args, _method=method, _name=name):
+            threads.setdefault(_name, set()).add(threading.current_thread() is threading.main_thread())
+            return _method(*args)
+
+        monkeypatch.setattr(data_sources.fmp_cache, name, recorded)
+
+    _get("async")
+    _expire_all()
+    _get("async")
+
+    assert threads == {"get": {False}, "peek": {False}, "renew": {False}, "set": {False}}
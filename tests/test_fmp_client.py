@@ -0,0 +1,63 @@
+"""A company's FMP endpoints are fetched concurrently over one pooled connection pool."""
+
+import asyncio
+import threading
+
+import pytest
+
+from shallow_dive import config, data_sources
+
+ENDPOINTS = len(data_sources.FINANCIAL_ENDPOINTS)
+
+
+def _rows(url):
+    return [{"date": "2023-12-31", "symbol": "ACME", "url": url}]
+
+
+@pytest.fixture(autouse=True)
+def uncached(monkeypatch):
+    monkeypatch.setattr(config, "CACHE_DB", "")
+    monkeypatch.setattr(config, "CASSETTE_MODE", "")
+
+
+def test_sync_endpoints_are_in_flight_together(monkeypatch):
+    # Every endpoint must be waiting at once for the barrier to open
+    barrier = threading.Barrier(ENDPOINTS, timeout=5)
+
+    def request(endpoint, url):
+        barrier.wait()
+        return _rows(url)
+
+    monkeypatch.setattr(data_sources, "_fmp_request", request)
+
+    data = data_sources.get_financial_data("ACME", "key")
+
+    assert data["income_statement"] and data["ratios"] and data["metrics"]
+
+
+def test_async_endpoints_are_in_flight_together(monkeypatch):
+    async def run():
+        barrier = asyncio.Barrier(ENDPOINTS)
+
+        async def request(client, endpoint, url):
+            await asyncio.wait_for(barrier.wait(), timeout=5)
+            return _rows(url)
+
+        monkeypatch.setattr(data_sources, "_afmp_request", request)
+        try:
+            return await data_sources.aget_financial_data("ACME", "key")
+        finally:
+            await data_sources.aclose_http_clients()
+
+    data = asyncio.run(run())
+
+    assert data["income_statement"] and data["ratios"] and data["metrics"]
+
+
+def test_sync_session_is_shared_and_pooled(monkeypatch):
+    monkeypatch.setattr(data_sources, "_session", None)
+
+    session = data_sources._http_session()
+
+    assert data_sources._http_session() is session
+    assert session.get_adapter("https://financialmodelingprep.com")._pool_maxsize >= ENDPOINTS
@@ -0,0 +1,48 @@
+"""Batch prefetch fetches profiles and TTM metrics in multi-symbol chunks."""
+
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from shallow_dive import config, data_sources
+
+TICKERS = ["AAA", "BBB", "CCC", "DDD", "EEE"]
+
+
+@pytest.fixture
+def fmp(cache_db, monkeypatch):
+    """Fake FMP API; multi-symbol requests leave out EEE, which must then be fetched on its own."""
+    requests = []
+
+    def respond(endpoint, url):
+        symbols = parse_qs(urlsplit(url).query)["symbol"][0].split(",")
+        requests.append((endpoint, symbols))
+        if len(symbols) > 1:
+            symbols = [symbol for symbol in symbols if symbol != "EEE"]
+        return [{"symbol": symbol, "date": "2023-12-31", "companyName": f"{symbol} Inc"} for symbol in symbols]
+
+    monkeypatch.setattr(config, "FMP_BULK_CHUNK_SIZE", 2)
+    monkeypatch.setattr(data_sources, "_fmp_request", respond)
+    return requests
+
+
+def test_multi_symbol_endpoints_are_chunked(fmp):
+    prefetched = data_sources.prefetch_fmp_universe(TICKERS, "key")
+
+    profiles = [symbols for endpoint, symbols in fmp if endpoint == "profile"]
+    assert profiles == [["AAA", "BBB"], ["CCC", "DDD"], ["EEE"]]
+    statements = [symbols for endpoint, symbols in fmp if endpoint not in data_sources.FMP_MULTI_SYMBOL_ENDPOINTS]
+    assert all(len(symbols) == 1 for symbols in statements)
+    assert {prefetched[ticker]["profile"]["companyName"] for ticker in TICKERS} == {f"{ticker} Inc" for ticker in TICKERS}
+    assert all(prefetched[ticker]["financial_data"]["income_statement"] for ticker in TICKERS)
+
+
+def test_cached_tickers_are_not_requested_again(fmp):
+    data_sources.prefetch_fmp_universe(TICKERS[:2], "key")
+    fmp.clear()
+
+    data_sources.prefetch_fmp_universe(TICKERS[:3], "key")
+
+    assert {(endpoint, tuple(symbols)) for endpoint, symbols in fmp} == {
+        (endpoint, ("CCC",)) for endpoint, _ in data_sources.FINANCIAL_ENDPOINTS
+    } | {("profile", ("CCC",))}
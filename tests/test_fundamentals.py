@@ -0,0 +1,90 @@
+"""Alpha Vantage backs up FMP, after a delay (fallback) or at once (race)."""
+
+import asyncio
+import time
+
+import pytest
+
+from shallow_dive import config, fundamentals
+
+ROWS = [{"date": "2023-12-31", "revenue": 100.0}]
+
+
+def _fetched(name: str, usable: bool) -> dict:
+    return {"provider": name, "income_statement": ROWS} if usable else {"provider": name, "income_statement": []}
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Fake FMP and Alpha Vantage fetchers; set ``delay``/``usable`` per provider, read ``calls``."""
+    behaviour = {"fmp": {"delay": 0.0, "usable": True}, "alphavantage": {"delay": 0.0, "usable": True}, "calls": []}
+
+    def provider(name):
+        def fetch(ticker, api_key):
+            behaviour["calls"].append(name)
+            time.sleep(behaviour[name]["delay"])
+            return _fetched(name, behaviour[name]["usable"])
+
+        async def afetch(ticker, api_key):
+            behaviour["calls"].append(name)
+            await asyncio.sleep(behaviour[name]["delay"])
+            return _fetched(name, behaviour[name]["usable"])
+
+        return name, fetch, afetch
+
+    monkeypatch.setattr(fundamentals, "FUNDAMENTALS_PROVIDERS", [provider("fmp"), provider("alphavantage")])
+    monkeypatch.setattr(config, "FMP_API_KEY", "key")
+    monkeypatch.setattr(config, "ALPHA_VANTAGE_KEY", "key")
+    monkeypatch.setattr(config, "FUNDAMENTALS_STRATEGY", "fallback")
+    monkeypatch.setattr(config, "FUNDAMENTALS_FALLBACK_SECONDS", 0.2)
+    return behaviour
+
+
+def _get(mode, fmp_data=None):
+    if mode == "sync":
+        return fundamentals.get_fundamentals("ACME", fmp_data)
+    return asyncio.run(fundamentals.aget_fundamentals("ACME", fmp_data))
+
+
+MODES = pytest.mark.parametrize("mode", ["sync", "async"])
+
+
+@MODES
+def test_fast_fmp_answer_needs_no_fallback(providers, mode):
+    assert _get(mode)["provider"] == "fmp"
+    assert providers["calls"] == ["fmp"]
+
+
+@MODES
+def test_empty_fmp_answer_falls_back_at_once(providers, mode):
+    providers["fmp"]["usable"] = False
+    started = time.perf_counter()
+
+    assert _get(mode)["provider"] == "alphavantage"
+    assert time.perf_counter() - started < 0.2
+
+
+@MODES
+def test_slow_fmp_is_backed_up_after_the_fallback_delay(providers, mode):
+    providers["fmp"]["delay"] = 1.0
+    started = time.perf_counter()
+
+    assert _get(mode)["provider"] == "alphavantage"
+    assert providers["calls"] == ["fmp", "alphavantage"]
+    assert 0.2 <= time.perf_counter() - started < 1.0
+
+
+@MODES
+def test_race_starts_every_provider_at_once(providers, mode, monkeypatch):
+    monkeypatch.setattr(config, "FUNDAMENTALS_STRATEGY", "race")
+    providers["fmp"]["delay"] = 0.1
+
+    assert _get(mode)["provider"] == "alphavantage"
+    assert sorted(providers["calls"]) == ["alphavantage", "fmp"]
+
+
+@MODES
+def test_prefetched_data_skips_providers(providers, mode):
+    assert _get(mode, _fetched("fmp", True))["provider"] == "fmp"
+    assert _get(mode, _fetched("fmp", False))["provider"] == "alphavantage"
+    assert providers["calls"] == ["alphavantage"]
@@ -0,0 +1,41 @@
+"""Concurrent ingests into one partition keep every period; storage errors are logged, not raised."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from shallow_dive import config, fundamentals_store
+
+
+def _ingest_year(store: str, year: int) -> int:
+    config.FUNDAMENTALS_STORE = store
+    return fundamentals_store.ingest("ACME", {"ratios": [{"date": f"{year}-12-31", "netProfitMargin": year / 10000}]})
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "FUNDAMENTALS_STORE", str(tmp_path / "fundamentals"))
+    return config.FUNDAMENTALS_STORE
+
+
+def test_process_pool_ingests_keep_every_period(store):
+    years = range(2000, 2016)
+    with ProcessPoolExecutor(max_workers=4, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(_ingest_year, [store] * len(years), years))
+
+    stored = fundamentals_store.read("ratios", ["netProfitMargin"], tickers=["ACME"])
+    assert sorted(day.year for day in stored["date"]) == list(years)
+
+
+def test_storage_error_is_logged(store, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(fundamentals_store.logger, "warning", warnings.append)
+
+    def disk_full(path, frame):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(fundamentals_store, "_write", disk_full)
+
+    assert fundamentals_store.ingest("ACME", {"ratios": [{"date": "2024-12-31", "netProfitMargin": 0.2}]}) == 0
+    assert warnings == ["Fundamentals store error for ACME: No space left on device"]
@@ -0,0 +1,86 @@
+"""Identical section prompts are answered from the LLM cache, looked up off the event loop."""
+
+import asyncio
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from shallow_dive import config, sections
+
+
+class _LLM:
+    model_name = "test-model"
+    temperature = 0.3
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=f"Answer {self.calls}.", usage_metadata={"input_tokens": 10, "output_tokens": 3, "total_tokens": 13})
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+MESSAGES = [SystemMessage(content="You are an analyst."), HumanMessage(content="Write Section 1.1")]
+
+
+def test_async_llm_cache_lookup_off_the_event_loop(cache_db, monkeypatch):
+    llm = _LLM()
+    monkeypatch.setattr(config, "llm", llm)
+    monkeypatch.setattr(config, "LLM_CACHE", True)
+    threads = {}
+    for name in ("get", "set"):
+        method = getattr(sections.llm_cache, name)
+
+        def recorded(*args, _method=method, _name=name):
+            threads[_name] = threading.current_thread() is threading.main_thread()
+            return _method(*args)
+
+        monkeypatch.setattr(sections.llm_cache, name, recorded)
+
+    fresh, _ = asyncio.run(sections._ainvoke_llm(MESSAGES, "1.1"))
+    cached, metrics = asyncio.run(sections._ainvoke_llm(MESSAGES, "1.1"))
+
+    assert cached.content == fresh.content == "Answer 1." and llm.calls == 1
+    assert metrics["cached"] is True
+    assert threads == {"get": False, "set": False}
+
+
+def test_identical_requests_hit_and_changed_ones_miss(cache_db, monkeypatch):
+    llm = _LLM()
+    monkeypatch.setattr(config, "llm", llm)
+    monkeypatch.setattr(config, "LLM_CACHE", True)
+
+    first, _ = sections._invoke_llm(MESSAGES, "1.1")
+    again, metrics = sections._invoke_llm(MESSAGES, "1.1")
+    other, _ = sections._invoke_llm(MESSAGES[:1] + [HumanMessage(content="Write Section 1.2")], "1.2")
+    monkeypatch.setattr(llm, "temperature", 0.7)
+    warmer, _ = sections._invoke_llm(MESSAGES, "1.1")
+
+    assert again.content == first.content == "Answer 1." and metrics["cached"] is True
+    assert (other.content, warmer.content) == ("Answer 2.", "Answer 3.")
+
+
+def test_bypass_skips_the_lookup_but_stores_the_fresh_completion(cache_db, monkeypatch):
+    llm = _LLM()
+    monkeypatch.setattr(config, "llm", llm)
+    monkeypatch.setattr(config, "LLM_CACHE", True)
+    sections._invoke_llm(MESSAGES, "1.1")
+
+    fresh, metrics = sections._invoke_llm(MESSAGES, "1.1", use_cache=False)
+    cached, _ = sections._invoke_llm(MESSAGES, "1.1")
+
+    assert fresh.content == cached.content == "Answer 2." and metrics["cached"] is False
+
+
+def test_every_call_reaches_the_model_with_llm_cache_off(cache_db, monkeypatch):
+    llm = _LLM()
+    monkeypatch.setattr(config, "llm", llm)
+    monkeypatch.setattr(config, "LLM_CACHE", False)
+
+    sections._invoke_llm(MESSAGES, "1.1")
+    sections._invoke_llm(MESSAGES, "1.1")
+
+    assert llm.calls == 2
@@ -0,0 +1,65 @@
+"""Streamed completions emit their tokens as they arrive and report TTFT and throughput."""
+
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage, SystemMessage
+
+from shallow_dive import config, sections
+from shallow_dive.resilience import PartialResponseError
+
+MESSAGES = [SystemMessage(content="You are an analyst."), HumanMessage(content="Write Section 1.1")]
+
+
+class _StreamingLLM:
+    """Streams chunks on a fake clock: 0.5s to the first token, 0.1s per chunk after it."""
+
+    model_name = "test-model"
+    temperature = 0.3
+
+    def __init__(self, clock, fail_after=None):
+        self.clock = clock
+        self.fail_after = fail_after
+
+    def stream(self, messages, **kwargs):
+        self.clock[0] += 0.5
+        for index, piece in enumerate(["Acme ", "makes ", "widgets."]):
+            if index == self.fail_after:
+                raise ConnectionError("stream dropped")
+            if index:
+                self.clock[0] += 0.1
+            yield AIMessageChunk(content=piece)
+        yield AIMessageChunk(content="", usage_metadata={"input_tokens": 40, "output_tokens": 6, "total_tokens": 46, "input_token_details": {"cache_read": 32}})
+
+
+@pytest.fixture
+def events(monkeypatch):
+    clock = [10.0]
+    written = []
+    monkeypatch.setattr(sections.time, "perf_counter", lambda: clock[0])
+    monkeypatch.setattr(sections, "_stream_writer", lambda: written.append)
+    monkeypatch.setattr(config, "LLM_CACHE", False)
+    return clock, written
+
+
+def test_streamed_completion_metrics(events, monkeypatch):
+    clock, written = events
+    monkeypatch.setattr(config, "llm", _StreamingLLM(clock))
+
+    response, metrics = sections._invoke_llm(MESSAGES, "1.1", stream=True)
+
+    assert response.content == "Acme makes widgets."
+    assert [event["delta"] for event in written if "delta" in event] == ["Acme ", "makes ", "widgets."]
+    assert written[-1] == {"section": "1.1", "done": True, "metrics": metrics}
+    assert metrics["ttft_s"] == pytest.approx(0.5)
+    assert metrics["generation_s"] == pytest.approx(0.7)
+    assert metrics["tokens_per_s"] == pytest.approx(30.0)  # 6 tokens over the 0.2s after the first one
+    assert (metrics["input_tokens"], metrics["cached_input_tokens"]) == (40, 32)
+
+
+def test_stream_failing_after_first_token_is_not_retried(events, monkeypatch):
+    clock, written = events
+    monkeypatch.setattr(config, "llm", _StreamingLLM(clock, fail_after=1))
+
+    with pytest.raises(PartialResponseError):
+        sections._invoke_llm(MESSAGES, "1.1", stream=True)
+
+    assert [event["delta"] for event in written if "delta" in event] == ["Acme "]
@@ -0,0 +1,42 @@
+"""Near-duplicate queries are searched once with a merged query."""
+
+from shallow_dive.queries import coalesce_queries, normalize_query, query_similarity
+
+COMPANY = ("Acme Corp", "ACME")
+
+
+def test_normalization_ignores_company_stopwords_and_suffixes():
+    assert normalize_query("competitive advantage") == normalize_query("competitive advantages")
+    assert normalize_query("Acme Corp competitive advantages and market positioning", COMPANY) == {
+        "competitiv",
+        "advantag",
+        "market",
+        "position",
+    }
+
+
+def test_overlapping_queries_share_one_search():
+    groups = coalesce_queries(
+        [
+            "Acme Corp competitive advantages market position",
+            "Acme Corp market position competitive advantage moat",
+            "Acme Corp debt maturities refinancing",
+            "Acme Corp competitive advantages market position",
+        ],
+        COMPANY,
+    )
+
+    assert groups == [
+        (
+            "Acme Corp competitive advantages market position moat",
+            ["Acme Corp competitive advantages market position", "Acme Corp market position competitive advantage moat"],
+        ),
+        ("Acme Corp debt maturities refinancing", ["Acme Corp debt maturities refinancing"]),
+    ]
+
+
+def test_threshold_above_one_disables_merging():
+    queries = ["Acme margins", "Acme margins trend"]
+
+    assert coalesce_queries(queries, COMPANY, threshold=1.01) == [(query, [query]) for query in queries]
+    assert query_similarity(normalize_query(queries[0], COMPANY), normalize_query(queries[1], COMPANY)) == 1.0
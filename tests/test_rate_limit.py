@@ -0,0 +1,51 @@
+"""Token buckets let a burst through, then queue callers at the configured rate."""
+
+import pytest
+
+from shallow_dive import rate_limit
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_then_queued_at_rate(clock):
+    bucket = rate_limit.TokenBucket(per_minute=60, burst_seconds=10)
+
+    waits = [bucket.reserve() for _ in range(12)]
+
+    assert waits[:10] == [0.0] * 10
+    assert waits[10:] == pytest.approx([1.0, 2.0])
+
+
+def test_refill_is_capped_at_the_burst(clock):
+    bucket = rate_limit.TokenBucket(per_minute=60, burst_seconds=10)
+    for _ in range(10):
+        bucket.reserve()
+    clock[0] += 3600
+
+    assert [bucket.reserve() for _ in range(11)][-1] == pytest.approx(1.0)
+
+
+def test_provider_waits_for_the_tighter_budget_and_settles_usage(clock):
+    limiter = rate_limit.ProviderLimiter("llm", requests_per_minute=600, tokens_per_minute=6000)
+
+    assert limiter._reserve(1000) == 0.0
+    assert limiter._reserve(1000) == pytest.approx(10.0)  # The token budget binds, not the request budget
+
+    limiter.settle(estimated=1000, actual=100)  # Refund what the estimate overcharged
+    assert limiter.tokens.tokens == pytest.approx(-100.0)
+
+
+def test_limiters_are_shared_per_provider(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    monkeypatch.setattr(rate_limit.config, "RATE_LIMITS", {"tavily": (60, 0)})
+
+    limiter = rate_limit.get_limiter("tavily")
+
+    assert rate_limit.get_limiter("tavily") is limiter
+    assert limiter.requests.rate == 1.0 and limiter.tokens is None
+    assert rate_limit.get_limiter("unknown").requests is None
@@ -0,0 +1,80 @@
+"""Regenerating selected sections of a stored run, including runs stored before the research corpus existed."""
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from shallow_dive import checkpoints, config, runner, workflow
+from shallow_dive.corpus import documents
+from shallow_dive.sections import SECTION_RESEARCH, _collect_research
+from shallow_dive.state import merge_refs
+
+
+def test_legacy_research_moves_into_corpus(monkeypatch):
+    monkeypatch.setattr(runner, "invalidate_search_cache", lambda queries: None)
+    result = {"url": "https://example.com/a", "title": "A", "content": "Acme margins widened."}
+    other = {"url": "https://example.com/b", "title": "B", "content": "Acme ownership is concentrated."}
+    stored = {
+        "company_name": "Acme",
+        "ticker": "ACME",
+        "completed_sections": ["1.1", "2.1"],
+        "web_research": [result, other],
+        "research_results": {"Acme business model": [result]},
+    }
+
+    state = runner._regeneration_state(stored, ["2.1"])
+
+    assert all(isinstance(ref, str) for ref in state["web_research"])
+    assert [doc["url"] for doc in documents(state, state["web_research"])] == [result["url"], other["url"]]
+    assert merge_refs(state["web_research"], state["research_results"]["Acme business model"]) == state["web_research"]
+    _, refs = _collect_research(state, ["Acme business model"], {})
+    assert documents(state, refs)[0]["content"] == result["content"]
+
+
+class _Search:
+    def invoke(self, request):
+        return [{"url": f"https://example.com/{abs(hash(request['query']))}", "title": request["query"], "content": "Finding."}]
+
+
+class _LLM:
+    model_name = "test-model"
+    temperature = 0.3
+
+    def __init__(self):
+        self.draft = 1
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        return AIMessage(content=f"Draft {self.draft}.")
+
+
+@pytest.fixture
+def stored_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setattr(config, "CACHE_DB", "")
+    monkeypatch.setattr(config, "FMP_API_KEY", None)
+    monkeypatch.setattr(config, "ALPHA_VANTAGE_KEY", None)
+    monkeypatch.setattr(config, "search_tool", _Search())
+    monkeypatch.setattr(checkpoints, "_conn", None)
+    monkeypatch.setattr(checkpoints, "_saver", None)
+    workflow._compiled_workflow.cache_clear()
+    llm = _LLM()
+    monkeypatch.setattr(config, "llm", llm)
+    assert runner.analyze_single_company("Acme", "ACME", str(tmp_path))["status"] == "Success"
+    yield llm, str(tmp_path)
+    workflow._compiled_workflow.cache_clear()
+
+
+def test_regenerates_selected_sections_and_their_dependents(stored_run):
+    llm, output_dir = stored_run
+    before = checkpoints.load_state("ACME", checkpoints.latest_run("ACME", complete=True))
+    llm.draft, llm.calls = 2, 0
+
+    result = runner.regenerate_sections("ACME", ["8.2"], output_dir)
+
+    after = checkpoints.load_state("ACME", checkpoints.latest_run("ACME", complete=True))
+    assert result["status"] == "Success" and result["regenerated"] == ["8.2", "8.3", "8.4"]
+    assert llm.calls == 3
+    for section_id in SECTION_RESEARCH:
+        key = f"section_{section_id.replace('.', '_')}"
+        assert after[key] == ("Draft 2." if section_id in result["regenerated"] else before[key])
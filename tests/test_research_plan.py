@@ -0,0 +1,56 @@
+"""The planner prefetches every section's searches concurrently, so sections never search."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from shallow_dive import config, sections
+
+
+class _Search:
+    """Records queries and the most searches in flight at once."""
+
+    def __init__(self):
+        self.queries = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, request):
+        with self._lock:
+            self.queries.append(request["query"])
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self._lock:
+            self.in_flight -= 1
+        return [{"url": f"https://example.com/{len(self.queries)}", "title": request["query"], "content": "Finding."}]
+
+    async def ainvoke(self, request):
+        return await asyncio.to_thread(self.invoke, request)
+
+
+STATE = {"company_name": "Acme", "ticker": "ACME", "sources": [], "source_map": {}, "research_corpus": {}}
+
+
+@pytest.fixture
+def search(monkeypatch):
+    tool = _Search()
+    monkeypatch.setattr(config, "CACHE_DB", "")
+    monkeypatch.setattr(config, "search_tool", tool)
+    return tool
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_plan_prefetches_every_section_query_concurrently(search, mode):
+    state = dict(STATE)
+    update = sections.plan_research(state) if mode == "sync" else asyncio.run(sections.aplan_research(state))
+    state.update(update)
+
+    assert len(search.queries) == len(set(search.queries)) == len(sections._planned_queries(state))
+    assert search.most_in_flight > 1
+    for section_id in sections.SECTION_RESEARCH:
+        assert sections._missing_queries(state, sections.section_queries(state, [section_id])) == []
+    assert sections._missing_queries(state, sections._format_queries(state, sections.FINANCIAL_QUERIES)) == []
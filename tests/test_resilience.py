@@ -0,0 +1,108 @@
+"""Circuit breaker probes always settle; hedged calls never wait behind the hedge pool."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from shallow_dive import config, resilience
+from shallow_dive.resilience import ProviderError, ProviderPolicy
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setattr(config, "RETRY_ATTEMPTS", 0)
+    monkeypatch.setattr(config, "BREAKER_FAILURES", 1)
+    monkeypatch.setattr(config, "BREAKER_RESET_SECONDS", 0)
+    monkeypatch.setattr(config, "HEDGE_REQUESTS", False)
+    policy = ProviderPolicy("test")
+
+    def transient():
+        raise ProviderError("503 from provider", retryable=True)
+
+    with pytest.raises(ProviderError):
+        policy.call(transient)
+    assert policy.breaker.opened_at is not None
+    return policy
+
+
+def test_probe_failing_non_retryable_closes_breaker(policy):
+    def bad_request():
+        raise ProviderError("400 invalid symbol", retryable=False)
+
+    with pytest.raises(ProviderError):
+        policy.call(bad_request)
+
+    assert policy.breaker.probing is None
+    assert policy.breaker.opened_at is None
+    assert policy.call(lambda: "ok") == "ok"
+
+
+def test_cancelled_probe_frees_half_open_slot(policy):
+    async def run():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+
+        probe = asyncio.create_task(policy.acall(hang))
+        await started.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def ok():
+            return "ok"
+
+        return await policy.acall(ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert policy.breaker.probing is None
+    assert policy.breaker.opened_at is None
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(config, "RETRY_ATTEMPTS", 0)
+    monkeypatch.setattr(config, "BREAKER_FAILURES", 0)
+    monkeypatch.setattr(config, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(config, "HEDGE_MIN_SAMPLES", 1)
+    policy = ProviderPolicy("tavily")
+    policy.latency.add(0.05)
+    # A hedge pool that is busy with other callers' duplicates
+    busy = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=1)
+    pool.submit(busy.wait)
+    monkeypatch.setattr(resilience, "_hedge_pool", pool)
+    yield policy
+    busy.set()
+    pool.shutdown()
+
+
+def test_ordinary_call_does_not_queue_behind_busy_hedge_pool(hedging):
+    results = []
+    caller = threading.Thread(target=lambda: results.append(hedging.call(lambda: "ok")), daemon=True)
+    caller.start()
+    caller.join(timeout=1)
+
+    assert results == ["ok"]
+
+
+def test_faster_duplicate_wins_over_slow_first_attempt(hedging, monkeypatch):
+    monkeypatch.setattr(resilience, "_hedge_pool", ThreadPoolExecutor(max_workers=1))
+    calls = []
+
+    def search():
+        calls.append(None)
+        if len(calls) == 1:
+            time.sleep(2)
+            return "slow"
+        return "fast"
+
+    started = time.perf_counter()
+
+    assert hedging.call(search) == "fast"
+    assert time.perf_counter() - started < 1 and hedging.hedged == 1
@@ -0,0 +1,37 @@
+"""The resume hint logged for a failed run must be a working command."""
+
+import sys
+
+import pytest
+
+from shallow_dive import checkpoints, config, runner
+
+
+@pytest.fixture
+def runs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setattr(checkpoints, "_conn", None)
+    monkeypatch.setattr(runner.config, "validate_api_keys", lambda: [])
+    calls = []
+    monkeypatch.setattr(runner, "analyze_single_company", lambda *args, **kwargs: calls.append((args, kwargs)))
+    return calls
+
+
+def test_resume_with_ticker_and_run_id_only(runs_db, monkeypatch):
+    checkpoints.record_run("ACME", "run-1", "running", "Acme Corp")
+    checkpoints.record_run("ACME", "run-1", "failed")
+    monkeypatch.setattr(sys, "argv", ["shallow_dive", "--ticker", "ACME", "--resume", "--run-id", "run-1"])
+
+    runner.main()
+
+    (args, kwargs), = runs_db
+    assert args[:2] == ("Acme Corp", "ACME")
+    assert kwargs["resume"] is True and kwargs["run_id"] == "run-1"
+
+
+def test_resume_without_recorded_run_is_refused(runs_db, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["shallow_dive", "--ticker", "NONE", "--resume"])
+
+    runner.main()
+
+    assert runs_db == []
@@ -0,0 +1,43 @@
+"""Tavily searches are served from the on-disk cache, without blocking the event loop."""
+
+import asyncio
+import threading
+
+from shallow_dive import config, data_sources
+
+
+class _Search:
+    def __init__(self):
+        self.queries = []
+
+    def invoke(self, request):
+        self.queries.append(request["query"])
+        return [{"url": "https://example.com/a", "title": "A", "content": request["query"]}]
+
+    async def ainvoke(self, request):
+        return self.invoke(request)
+
+
+def _record_threads(monkeypatch, target, names):
+    threads = {}
+    for name in names:
+        method = getattr(target, name)
+
+        def recorded(*args, _method=method, _name=name):
+            threads[_name] = threading.current_thread() is threading.main_thread()
+            return _method(*args)
+
+        monkeypatch.setattr(target, name, recorded)
+    return threads
+
+
+def test_async_search_uses_cache_off_the_event_loop(cache_db, monkeypatch):
+    search = _Search()
+    monkeypatch.setattr(config, "search_tool", search)
+    threads = _record_threads(monkeypatch, data_sources.search_cache, ["get", "set"])
+
+    first = asyncio.run(data_sources.aweb_search("acme margins"))
+    second = asyncio.run(data_sources.aweb_search("Acme  margins"))
+
+    assert first == second and search.queries == ["acme margins"]
+    assert threads == {"get": False, "set": False}
@@ -0,0 +1,37 @@
+"""The service compiles the workflow variant its jobs run before accepting them."""
+
+import pytest
+
+from shallow_dive import checkpoints, config, server, workflow
+
+
+class _Interrupted:
+    def __init__(self, address, handler):
+        pass
+
+    def serve_forever(self):
+        raise KeyboardInterrupt
+
+    def server_close(self):
+        pass
+
+
+@pytest.fixture
+def fresh_workflows(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setattr(checkpoints, "_conn", None)
+    monkeypatch.setattr(checkpoints, "_saver", None)
+    workflow._compiled_workflow.cache_clear()
+    yield
+    workflow._compiled_workflow.cache_clear()
+
+
+def test_serve_warms_the_job_workflow(fresh_workflows, monkeypatch):
+    monkeypatch.setattr(server, "ThreadingHTTPServer", _Interrupted)
+
+    server.serve()
+    warmed = workflow._compiled_workflow.cache_info().currsize
+    workflow.get_workflow(checkpoint=checkpoints.enabled())  # As analyze_single_company calls it
+
+    assert warmed == 1
+    assert workflow._compiled_workflow.cache_info().hits == 1
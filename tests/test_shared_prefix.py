@@ -0,0 +1,83 @@
+"""Every section prompt starts with the same system message, long enough for provider prefix caching."""
+
+from shallow_dive import runner, sections
+from shallow_dive.context_budget import count_tokens
+
+# OpenAI caches prompt prefixes from this many tokens on
+MIN_CACHED_PREFIX_TOKENS = 1024
+
+YEARS = range(2019, 2024)
+
+STATE = {
+    "company_name": "Example Corp",
+    "ticker": "EXM",
+    "company_overview": {
+        "companyName": "Example Corp",
+        "sector": "Industrials",
+        "industry": "Specialty Industrial Machinery",
+        "country": "US",
+        "mktCap": 12_500_000_000,
+        "description": "Example Corp designs and services industrial pumps, valves and flow-control systems for water utilities. " * 6,
+    },
+    "financial_metrics": {
+        "provider": "fmp",
+        "income_statement": [
+            {"date": f"{year}-12-31", "revenue": 4.1e9 + year, "grossProfit": 1.5e9, "operatingIncome": 6.2e8, "incomeBeforeTax": 5.8e8, "incomeTaxExpense": 1.3e8, "netIncome": 4.5e8, "eps": 3.12}
+            for year in YEARS
+        ],
+        "metrics": [
+            {"date": f"{year}-12-31", "marketCap": 1.25e10, "peRatio": 27.7, "enterpriseValueOverEBITDA": 16.1, "freeCashFlowYield": 0.038, "returnOnEquity": 0.182, "returnOnInvestedCapital": 0.121, "incomeQuality": 1.14, "netDebtToEBITDA": 1.6}
+            for year in YEARS
+        ],
+        "ratios": [
+            {"date": f"{year}-12-31", "netProfitMargin": 0.109, "assetTurnover": 0.71, "financialLeverageRatio": 2.35, "currentRatio": 1.8, "interestCoverage": 11.4}
+            for year in YEARS
+        ],
+    },
+    "section_1_1": "Example Corp is a mid-cap maker of flow-control equipment. Margins have widened steadily.",
+    "web_research": [],
+    "sources": [],
+    "source_map": {},
+}
+
+
+def _messages(section_id: str) -> list:
+    build_prompt = getattr(sections, f"_prompt_section_{section_id.replace('.', '_')}")
+    return sections._section_messages(STATE, [], build_prompt)
+
+
+def test_shared_prefix_is_long_enough_to_be_cached():
+    assert count_tokens(sections._shared_prefix(STATE)) >= MIN_CACHED_PREFIX_TOKENS
+
+
+def test_every_section_starts_with_the_same_prefix():
+    prompts = [_messages(section_id) for section_id in sections.SECTION_RESEARCH]
+
+    assert {messages[0].content for messages in prompts} == {sections._shared_prefix(STATE)}
+    assert len({messages[1].content for messages in prompts}) == len(prompts)
+
+
+def test_prefix_does_not_change_as_the_run_progresses():
+    later = {
+        **STATE,
+        "section_2_1": "Value drivers are volume and pricing.",
+        "sources": [{"url": "https://example.com/a", "title": "A"}],
+        "source_map": {"https://example.com/a": 1},
+        "completed_sections": ["1.1", "2.1"],
+    }
+
+    assert sections._shared_prefix(later) == sections._shared_prefix(STATE)
+
+
+def test_cached_prompt_tokens_are_totalled(tmp_path):
+    state = runner._initial_state("Example Corp", "EXM")
+    state["llm_metrics"] = {
+        "1.1": {"input_tokens": 1500, "cached_input_tokens": 0, "output_tokens": 300, "generation_s": 4.0, "ttft_s": 1.2},
+        "1.2": {"input_tokens": 1400, "cached_input_tokens": 1280, "output_tokens": 280, "generation_s": 3.0, "ttft_s": 0.6},
+    }
+    state.update(sections.compile_final_report(state))
+
+    result = runner._save_report("Example Corp", "EXM", str(tmp_path), state)
+
+    assert (result["input_tokens"], result["cached_input_tokens"]) == (2900, 1280)
+    assert "Prompt Tokens From Provider Cache: 1280/2900" in state["final_report"]
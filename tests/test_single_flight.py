@@ -0,0 +1,72 @@
+"""Concurrent identical calls share one request; later calls make their own."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from shallow_dive.single_flight import SingleFlight
+
+
+def test_threads_share_one_call():
+    flights = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(timeout=5)
+        return ["result"]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flights.do, "query", fetch) for _ in range(4)]
+        while flights.shared < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert results == [["result"]] * 4 and len(calls) == 1
+    assert flights.do("query", fetch) == ["result"] and len(calls) == 2
+
+
+def test_waiters_get_the_leaders_error():
+    flights = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(timeout=5)
+        raise ConnectionError("reset")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flights.do, "query", fail)
+        started.wait(timeout=5)
+        waiter = pool.submit(flights.do, "query", fail)
+        while flights.shared < 1:
+            time.sleep(0.01)
+        release.set()
+        for future in (leader, waiter):
+            with pytest.raises(ConnectionError):
+                future.result(timeout=5)
+
+
+def test_tasks_share_one_call_and_survive_a_cancelled_waiter():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["result"]
+
+    async def main():
+        cancelled = asyncio.ensure_future(flights.ado("query", fetch))
+        others = [asyncio.ensure_future(flights.ado("query", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await asyncio.gather(*others)
+
+    assert asyncio.run(main()) == [["result"]] * 3 and len(calls) == 1
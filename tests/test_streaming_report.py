@@ -0,0 +1,80 @@
+"""The report file fills in section by section while the graph runs."""
+
+import os
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from shallow_dive import config, runner, streaming_report
+
+
+class _Search:
+    def invoke(self, request):
+        return []
+
+
+class _LLM:
+    """Writes sections; for the last one, snapshots the report file as it is on disk."""
+
+    model_name = "test-model"
+    temperature = 0.3
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshot = None
+
+    def invoke(self, messages, **kwargs):
+        if "Section 8.4" in messages[1].content and os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as file:
+                self.snapshot = file.read()
+        return AIMessage(content="Finished analysis.")
+
+
+@pytest.fixture
+def report(tmp_path):
+    return streaming_report.StreamingReport(str(tmp_path / "ACME_report.md"), "Acme", "ACME")
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def test_completed_sections_are_written_and_others_pending(report):
+    report.apply("initialize", {"sources": []})
+    assert not os.path.exists(report.path)
+
+    report.apply("section_1_1", {"section_1_1": "Acme makes widgets.", "completed_sections": ["1.1"]})
+
+    text = _read(report.path)
+    assert "Acme makes widgets." in text and "*Pending...*" in text
+    assert "1/25 sections complete" in text
+
+
+def test_streamed_tokens_rewrite_at_most_once_a_second(report, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(streaming_report.time, "monotonic", lambda: now[0])
+
+    report.append("1.1", "Acme ")
+    report.append("1.1", "makes ")
+    assert "Acme makes" not in _read(report.path)
+    now[0] += 1.0
+    report.append("1.1", "widgets.")
+
+    assert "Acme makes widgets." in _read(report.path)
+
+
+def test_run_streams_report_before_it_finishes(tmp_path, monkeypatch):
+    llm = _LLM(runner._report_path(str(tmp_path), "ACME"))
+    monkeypatch.setattr(config, "CHECKPOINT_DB", "")
+    monkeypatch.setattr(config, "CACHE_DB", "")
+    monkeypatch.setattr(config, "FMP_API_KEY", None)
+    monkeypatch.setattr(config, "ALPHA_VANTAGE_KEY", None)
+    monkeypatch.setattr(config, "search_tool", _Search())
+    monkeypatch.setattr(config, "llm", llm)
+
+    result = runner.analyze_single_company("Acme", "ACME", str(tmp_path), stream_report=True)
+
+    assert result["status"] == "Success"
+    assert "Finished analysis." in llm.snapshot and "Report in progress" in llm.snapshot
+    assert "Report in progress" not in _read(llm.path)
@@ -0,0 +1,56 @@
+"""Section nodes wait for exactly the earlier sections their prompts read."""
+
+import pytest
+
+from shallow_dive import sections, workflow
+
+
+def _ancestors(name: str) -> set[str]:
+    found = set()
+    pending = list(workflow.SECTION_NODES[name][2])
+    while pending:
+        node = pending.pop()
+        if node in workflow.SECTION_NODES and node not in found:
+            found.add(node)
+            pending.extend(workflow.SECTION_NODES[node][2])
+    return found
+
+
+STATE = {
+    "company_name": "Example Corp",
+    "ticker": "EXM",
+    "web_research": [],
+    "sources": [],
+    "source_map": {},
+    **{name: f"Marker {name} text." for name in workflow.SECTION_NODES},
+}
+
+
+def test_upstream_nodes_are_declared_first():
+    order = list(workflow.SECTION_NODES)
+    for position, (name, (_, _, upstream)) in enumerate(workflow.SECTION_NODES.items()):
+        assert all(node == "gather_financials" or order.index(node) < position for node in upstream), name
+
+
+@pytest.mark.parametrize("name", list(workflow.SECTION_NODES))
+def test_prompt_reads_only_sections_it_waits_for(name):
+    build_prompt = getattr(sections, f"_prompt_{name}")
+    prompt = build_prompt(STATE, [])
+
+    read = {other for other in workflow.SECTION_NODES if f"Marker {other} text." in prompt}
+    assert read <= _ancestors(name)
+
+
+def test_downstream_nodes_follow_dependencies_transitively():
+    selected = workflow.downstream_nodes(["section_4_2"])
+
+    assert selected[0] == "section_4_2"
+    assert {"section_4_3", "section_4_4", "section_5_1", "section_6_1", "section_7_1", "section_8_3"} <= set(selected)
+    assert not {"section_3_1", "section_4_1", "section_8_1"} & set(selected)
+
+
+def test_independent_branches_start_together():
+    graph = workflow.build_workflow().get_graph()
+    successors = {edge.target for edge in graph.edges if edge.source == "section_2_1"}
+
+    assert {"section_3_1", "section_4_2"} <= successors